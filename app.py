@@ -21,11 +21,53 @@ import urllib.error
 from datetime import datetime
 import logging
 import multiprocessing
+import argparse
+import socket
+import atexit
+import heapq
+import math
+import functools
+import contextlib
+import io
+import gzip
+import mimetypes
+import re
+import zipfile
+import http.server
+import bottle
+from collections import deque
+import gevent
+from gevent.local import local as greenlet_local
+
+try:
+    import psutil  # 可选：用于采样工具进程的 CPU/内存
+except ImportError:
+    psutil = None
+
+try:
+    import brotli  # 可选：前端资源的 brotli 预压缩
+except ImportError:
+    brotli = None
+
+
+def get_app_data_dir():
+    """获取应用数据目录（日志、实例信息等，不随周缓存轮换）"""
+    if platform.system() == 'Windows':
+        return os.path.join(os.getenv('LOCALAPPDATA', os.path.expanduser('~')), 'Temp', 'ProductivityTools')
+    return os.path.join('/tmp', 'ProductivityTools')
+
+
+def get_cache_base_dir():
+    """获取隐藏缓存目录所在的目录"""
+    if platform.system() == 'Windows':
+        return os.path.join(os.getenv('LOCALAPPDATA', os.path.expanduser('~')), 'Temp')
+    return '/tmp'
+
 
 # 配置日志系统（打包后不显示命令行窗口）
 if getattr(sys, 'frozen', False):
     # 打包后：将日志输出到文件
-    log_dir = os.path.join(os.getenv('LOCALAPPDATA', os.path.expanduser('~')), 'Temp', 'ProductivityTools')
+    log_dir = get_app_data_dir()
     os.makedirs(log_dir, exist_ok=True)
     log_file = os.path.join(log_dir, 'app.log')
     
@@ -60,11 +102,2023 @@ else:
         import io
         sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-# 定义 print 函数的替代品
-def log_print(*args, **kwargs):
-    """替代 print 的日志函数"""
-    message = ' '.join(str(arg) for arg in args)
-    logging.info(message)
+# 定义 print 函数的替代品
+def log_print(*args, **kwargs):
+    """替代 print 的日志函数"""
+    message = ' '.join(str(arg) for arg in args)
+    logging.info(message)
+
+
+def notify_user(title, message):
+    """需要用户知道的提示：写入日志，打包模式下（没有控制台）再弹出对话框"""
+    log_print(f"⚠ {title}: {message}")
+    if getattr(sys, 'frozen', False):
+        try:
+            import tkinter as tk
+            from tkinter import messagebox
+            root = tk.Tk()
+            root.withdraw()
+            messagebox.showwarning(title, message)
+            root.destroy()
+        except Exception:
+            pass
+
+
+def pid_alive(pid):
+    """进程是否仍在运行（无法判断时视为在运行）"""
+    if pid is None:
+        return True
+    if pid <= 0:
+        return False
+    if psutil:
+        return psutil.pid_exists(pid)
+    if os.name == 'nt':
+        # Windows 上 os.kill 会结束进程，只能查询进程句柄
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() == 5  # 拒绝访问：进程存在但属于其他用户
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class SingleInstanceChannel:
+    """单实例通道：首个实例监听本地端口，后续启动把意图（聚焦/启动工具）转交给它"""
+
+    def __init__(self, state_dir):
+        self.state_file = os.path.join(state_dir, 'instance.json')
+        self.token = None
+        self.server = None
+        self.dispatch = None     # 主实例初始化完成后接入的处理函数
+        self.backlog = deque()   # 初始化期间收到的意图
+        self.rejected = None     # 运行中的实例拒绝请求时的原因
+        self._lock = threading.Lock()
+
+    def read_instance_info(self):
+        """读取正在运行实例的端口、令牌和进程号（旧格式没有进程号时为 None）"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            pid = info.get('pid')
+            return int(info['port']), info['token'], int(pid) if pid is not None else None
+        except Exception:
+            return None
+
+    def forward(self, intent, connect_timeout=0.3, reply_timeout=5):
+        """尝试把意图转交给正在运行的实例
+
+        只有收到本应用格式的应答（带 ok 字段）才返回 True；实例信息过期（进程已退出、端口无人监听
+        或被其他程序占用、应答超时）返回 False，由本进程作为新的主实例启动。
+        应答为拒绝时仍返回 True（实例在运行），原因记录在 rejected。
+        """
+        self.rejected = None
+        info = self.read_instance_info()
+        if not info:
+            return False
+
+        port, token, pid = info
+        if not pid_alive(pid):
+            return False  # 记录的进程已退出，端口可能已被其他程序使用
+        try:
+            sock = socket.create_connection(('127.0.0.1', port), timeout=connect_timeout)
+        except OSError:
+            # 端口无人监听：实例信息已过期
+            return False
+
+        with sock:
+            try:
+                # 主实例收到后立即应答（处理在其初始化完成后进行）
+                sock.settimeout(reply_timeout)
+                message = dict(intent, token=token)
+                sock.sendall((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+                reply = sock.makefile('r', encoding='utf-8').readline()
+            except OSError:
+                # 主实例的监听线程收到即应答，超时或断开说明这不是本应用的端口
+                return False
+
+        try:
+            result = json.loads(reply)
+        except ValueError:
+            return False
+        if not isinstance(result, dict) or 'ok' not in result:
+            return False
+        if not result['ok']:
+            self.rejected = result.get('message') or '未知错误'
+        return True
+
+    def listen(self):
+        """成为主实例：监听本地端口并记录实例信息
+
+        监听在独立的系统线程中运行：主实例初始化（阻塞的下载等）期间也能立即应答，
+        收到的意图先排队，attach 之后交给主循环处理。
+        """
+        self.token = secrets.token_hex(16)
+        self.server = socket.create_server(('127.0.0.1', 0))
+        port = self.server.getsockname()[1]
+        threading.Thread(target=self._serve, args=(self.server,), daemon=True, name='instance-channel').start()
+
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        temp_file = self.state_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({"port": port, "token": self.token, "pid": os.getpid()}, f)
+        os.replace(temp_file, self.state_file)
+
+        atexit.register(self.close)
+        log_print(f"✓ 单实例通道已就绪 (端口 {port})")
+
+    def _serve(self, server):
+        while True:
+            try:
+                sock, _ = server.accept()
+            except OSError:
+                return  # 监听已关闭
+            with sock:
+                self._handle_connection(sock)
+
+    def _handle_connection(self, sock):
+        message = None
+        try:
+            sock.settimeout(2.0)
+            line = sock.makefile('r', encoding='utf-8').readline()
+            message = json.loads(line) if line else {}
+            if message.pop('token', None) != self.token:
+                result = {"ok": False, "message": "令牌无效"}
+                message = None
+            else:
+                result = {"ok": True, "message": "已接收"}
+        except Exception as e:
+            result = {"ok": False, "message": str(e)}
+        try:
+            sock.sendall((json.dumps(result, ensure_ascii=False) + '\n').encode('utf-8'))
+        except OSError:
+            pass
+        if message is not None:
+            self.deliver(message)
+
+    def deliver(self, message):
+        """已接入处理函数时交给它，否则排队等待 attach"""
+        with self._lock:
+            if self.dispatch is None:
+                self.backlog.append(message)
+                return
+            dispatch = self.dispatch
+        dispatch(message)
+
+    def attach(self, handler, dispatcher):
+        """主实例准备好处理意图：之后的意图在主循环中交给 handler，返回初始化期间排队的意图"""
+        def dispatch(message):
+            dispatcher.call(self._run_handler, handler, message)
+
+        with self._lock:
+            self.dispatch = dispatch
+            backlog, self.backlog = list(self.backlog), deque()
+        return backlog
+
+    @staticmethod
+    def _run_handler(handler, message):
+        result = handler(message) or {"ok": True}
+        if not result.get('ok'):
+            log_print(f"⚠ 转交的请求未执行: {result.get('message', '未知错误')}")
+
+    def close(self):
+        """关闭监听并移除属于本实例的实例信息"""
+        if self.server:
+            try:
+                # 先 shutdown 才能唤醒阻塞在 accept 中的监听线程
+                self.server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                self.server.close()
+            except Exception:
+                pass
+            self.server = None
+
+        info = self.read_instance_info()
+        if info and info[1] == self.token:
+            try:
+                os.remove(self.state_file)
+            except OSError:
+                pass
+
+
+def write_precompressed(web_dir):
+    """为前端文件生成 .gz/.br 预压缩版本（在更新前端文件后调用）"""
+    count = 0
+    for name in os.listdir(web_dir):
+        path = os.path.join(web_dir, name)
+        if not os.path.isfile(path) or name.endswith(StaticAssetBundle.COMPRESSED_SUFFIXES):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli:
+            variants['.br'] = brotli.compress(data)
+        for suffix, compressed in variants.items():
+            temp_path = path + suffix + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(temp_path, path + suffix)
+            count += 1
+    return count
+
+
+class StaticAssetBundle:
+    """前端静态资源层：预加载到内存，提供 gzip/brotli 预压缩版本、强 ETag、内容哈希文件名和长期缓存"""
+
+    COMPRESSED_SUFFIXES = ('.gz', '.br')
+    HASHED_EXTENSIONS = ('.css', '.js')  # 以内容哈希命名、可永久缓存的资源
+    ASSET_PREFIX = '/_assets/'
+    IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+    def __init__(self, web_dir, entry='index.html'):
+        self.web_dir = web_dir
+        self.entry = entry
+        self.assets = {}     # 访问名 -> 资源
+        self.hashed_names = {}  # 原文件名 -> 哈希文件名
+        self.source_hashes = {}  # 原文件名 -> 原始内容哈希（热更新时比较）
+
+    def load(self):
+        """读取 web 目录下的全部文件到内存，并生成入口页面"""
+        assets = {}
+        hashed_names = {}
+        source_hashes = {}
+        for name in sorted(os.listdir(self.web_dir)):
+            path = os.path.join(self.web_dir, name)
+            if not os.path.isfile(path) or name.endswith(self.COMPRESSED_SUFFIXES) or name.endswith('.tmp'):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            asset = self._build_asset(name, data, path)
+            source_hashes[name] = asset['hash']
+            if os.path.splitext(name)[1] in self.HASHED_EXTENSIONS:
+                stem, ext = os.path.splitext(name)
+                hashed = f"{stem}.{asset['hash'][:12]}{ext}"
+                hashed_names[name] = hashed
+                assets[hashed] = asset
+            assets[name] = asset
+
+        # 入口页面引用改为哈希文件名（入口本身每次都要协商缓存）
+        if self.entry in assets:
+            html = assets[self.entry]['raw'].decode('utf-8')
+            for name, hashed in hashed_names.items():
+                html = re.sub(r'((?:href|src)=["\'])(?:\./)?' + re.escape(name) + r'(["\'])',
+                              lambda m: m.group(1) + self.ASSET_PREFIX + hashed + m.group(2), html)
+            assets[self.entry] = self._build_asset(self.entry, html.encode('utf-8'))
+
+        self.assets = assets
+        self.hashed_names = hashed_names
+        self.source_hashes = source_hashes
+        total = sum(len(a['raw']) for a in assets.values())
+        log_print(f"✓ 前端资源已载入内存: {len(hashed_names)} 个哈希资源, {total} bytes")
+        return self
+
+    def _build_asset(self, name, data, source_path=None):
+        """构建单个资源：内容哈希、ETag 和压缩版本"""
+        digest = hashlib.sha256(data).hexdigest()
+        variants = {}
+        # 优先使用更新时生成的预压缩文件，缺失或过期时在内存中压缩
+        for suffix, encoding in (('.br', 'br'), ('.gz', 'gzip')):
+            if source_path and os.path.exists(source_path + suffix) \
+                    and os.path.getmtime(source_path + suffix) >= os.path.getmtime(source_path):
+                with open(source_path + suffix, 'rb') as f:
+                    variants[encoding] = f.read()
+        if 'gzip' not in variants:
+            variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+        if brotli and 'br' not in variants:
+            variants['br'] = brotli.compress(data)
+        # 压缩后反而更大的不使用
+        variants = {k: v for k, v in variants.items() if len(v) < len(data)}
+
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'text/javascript'):
+            content_type += '; charset=utf-8'
+        return {
+            "raw": data,
+            "hash": digest,
+            "etag": f'"{digest[:32]}"',
+            "content_type": content_type,
+            "variants": variants
+        }
+
+    def register_routes(self, app):
+        """在 Eel 注册默认路由之前挂载，优先于 Eel 的磁盘静态文件路由"""
+        app.route('/', callback=lambda: self.serve(self.entry))
+        app.route('/' + self.entry, callback=lambda: self.serve(self.entry))
+        app.route(self.ASSET_PREFIX + '<name>', callback=self.serve)
+
+    def serve(self, name):
+        asset = self.assets.get(name)
+        if asset is None:
+            return bottle.HTTPError(404, "Not found")
+
+        immutable = name in self.hashed_names.values()
+        headers = {
+            'ETag': asset['etag'],
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': self.IMMUTABLE_CACHE if immutable else 'no-cache'
+        }
+
+        # 协商缓存命中：直接返回 304，不传输内容
+        if_none_match = bottle.request.headers.get('If-None-Match', '')
+        if asset['etag'] in [tag.strip() for tag in if_none_match.split(',')]:
+            return bottle.HTTPResponse(status=304, **headers)
+
+        body = asset['raw']
+        accept = bottle.request.headers.get('Accept-Encoding', '')
+        for encoding in ('br', 'gzip'):
+            if encoding in asset['variants'] and encoding in accept:
+                body = asset['variants'][encoding]
+                headers['Content-Encoding'] = encoding
+                break
+        headers['Content-Type'] = asset['content_type']
+        headers['Content-Length'] = str(len(body))
+        return bottle.HTTPResponse(body=body, **headers)
+
+    def asset_url(self, name):
+        """页面中引用某个资源的地址（哈希资源带内容哈希）"""
+        return self.ASSET_PREFIX + self.hashed_names[name] if name in self.hashed_names else name
+
+    def reload(self, web_dir=None):
+        """重新载入资源，返回内容有变化的原文件名及其更新前的地址"""
+        old_hashes = dict(self.source_hashes)
+        old_urls = {name: self.asset_url(name) for name in old_hashes}
+        if web_dir:
+            self.web_dir = web_dir
+        self.load()
+        names = set(old_hashes) | set(self.source_hashes)
+        return {name: old_urls.get(name) for name in sorted(names)
+                if old_hashes.get(name) != self.source_hashes.get(name)}
+
+
+def switch_eel_web_root(web_dir):
+    """运行时切换 Eel 的静态文件目录，并为页面脚本中新增的 eel.expose 函数建立调用入口，返回新增的函数名
+
+    不能在运行中再次调用 eel.init：它会把所有页面函数重置为排队调用，
+    而已连接过的页面不会再重放队列，之后的推送全部丢失。
+    """
+    eel.root_path = eel._get_real_path(web_dir)
+    names = set()
+    for directory, _, files in os.walk(eel.root_path):
+        for name in files:
+            if not name.endswith(('.js', '.html', '.htm')):
+                continue
+            try:
+                with open(os.path.join(directory, name), encoding='utf-8') as f:
+                    names.update(eel.EXPOSED_JS_FUNCTIONS.parseString(f.read()).asList())
+            except (OSError, UnicodeDecodeError):
+                pass
+
+    added = [name for name in sorted(names) if name not in eel._js_functions and re.fullmatch(r'\w+', name)]
+    for name in added:
+        eel._js_functions.append(name)
+        if eel._websockets or eel._mock_queue_done:
+            # 页面已经连接过：直接发送（Eel 只在页面首次连接时重放排队的调用）
+            eel._import_js_function(name)
+        else:
+            eel._mock_js_function(name)
+    return added
+
+
+class HubDispatcher:
+    """把其他线程中的调用安全地转交给 Eel（gevent）事件循环所在的主线程执行"""
+
+    def __init__(self):
+        self.thread_ident = threading.get_ident()
+        self.pending = deque()
+        self.watcher = gevent.get_hub().loop.async_()
+        self.watcher.start(self._run_pending)
+
+    def call(self, func, *args):
+        """在主循环中执行 func（已在主线程时直接执行）"""
+        if threading.get_ident() == self.thread_ident:
+            func(*args)
+        else:
+            self.pending.append((func, args))
+            self.watcher.send()  # 线程安全的唤醒
+
+    def call_later(self, delay, func, *args):
+        """延迟 delay 秒后在主循环中执行 func"""
+        self.call(gevent.spawn_later, delay, func, *args)
+
+    def _run_pending(self):
+        while self.pending:
+            func, args = self.pending.popleft()
+            try:
+                func(*args)
+            except Exception as e:
+                log_print(f"⚠ 主循环回调失败: {e}")
+
+
+class ProgressBus:
+    """进度事件总线：生产者随时发布，按作业合并并限速后投递，附带吞吐量和剩余时间"""
+
+    def __init__(self, sink, dispatcher, max_rate=10.0):
+        self.sink = sink
+        self.dispatcher = dispatcher
+        self.min_interval = 1.0 / max_rate
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def publish(self, job, percent, status=None, done=None, total=None, final=False):
+        """发布进度（开销很小，可以在每个数据块到达时调用）"""
+        now = time.time()
+        final = final or percent >= 100
+        with self._lock:
+            state = self.jobs.setdefault(job, {"last_emit": 0.0, "scheduled": False, "speed": None})
+            if done is not None:
+                self._update_rate(state, done, now)
+            state["payload"] = {
+                "job": job,
+                "percent": max(0.0, min(100.0, percent)),
+                "status": status if status is not None else state.get("payload", {}).get("status", ""),
+                "done": done,
+                "total": total or None,
+                "speed": state["speed"],
+                "eta": self._eta(state, done, total)
+            }
+            wait = self.min_interval - (now - state["last_emit"])
+            if final or wait <= 0:
+                emit = True
+            else:
+                emit = False
+                if not state["scheduled"]:
+                    # 限速期间只保留最新状态，到期后补发一次
+                    state["scheduled"] = True
+                    self.dispatcher.call_later(wait, self._flush, job)
+
+        if emit:
+            self._emit(job)
+        if final:
+            with self._lock:
+                self.jobs.pop(job, None)
+
+    def clear(self, job):
+        """作业结束（成功、失败或转入排队）：丢弃其状态，尚未补发的进度不再投递"""
+        with self._lock:
+            self.jobs.pop(job, None)
+
+    def _update_rate(self, state, done, now):
+        """用指数滑动平均估算吞吐量（字节/秒）"""
+        prev = state.get("sample")
+        state["sample"] = (done, now)
+        if not prev or now <= prev[1] or done < prev[0]:
+            return
+        instant = (done - prev[0]) / (now - prev[1])
+        state["speed"] = instant if state["speed"] is None else 0.7 * state["speed"] + 0.3 * instant
+
+    @staticmethod
+    def _eta(state, done, total):
+        if not total or done is None or not state["speed"]:
+            return None
+        return max(0.0, (total - done) / state["speed"])
+
+    def _flush(self, job):
+        with self._lock:
+            state = self.jobs.get(job)
+            if not state:
+                return
+            state["scheduled"] = False
+        self._emit(job)
+
+    def _emit(self, job):
+        with self._lock:
+            state = self.jobs.get(job)
+            if not state:
+                return
+            state["last_emit"] = time.time()
+            payload = dict(state["payload"])
+        self.dispatcher.call(self.sink, payload)
+
+
+class ToolSupervisor:
+    """工具进程监管：回收已退出的进程，采样 CPU/内存，执行重启/终止策略
+
+    采样结果按档位比较（CPU 每 CPU_STEP 个百分点、内存每 RSS_STEP_MB 一档），只有进程增减、
+    状态或档位变化时才通知页面；运行时长由页面自己计时。
+    """
+
+    CPU_STEP = 5.0
+    RSS_STEP_MB = 10.0
+
+    # 默认策略：不限制内存和运行时长，异常退出不自动重启
+    DEFAULT_POLICY = {
+        "max_rss_mb": None,        # 常驻内存上限（MB），超过则终止
+        "max_runtime": None,       # 最长运行时间（秒），超过则终止
+        "restart_on_crash": False,  # 非零退出码时自动重启
+        "max_restarts": 2          # 自动重启次数上限
+    }
+
+    def __init__(self, interval=2.0, history_size=50, on_update=None, on_exit=None, on_restart=None):
+        self.interval = interval
+        self.on_update = on_update
+        self.on_exit = on_exit
+        self.on_restart = on_restart
+        self.running = {}  # pid -> 进程记录
+        self.history = deque(maxlen=history_size)
+        self.restart_counts = {}
+        self._greenlet = None
+
+    def register(self, tool_id, process, tool_name=None, policy=None):
+        """登记新启动的工具进程"""
+        record = {
+            "pid": process.pid,
+            "tool_id": tool_id,
+            "name": tool_name or tool_id,
+            "started_at": time.time(),
+            "cpu_percent": 0.0,
+            "rss_mb": 0.0,
+            "peak_rss_mb": 0.0,
+            "policy": dict(self.DEFAULT_POLICY, **(policy or {})),
+            "_process": process,
+            "_ps": None
+        }
+        record["_signature"] = self._signature(record)
+        if psutil:
+            try:
+                record["_ps"] = psutil.Process(process.pid)
+                record["_ps"].cpu_percent(None)  # 首次调用用于建立 CPU 采样基线
+            except Exception:
+                pass
+        self.running[process.pid] = record
+        self._notify()
+        return record
+
+    def start(self):
+        """在 Eel 的事件循环中启动采样协程"""
+        if self._greenlet is None:
+            self._greenlet = eel.spawn(self._run)
+
+    def _run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                log_print(f"⚠ 进程采样失败: {e}")
+            eel.sleep(self.interval)
+
+    def sample(self):
+        """轮询所有进程：回收已退出的，采样存活进程的资源占用"""
+        changed = False
+        now = time.time()
+
+        for pid, record in list(self.running.items()):
+            exit_code = record["_process"].poll()
+            if exit_code is not None:
+                self._reap(record, exit_code, now)
+                changed = True
+                continue
+
+            ps = record["_ps"]
+            if ps is not None:
+                try:
+                    record["cpu_percent"] = ps.cpu_percent(None)
+                    rss_mb = ps.memory_info().rss / (1024 * 1024)
+                    record["rss_mb"] = rss_mb
+                    record["peak_rss_mb"] = max(record["peak_rss_mb"], rss_mb)
+                except Exception:
+                    pass
+
+            self._enforce_policy(record, now)
+            signature = self._signature(record)
+            if signature != record.get("_signature"):
+                record["_signature"] = signature
+                changed = True
+
+        if changed:
+            self._notify()
+
+    def _signature(self, record):
+        """页面关心的状态：终止原因和分档后的 CPU/内存"""
+        return (record.get("kill_reason"),
+                int(record["cpu_percent"] // self.CPU_STEP),
+                int(record["rss_mb"] // self.RSS_STEP_MB))
+
+    def _reap(self, record, exit_code, now):
+        """记录退出信息并从运行表中移除"""
+        del self.running[record["pid"]]
+        runtime = now - record["started_at"]
+        entry = {
+            "pid": record["pid"],
+            "tool_id": record["tool_id"],
+            "name": record["name"],
+            "exit_code": exit_code,
+            "runtime": round(runtime, 1),
+            "peak_rss_mb": round(record["peak_rss_mb"], 1),
+            "ended_at": now,
+            "reason": record.get("kill_reason")
+        }
+        self.history.appendleft(entry)
+        log_print(f"   ↩ 工具已退出: {record['name']} (PID {record['pid']}, 退出码 {exit_code}, 运行 {runtime:.0f} 秒)")
+
+        if self.on_exit:
+            self.on_exit(entry)
+
+        policy = record["policy"]
+        if exit_code != 0 and not record.get("kill_reason") and policy.get("restart_on_crash"):
+            count = self.restart_counts.get(record["tool_id"], 0)
+            if count < policy.get("max_restarts", 0) and self.on_restart:
+                self.restart_counts[record["tool_id"]] = count + 1
+                log_print(f"   ↻ 自动重启: {record['name']} ({count + 1}/{policy['max_restarts']})")
+                eel.spawn(self.on_restart, record["tool_id"])
+
+    def _enforce_policy(self, record, now):
+        """超出内存或运行时长上限时终止进程"""
+        policy = record["policy"]
+        reason = None
+        if policy.get("max_rss_mb") and record["rss_mb"] > policy["max_rss_mb"]:
+            reason = f"内存超过 {policy['max_rss_mb']} MB"
+        elif policy.get("max_runtime") and now - record["started_at"] > policy["max_runtime"]:
+            reason = f"运行超过 {policy['max_runtime']} 秒"
+
+        if reason and not record.get("kill_reason"):
+            record["kill_reason"] = reason
+            log_print(f"   ✗ 终止工具: {record['name']} (PID {record['pid']}) - {reason}")
+            self.terminate(record["pid"])
+
+    def terminate(self, pid):
+        """终止指定进程"""
+        record = self.running.get(pid)
+        if not record:
+            return False
+        record.setdefault("kill_reason", "用户终止")
+        try:
+            record["_process"].terminate()
+        except Exception:
+            return False
+        return True
+
+    def running_count(self, tool_id=None):
+        """运行中的进程数（可按工具过滤）"""
+        return sum(1 for r in self.running.values() if tool_id is None or r["tool_id"] == tool_id)
+
+    def get_table(self):
+        """返回可序列化的进程表（供前端显示）"""
+        now = time.time()
+        running = []
+        for record in self.running.values():
+            running.append({
+                "pid": record["pid"],
+                "tool_id": record["tool_id"],
+                "name": record["name"],
+                "runtime": round(now - record["started_at"], 1),
+                "cpu_percent": round(record["cpu_percent"], 1),
+                "rss_mb": round(record["rss_mb"], 1),
+                "peak_rss_mb": round(record["peak_rss_mb"], 1)
+            })
+        return {
+            "running": running,
+            "history": list(self.history),
+            "sampling": psutil is not None
+        }
+
+    def _notify(self):
+        if self.on_update:
+            try:
+                self.on_update(self.get_table())
+            except Exception:
+                pass
+
+
+def _append_only_opener(path, flags):
+    """Windows：只以 FILE_APPEND_DATA 权限新建文件，子进程继承的句柄每次写入都落在文件末尾
+    （CRT 的 O_APPEND 只在本进程内模拟，子进程拿到的句柄仍按自己的位置写）"""
+    import ctypes
+    import msvcrt
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateFileW.restype = ctypes.c_void_p
+    # FILE_APPEND_DATA | FILE_READ_ATTRIBUTES | SYNCHRONIZE，共享读/写/删除，CREATE_ALWAYS
+    handle = kernel32.CreateFileW(path, 0x0004 | 0x0080 | 0x00100000, 0x7, None, 2, 0x80, None)
+    if handle is None or handle == ctypes.c_void_p(-1).value:
+        raise ctypes.WinError(ctypes.get_last_error())
+    return msvcrt.open_osfhandle(handle, os.O_WRONLY | os.O_APPEND)
+
+
+def open_append_log(path):
+    """新建交给子进程写入的日志文件：总是追加到末尾，文件被截断后子进程从头继续写，不会留下空洞"""
+    return open(path, 'ab', opener=_append_only_opener if os.name == 'nt' else None)
+
+
+class ToolOutputCapture:
+    """工具输出采集：子进程的 stdout/stderr 直接写入每次启动独立的日志文件，后台线程跟随读取到有界环形缓冲区
+
+    日志文件由子进程自己持有，启动器退出后工具照常写入，不会因为管道断开而在下一次输出时崩溃。
+    单个日志文件超过 max_log_bytes 时，跟随线程把已读完的内容转存为 <文件>.1（覆盖上一份）并截断原文件，
+    每次启动占用的磁盘空间不超过约 2 倍上限；截断瞬间新写入的少量输出可能不会留在磁盘上。
+    """
+
+    def __init__(self, log_dir, max_lines=2000, max_line_chars=2000, retain_exited=10,
+                 keep_logs=5, max_log_bytes=8 * 1024 * 1024, poll_interval=0.2):
+        self.log_dir = log_dir
+        self.max_lines = max_lines
+        self.max_line_chars = max_line_chars
+        self.retain_exited = retain_exited
+        self.keep_logs = keep_logs
+        self.max_log_bytes = max_log_bytes
+        self.poll_interval = poll_interval
+        self.buffers = {}  # pid -> 缓冲区
+        self._exited = deque()
+        self._lock = threading.Lock()
+
+    def open_logs(self, tool_id):
+        """为一次启动创建 stdout/stderr 日志文件，返回 (stdout, stderr) 文件对象
+
+        调用方把它们交给 Popen 后即可关闭自己的副本。
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._prune_logs(tool_id)
+        base = os.path.join(self.log_dir, f"{tool_id}-{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}")
+        stdout = open_append_log(base + '.out.log')
+        try:
+            stderr = open_append_log(base + '.err.log')
+        except OSError:
+            stdout.close()
+            raise
+        return stdout, stderr
+
+    def _prune_logs(self, tool_id):
+        """每个工具只保留最近 keep_logs 次启动的日志（新建前清理，正在写入的文件删除失败时跳过）"""
+        prefix = f"{tool_id}-"
+        runs = sorted((name[:-len('.out.log')] for name in os.listdir(self.log_dir)
+                       if name.startswith(prefix) and name.endswith('.out.log')),
+                      key=lambda run: os.path.getmtime(os.path.join(self.log_dir, run + '.out.log')))
+        for run in runs[:max(0, len(runs) - self.keep_logs + 1)]:
+            for suffix in ('.out.log', '.err.log', '.out.log.1', '.err.log.1'):
+                try:
+                    os.remove(os.path.join(self.log_dir, run + suffix))
+                except OSError:
+                    pass
+
+    def attach(self, tool_id, process, log_files):
+        """为新进程建立缓冲区，并启动跟随读取其日志文件的线程"""
+        # stdout/stderr 分开缓冲，避免大量普通输出把错误信息挤掉
+        buffer = {
+            "tool_id": tool_id,
+            "streams": {
+                "stdout": deque(maxlen=self.max_lines),
+                "stderr": deque(maxlen=self.max_lines)
+            },
+            "logs": {"stdout": log_files[0].name, "stderr": log_files[1].name},
+            "seq": 0,
+            "finished": False,
+            "done": threading.Event(),
+            "threads": []
+        }
+        with self._lock:
+            self.buffers[process.pid] = buffer
+
+        for stream_name, path in buffer["logs"].items():
+            thread = threading.Thread(
+                target=self._follow,
+                args=(buffer, stream_name, path),
+                daemon=True,
+                name=f"tool-output-{process.pid}-{stream_name}"
+            )
+            buffer["threads"].append(thread)
+            thread.start()
+
+    def _follow(self, buffer, stream_name, path):
+        """跟随读取日志文件：读到末尾时等待新内容，进程退出后读完剩余内容再结束"""
+        # 限制单次读取长度，超长的行会被拆成多段而不是无限增长
+        read_limit = self.max_line_chars * 4
+        pending = b''
+        try:
+            with open(path, 'rb') as f:
+                reader = f  # 转存时尚未读取的内容先从内存中读完
+                finished = False
+                while True:
+                    chunk = reader.readline(read_limit)
+                    if chunk:
+                        pending += chunk
+                        # 行还没写完整时先保留，等子进程写出换行
+                        if pending.endswith(b'\n') or len(pending) >= read_limit:
+                            self._append(buffer, stream_name, pending)
+                            pending = b''
+                        continue
+                    if reader is not f:
+                        reader = f
+                        continue
+                    if finished:
+                        break
+                    if self.max_log_bytes and f.tell() >= self.max_log_bytes:
+                        reader = self._rotate(f, path)
+                        continue
+                    # 读到末尾：进程已退出则再读一轮收尾
+                    finished = buffer["done"].wait(self.poll_interval)
+        except (OSError, ValueError):
+            pass
+        if pending:
+            self._append(buffer, stream_name, pending)
+
+    @staticmethod
+    def _rotate(f, path):
+        """日志转存为 .1 后截断，子进程以追加方式从头继续写
+
+        返回接下来的读取来源：转存期间新写入、尚未读取的内容（内存中），转存失败时仍为 f。
+        """
+        position = f.tell()
+        try:
+            with open(path + '.1', 'wb') as rotated:
+                f.seek(0)
+                shutil.copyfileobj(f, rotated)
+            f.seek(position)
+            unread = f.read()
+            os.truncate(path, 0)
+        except OSError:
+            f.seek(position)  # 转存失败时继续跟随，下次再试
+            return f
+        f.seek(0)
+        return io.BytesIO(unread)
+
+    def _append(self, buffer, stream_name, raw):
+        text = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        # 进度条类输出用 \r 刷新同一行，只保留最后一段
+        text = text.rsplit('\r', 1)[-1][:self.max_line_chars]
+        if not text:
+            return
+        with self._lock:
+            buffer["seq"] += 1
+            buffer["streams"][stream_name].append((buffer["seq"], time.time(), stream_name, text))
+
+    def release(self, pid, timeout=1.0):
+        """进程退出：读完日志文件中剩余的输出并保留供查看，超过保留数量的最早记录被丢弃"""
+        with self._lock:
+            buffer = self.buffers.get(pid)
+            if not buffer or buffer["finished"]:
+                return
+            buffer["finished"] = True
+        buffer["done"].set()
+        # 等待跟随线程读完最后的输出（退出记录要用到 stderr 末尾）
+        for thread in buffer["threads"]:
+            thread.join(timeout)
+        with self._lock:
+            self._exited.append(pid)
+            while len(self._exited) > self.retain_exited:
+                self.buffers.pop(self._exited.popleft(), None)
+
+    def tail(self, pid, count=5, stream=None):
+        """最近几行输出（用于退出记录）"""
+        with self._lock:
+            buffer = self.buffers.get(pid)
+            if not buffer:
+                return []
+            lines = self._merged(buffer) if stream is None else list(buffer["streams"][stream])
+        return [line[3] for line in lines[-count:]]
+
+    def get_output(self, pid, since=0, limit=500):
+        """获取指定进程序号 since 之后的输出（最多 limit 行）"""
+        with self._lock:
+            buffer = self.buffers.get(pid)
+            if not buffer:
+                return None
+            merged = self._merged(buffer)
+            lines = [line for line in merged if line[0] > since]
+            dropped = max(0, buffer["seq"] - len(merged))
+            result = {
+                "pid": pid,
+                "tool_id": buffer["tool_id"],
+                "finished": buffer["finished"],
+                "logs": buffer["logs"],
+                "seq": buffer["seq"],
+                "dropped": dropped
+            }
+        result["lines"] = [{"seq": seq, "time": ts, "stream": stream, "text": text}
+                           for seq, ts, stream, text in lines[-limit:]]
+        return result
+
+    @staticmethod
+    def _merged(buffer):
+        """按序号合并两个输出流"""
+        return list(heapq.merge(buffer["streams"]["stdout"], buffer["streams"]["stderr"]))
+
+
+# 数值库/OpenCV 的线程数环境变量（子进程启动时注入）
+THREAD_ENV_VARS = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'OPENCV_FOR_THREADS_NUM'
+]
+
+
+class LaunchScheduler:
+    """资源感知的启动调度：按工具声明的成本（核心数、内存）准入，超出机器容量的启动排队等待"""
+
+    DEFAULT_COST = {"cores": 1, "memory_mb": 512}
+
+    def __init__(self, supervisor, spawn, cost_lookup, memory_headroom=0.85, retry_interval=3.0):
+        self.supervisor = supervisor
+        self.spawn = spawn
+        self.cost_lookup = cost_lookup
+        self.retry_interval = retry_interval
+        self.queue = deque()
+        self._next_ticket = 1
+        self._retry_greenlet = None
+
+        self.capacity_cores = os.cpu_count() or 1
+        self.capacity_memory_mb = None
+        if psutil:
+            try:
+                total_mb = psutil.virtual_memory().total / (1024 * 1024)
+                self.capacity_memory_mb = total_mb * memory_headroom
+            except Exception:
+                pass
+
+    def get_cost(self, tool_id):
+        """工具的成本声明（未声明时使用默认值）"""
+        return dict(self.DEFAULT_COST, **(self.cost_lookup(tool_id) or {}))
+
+    def committed(self):
+        """已被运行中工具占用的核心数和内存"""
+        cores = 0.0
+        memory_mb = 0.0
+        for record in self.supervisor.running.values():
+            cost = self.get_cost(record["tool_id"])
+            cores += cost["cores"]
+            # 内存取声明值与实测值中的较大者
+            memory_mb += max(cost["memory_mb"], record.get("rss_mb", 0))
+        return cores, memory_mb
+
+    def can_admit(self, tool_id):
+        """判断当前容量是否允许启动该工具"""
+        if self.supervisor.running_count() == 0:
+            # 空闲时总是放行，避免单个超大工具永远无法启动
+            return True
+
+        cost = self.get_cost(tool_id)
+        cores, memory_mb = self.committed()
+        if cores + cost["cores"] > self.capacity_cores:
+            return False
+        if self.capacity_memory_mb is not None:
+            if memory_mb + cost["memory_mb"] > self.capacity_memory_mb:
+                return False
+            try:
+                available_mb = psutil.virtual_memory().available / (1024 * 1024)
+                if available_mb < cost["memory_mb"]:
+                    return False
+            except Exception:
+                pass
+        return True
+
+    def submit(self, tool_id, *spawn_args):
+        """提交启动请求：容量允许则立即启动，否则排队"""
+        if not self.queue and self.can_admit(tool_id):
+            return self.spawn(tool_id, *spawn_args)
+
+        entry = {
+            "ticket": self._next_ticket,
+            "tool_id": tool_id,
+            "args": spawn_args,
+            "queued_at": time.time()
+        }
+        self._next_ticket += 1
+        self.queue.append(entry)
+        self._schedule_retry()
+
+        position = len(self.queue)
+        log_print(f"   ⏳ 资源不足，已排队: {tool_id} (第 {position} 位)")
+        return {
+            "success": True,
+            "queued": True,
+            "ticket": entry["ticket"],
+            "position": position,
+            "message": f"资源紧张，已加入启动队列（第 {position} 位），将在资源释放后自动启动"
+        }
+
+    def drain(self):
+        """按先后顺序启动容量允许的排队请求"""
+        started = 0
+        while self.queue and self.can_admit(self.queue[0]["tool_id"]):
+            entry = self.queue.popleft()
+            log_print(f"   ▶ 队列启动: {entry['tool_id']} (等待 {time.time() - entry['queued_at']:.0f} 秒)")
+            self.spawn(entry["tool_id"], *entry["args"])
+            started += 1
+        return started
+
+    def cancel(self, ticket):
+        """取消排队中的启动请求"""
+        for entry in list(self.queue):
+            if entry["ticket"] == ticket:
+                self.queue.remove(entry)
+                return True
+        return False
+
+    def get_queue(self):
+        """返回可序列化的队列（含排队位置）"""
+        now = time.time()
+        return [{
+            "ticket": entry["ticket"],
+            "tool_id": entry["tool_id"],
+            "position": index + 1,
+            "waiting": round(now - entry["queued_at"], 1)
+        } for index, entry in enumerate(self.queue)]
+
+    def thread_budget(self, tool_id):
+        """按成本权重把 CPU 核心分给运行中的工具，返回新工具可用的线程数"""
+        weight = self.get_cost(tool_id)["cores"]
+        total_weight = weight + sum(self.get_cost(record["tool_id"])["cores"]
+                                    for record in self.supervisor.running.values())
+        if total_weight <= 0:
+            return self.capacity_cores
+        share = self.capacity_cores * weight / total_weight
+        return max(1, min(self.capacity_cores, int(share)))
+
+    def pick_cpus(self, count):
+        """为新工具挑选与其他已绑定工具重叠最少的 CPU 核心"""
+        usage = {cpu: 0 for cpu in range(self.capacity_cores)}
+        for record in self.supervisor.running.values():
+            for cpu in record.get("cpus") or []:
+                if cpu in usage:
+                    usage[cpu] += 1
+        return sorted(usage, key=lambda cpu: (usage[cpu], cpu))[:count]
+
+    def _schedule_retry(self):
+        """队列非空时定期重试（内存等实测容量可能在无进程退出时释放）"""
+        if self._retry_greenlet is None:
+            self._retry_greenlet = eel.spawn(self._retry_loop)
+
+    def _retry_loop(self):
+        try:
+            while self.queue:
+                eel.sleep(self.retry_interval)
+                self.drain()
+        finally:
+            self._retry_greenlet = None
+
+
+class Telemetry:
+    """本地指标与追踪：计数器、直方图和父子 span，导出为 JSON Lines 文件"""
+
+    def __init__(self, export_dir=None, max_spans=500):
+        self.export_dir = export_dir
+        self.counters = {}
+        self.histograms = {}
+        self.spans = deque(maxlen=max_spans)
+        # span 上下文按 greenlet 隔离（同一线程中并发的 Eel 调用互不干扰）
+        self._context = greenlet_local()
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @staticmethod
+    def bucket_bound(value):
+        """直方图分桶上界：1 / 2.5 / 5 × 10^k，耗时和字节数共用"""
+        if value <= 0:
+            return 0
+        magnitude = 10 ** math.floor(math.log10(value))
+        for step in (1, 2.5, 5, 10):
+            if value <= step * magnitude:
+                return step * magnitude
+
+    def observe(self, name, value):
+        """记录一个直方图样本"""
+        bound = self.bucket_bound(value)
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {
+                    "count": 0, "sum": 0, "min": value, "max": value, "buckets": {}
+                }
+            histogram["count"] += 1
+            histogram["sum"] += value
+            histogram["min"] = min(histogram["min"], value)
+            histogram["max"] = max(histogram["max"], value)
+            histogram["buckets"][bound] = histogram["buckets"].get(bound, 0) + 1
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        """追踪一段操作；嵌套调用自动成为当前 span 的子 span"""
+        parent = getattr(self._context, 'span', None)
+        record = {
+            "type": "span",
+            "name": name,
+            "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex[:16],
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent["span_id"] if parent else None,
+            "start": time.time(),
+            "attributes": attributes
+        }
+        self._context.span = record
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            record["duration"] = time.perf_counter() - started
+            self._context.span = parent
+            self.observe(f"{name}.seconds", record["duration"])
+            self.spans.append(record)
+            self.export(record)
+
+    def annotate(self, **attributes):
+        """给当前 span 附加属性（不在 span 中时忽略）"""
+        current = getattr(self._context, 'span', None)
+        if current is not None:
+            current["attributes"].update(attributes)
+
+    def snapshot(self):
+        """当前所有计数器和直方图"""
+        with self._lock:
+            return {
+                "type": "metrics",
+                "time": time.time(),
+                "uptime": time.time() - self.started_at,
+                "counters": dict(self.counters),
+                "histograms": {name: dict(histogram, buckets=dict(histogram["buckets"]))
+                               for name, histogram in self.histograms.items()}
+            }
+
+    def export(self, record):
+        """追加一条记录到当天的 JSON Lines 文件"""
+        if not self.export_dir:
+            return
+        try:
+            os.makedirs(self.export_dir, exist_ok=True)
+            path = os.path.join(self.export_dir, f"telemetry-{datetime.now():%Y%m%d}.jsonl")
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            with self._lock:
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+        except Exception:
+            pass  # 指标导出失败不影响主流程
+
+    def flush(self):
+        """导出当前指标快照（退出时调用）"""
+        self.export(self.snapshot())
+
+    def get_metrics(self, span_limit=50):
+        metrics = self.snapshot()
+        metrics["spans"] = list(self.spans)[-span_limit:]
+        return metrics
+
+
+def traced(name):
+    """方法装饰器：把调用记录为 span，并根据返回值标记是否成功（实例需有 telemetry 属性）"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.telemetry.span(name) as span:
+                result = func(self, *args, **kwargs)
+                if isinstance(result, bool):
+                    span["attributes"]["success"] = result
+                elif isinstance(result, dict):
+                    span["attributes"]["success"] = result.get("success")
+                return result
+        return wrapper
+    return decorator
+
+
+class ToolStatusIndex:
+    """工具就绪状态索引：缓存文件的大小/哈希、依赖指纹和最近启动耗时都保存在内存中，查询时不读文件内容也不调用 pip"""
+
+    def __init__(self, state_dir):
+        self.state_file = os.path.join(state_dir, 'dependency_fingerprints.json')
+        self.artifacts = {}       # 文件路径 -> (mtime, size, sha256)
+        self.launch_latency = {}  # tool_id -> 最近一次启动耗时（毫秒）
+        self.fingerprints = self._load_fingerprints()
+
+    def _load_fingerprints(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_fingerprints(self):
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            temp_file = self.state_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.fingerprints, f)
+            os.replace(temp_file, self.state_file)
+        except Exception:
+            pass
+
+    def artifact(self, path):
+        """返回文件的 (mtime, size, sha256)，mtime 和大小未变时直接使用内存中的哈希"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.artifacts.pop(path, None)
+            return None
+
+        cached = self.artifacts.get(path)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached
+
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                sha256.update(chunk)
+        entry = (stat.st_mtime, stat.st_size, sha256.hexdigest())
+        self.artifacts[path] = entry
+        return entry
+
+    @staticmethod
+    def dependency_fingerprint(python_cmd, packages, site_dirs=()):
+        """依赖指纹：解释器路径、解释器文件修改时间、依赖列表和 site-packages 目录的修改时间，任一变化都需要重新检查
+
+        安装、升级或卸载任何包都会增删 site-packages 下的 .dist-info 目录，从而改变目录的修改时间。
+        """
+        try:
+            interpreter_mtime = os.path.getmtime(shutil.which(python_cmd) or python_cmd)
+        except (OSError, TypeError):
+            interpreter_mtime = 0
+        site_mtimes = []
+        for directory in site_dirs:
+            try:
+                site_mtimes.append([directory, os.path.getmtime(directory)])
+            except OSError:
+                site_mtimes.append([directory, None])
+        source = json.dumps([python_cmd, interpreter_mtime, sorted(packages), site_mtimes])
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    def dependencies_satisfied(self, tool_id, python_cmd, packages):
+        """上次检查通过后依赖指纹是否未变化"""
+        record = self.fingerprints.get(tool_id)
+        if not record:
+            return False
+        python_cmd = python_cmd or record['python']
+        return record['fingerprint'] == self.dependency_fingerprint(python_cmd, packages, record.get('site_dirs', []))
+
+    def mark_dependencies(self, tool_id, python_cmd, packages, site_dirs=()):
+        """记录依赖检查通过时的指纹（site_dirs 为该解释器的 site-packages 目录）"""
+        self.fingerprints[tool_id] = {
+            "python": python_cmd,
+            "site_dirs": list(site_dirs),
+            "fingerprint": self.dependency_fingerprint(python_cmd, packages, site_dirs)
+        }
+        self._save_fingerprints()
+
+    def clear_dependencies(self, tool_id=None):
+        """清除依赖指纹（下次启动时重新检查）"""
+        if tool_id is None:
+            self.fingerprints.clear()
+        else:
+            self.fingerprints.pop(tool_id, None)
+        self._save_fingerprints()
+
+    def record_launch(self, tool_id, seconds):
+        self.launch_latency[tool_id] = int(seconds * 1000)
+
+
+class CacheGenerations:
+    """缓存分代：工具与前端文件放在 generations/gen-N 中，由 CURRENT 指针文件指定当前代
+
+    更新时在当前代旁边构建下一代（先用硬链接预置现有文件，下载时 os.replace 整体替换，不会改动当前代），
+    校验通过后用一次 os.replace 切换指针；上一代保留用于即时回滚，更早的代随后删除。
+    """
+
+    POINTER = 'CURRENT'
+
+    def __init__(self, cache_dir):
+        self.root = os.path.join(cache_dir, 'generations')
+        os.makedirs(self.root, exist_ok=True)
+        self.state = self._read_pointer()
+        if not self.state.get('current') or not os.path.isdir(self.path(self.state['current'])):
+            name = self._next_name()
+            os.makedirs(self.path(name), exist_ok=True)
+            self._write_pointer(name, None)
+        self.adopt_legacy_layout(cache_dir)
+        # 清理上次中断时留下的未完成构建
+        self.prune()
+
+    def adopt_legacy_layout(self, cache_dir):
+        """分代之前的布局（缓存目录下直接存放工具脚本和 web 目录）：移入当前代并删除旧位置
+
+        移动保留文件修改时间，升级后的首次运行不必重新下载；当前代已有同名文件时只删除旧文件。
+        """
+        adopted = 0
+        for name in os.listdir(cache_dir):
+            source = os.path.join(cache_dir, name)
+            if not ((name == 'web' and os.path.isdir(source)) or (name.endswith('.py') and os.path.isfile(source))):
+                continue
+            target = os.path.join(self.active_dir, name)
+            if not os.path.exists(target):
+                try:
+                    os.replace(source, target)
+                    adopted += 1
+                    continue
+                except OSError:
+                    # 无法移动（如文件被占用）时复制一份
+                    try:
+                        if os.path.isdir(source):
+                            shutil.copytree(source, target)
+                        else:
+                            shutil.copy2(source, target)
+                        adopted += 1
+                    except OSError:
+                        continue
+            try:
+                if os.path.isdir(source):
+                    shutil.rmtree(source)
+                else:
+                    os.remove(source)
+            except OSError:
+                pass  # 仍被占用，下次启动时再删除
+        return adopted
+
+    def _read_pointer(self):
+        try:
+            with open(os.path.join(self.root, self.POINTER), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _write_pointer(self, current, previous):
+        state = {"current": current, "previous": previous, "switched_at": time.time()}
+        temp_file = os.path.join(self.root, self.POINTER + '.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, os.path.join(self.root, self.POINTER))
+        self.state = state
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    @property
+    def current(self):
+        return self.state['current']
+
+    @property
+    def previous(self):
+        previous = self.state.get('previous')
+        return previous if previous and os.path.isdir(self.path(previous)) else None
+
+    @property
+    def active_dir(self):
+        return self.path(self.current)
+
+    def generation_numbers(self):
+        numbers = []
+        for name in os.listdir(self.root):
+            if name.startswith('gen-') and name[4:].isdigit():
+                numbers.append(int(name[4:]))
+        return sorted(numbers)
+
+    def _next_name(self):
+        numbers = self.generation_numbers()
+        return f"gen-{(numbers[-1] if numbers else 0) + 1}"
+
+    def begin(self):
+        """创建下一代目录并预置当前代的全部文件，返回新一代名称"""
+        name = self._next_name()
+        source = self.active_dir
+        staging = self.path(name)
+        os.makedirs(staging, exist_ok=True)
+        for directory, _, files in os.walk(source):
+            target_dir = os.path.join(staging, os.path.relpath(directory, source))
+            os.makedirs(target_dir, exist_ok=True)
+            for file in files:
+                if file.endswith(('.part', '.tmp')):
+                    continue
+                source_file = os.path.join(directory, file)
+                target_file = os.path.join(target_dir, file)
+                try:
+                    os.link(source_file, target_file)
+                except OSError:
+                    shutil.copy2(source_file, target_file)  # 不支持硬链接的文件系统
+        return name
+
+    def commit(self, name):
+        """原子切换到新一代，当前代变为上一代"""
+        self._write_pointer(name, self.current)
+        self.prune()
+
+    def discard(self, name):
+        """放弃未完成或校验失败的一代"""
+        if name != self.current:
+            shutil.rmtree(self.path(name), ignore_errors=True)
+
+    def rollback(self):
+        """切回上一代（当前代保留，可再次回滚回来），没有上一代时返回 False"""
+        previous = self.previous
+        if not previous:
+            return False
+        self._write_pointer(previous, self.current)
+        return True
+
+    def prune(self):
+        """只保留当前代和上一代（正在运行的工具占用文件时删除失败，下次再清理）"""
+        keep = {self.state.get('current'), self.state.get('previous')}
+        for number in self.generation_numbers():
+            name = f"gen-{number}"
+            if name not in keep:
+                shutil.rmtree(self.path(name), ignore_errors=True)
+
+    def describe(self):
+        return {"current": self.current, "previous": self.previous,
+                "switched_at": self.state.get('switched_at')}
+
+
+class ContentStore:
+    """按内容哈希存放的制品仓库（应用数据目录下，不随周缓存轮换）
+
+    blobs/<前两位>/<sha256> 保存文件内容，index.json 记录 镜像键 -> {sha256, size, etag, validated_at}。
+    新的缓存目录缺少文件时直接从这里恢复（硬链接或复制），保留上次验证时间，跨周不必重新下载。
+    """
+
+    def __init__(self, root, max_age=30 * 24 * 60 * 60):
+        self.root = root
+        self.max_age = max_age
+        self.index_file = os.path.join(root, 'index.json')
+        self.index = self._load_index()
+        self.prune()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_index(self):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            temp_file = self.index_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+        except Exception:
+            pass
+
+    def blob_path(self, sha256):
+        return os.path.join(self.root, 'blobs', sha256[:2], sha256)
+
+    @staticmethod
+    def _link(source, target):
+        """经临时文件硬链接（或复制）到 target，整体替换"""
+        temp_path = target + '.part'
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copy2(source, temp_path)
+        os.replace(temp_path, target)
+
+    def lookup(self, key):
+        """返回该键仍有内容的记录，没有时返回 None"""
+        entry = self.index.get(key)
+        if not entry:
+            return None
+        try:
+            if os.path.getsize(self.blob_path(entry['sha256'])) != entry['size']:
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def put(self, key, path, sha256, etag=None):
+        """登记刚下载并校验过的文件"""
+        try:
+            blob = self.blob_path(sha256)
+            if not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                self._link(path, blob)
+            self.index[key] = {"sha256": sha256, "size": os.path.getsize(blob), "etag": etag,
+                               "validated_at": time.time()}
+            self._save_index()
+        except Exception:
+            pass  # 仓库写入失败只影响下次跨周恢复
+
+    def touch(self, key):
+        """重新验证确认内容未变（HTTP 304 或镜像哈希一致）"""
+        if key in self.index:
+            self.index[key]["validated_at"] = time.time()
+            self._save_index()
+
+    def materialize(self, key, target, keep_validated_time=False):
+        """把仓库中的内容放到 target；keep_validated_time 时文件修改时间设为上次验证时间（缓存年龄不被重置）"""
+        entry = self.lookup(key)
+        if entry is None:
+            return False
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            self._link(self.blob_path(entry['sha256']), target)
+            stamp = entry['validated_at'] if keep_validated_time else time.time()
+            os.utime(target, (stamp, stamp))
+        except Exception:
+            return False
+        return True
+
+    def prune(self):
+        """删除长期未验证的记录和不再被引用的内容"""
+        now = time.time()
+        expired = [key for key, entry in self.index.items() if now - entry.get('validated_at', 0) > self.max_age]
+        for key in expired:
+            del self.index[key]
+        if expired:
+            self._save_index()
+        
+        referenced = {entry['sha256'] for entry in self.index.values()}
+        blobs_dir = os.path.join(self.root, 'blobs')
+        if not os.path.isdir(blobs_dir):
+            return
+        for directory, _, files in os.walk(blobs_dir):
+            for file in files:
+                if file not in referenced:
+                    try:
+                        os.remove(os.path.join(directory, file))
+                    except OSError:
+                        pass
+
+
+# 局域网镜像清单格式版本（/manifest.json 中的 format）
+CACHE_MIRROR_FORMAT = 1
+
+
+class DownloadCancelled(Exception):
+    """竞速下载中其他下载源已经胜出"""
+
+
+def stream_to_file(response, path, progress_callback=None, cancel_event=None):
+    """把 HTTP 响应流式写入文件并计算 sha256，返回 (sha256, 字节数)；cancel_event 置位时抛出 DownloadCancelled"""
+    total_size = int(response.headers.get('content-length', 0))
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if cancel_event is not None and cancel_event.is_set():
+                response.close()
+                raise DownloadCancelled()
+            if chunk:
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+                if progress_callback:
+                    progress_callback(size, total_size)
+    return digest.hexdigest(), size
+
+
+class HttpSource:
+    """原始地址下载源（GitHub raw 等）：失败时间隔重试
+
+    url_template 为空时直接下载原始地址；备用源（CDN、代理）用模板改写地址，
+    可用字段：{url}（原始地址）以及 GitHub 文件的 {owner}、{repo}、{file}。
+    """
+
+    kind = 'origin'
+
+    def __init__(self, name, telemetry=None, retries=3, retry_delay=2.0, timeout=30, url_template=None):
+        self.name = name
+        self.telemetry = telemetry
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.url_template = url_template
+        if url_template:
+            self.kind = 'alternate'
+        self.headers = {'User-Agent': 'Python-Tool-Launcher'}
+
+    def resolve(self, key, url):
+        if not self.url_template:
+            return url
+        fields = {"url": url}
+        parts = key.split('/', 3)
+        if len(parts) == 4 and parts[0] == 'github':
+            fields.update(owner=parts[1], repo=parts[2], file=parts[3])
+        try:
+            return self.url_template.format(**fields)
+        except KeyError:
+            return None  # 模板需要的字段这个文件没有
+
+    def fetch(self, key, url, temp_path, progress_callback=None, cancel_event=None, cached=None,
+              expected_sha256=None):
+        """下载到 temp_path，成功返回 {sha256, size, attempts, etag}，失败或被取消返回 None
+
+        cached 为本地已有版本的记录（内容仓库中的 sha256/size/etag）：原始地址用 If-None-Match 重新验证，
+        服务器返回 304 时结果带 not_modified，不下载内容。
+        expected_sha256 由竞速下载器统一校验，这里不使用。
+        """
+        url = self.resolve(key, url)
+        if not url:
+            return None
+        headers = dict(self.headers)
+        # ETag 只对同一服务器有效，备用源不做条件请求
+        if cached and cached.get('etag') and not self.url_template:
+            headers['If-None-Match'] = cached['etag']
+        for attempt in range(self.retries):
+            try:
+                if attempt > 0:
+                    log_print(f"      重试下载 ({attempt+1}/{self.retries}, {self.name})...")
+                    if self.telemetry:
+                        self.telemetry.increment('download.retries')
+                    if cancel_event is not None:
+                        if cancel_event.wait(self.retry_delay):
+                            return None
+                    else:
+                        time.sleep(self.retry_delay)
+                
+                response = requests.get(url, headers=headers, timeout=self.timeout, stream=True)
+                if response.status_code == 304 and 'If-None-Match' in headers:
+                    return {"sha256": cached['sha256'], "size": cached['size'], "attempts": attempt + 1,
+                            "etag": cached['etag'], "not_modified": True}
+                if response.status_code == 200:
+                    digest, size = stream_to_file(response, temp_path, progress_callback, cancel_event)
+                    return {"sha256": digest, "size": size, "attempts": attempt + 1,
+                            "etag": response.headers.get('ETag')}
+                log_print(f"      下载失败: HTTP {response.status_code} ({self.name})")
+            except DownloadCancelled:
+                return None
+            except Exception as e:
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                log_print(f"      下载异常: {str(e)} ({self.name})")
+        return None
+
+
+class TrustedHashes:
+    """可信哈希：发布者提交在 GitHub 仓库 main 分支根目录的 sha256 清单，经 HTTPS 从 raw.githubusercontent.com 读取
+
+    清单为 {"仓库内文件路径": "sha256"} 的 JSON。局域网镜像、备用源的内容只有与这里的哈希一致才会采用；
+    仓库没有清单或清单读取失败时视为没有可信哈希（在 ttl 内不重复请求）。
+    """
+
+    def __init__(self, manifest_name='sha256sums.json', ttl=300.0, timeout=10):
+        self.manifest_name = manifest_name
+        self.ttl = ttl
+        self.timeout = timeout
+        self._manifests = {}  # (owner, repo) -> (读取时间, 清单或 None)
+        self._lock = threading.Lock()
+
+    def manifest(self, owner, repo):
+        now = time.time()
+        with self._lock:
+            cached = self._manifests.get((owner, repo))
+        if cached and now - cached[0] < self.ttl:
+            return cached[1]
+        url = f"https://raw.githubusercontent.com/{owner}/{repo}/main/{self.manifest_name}"
+        try:
+            response = requests.get(url, headers={'User-Agent': 'Python-Tool-Launcher'}, timeout=self.timeout)
+            if response.status_code == 404:
+                manifest = None  # 仓库未发布哈希清单
+            else:
+                response.raise_for_status()
+                manifest = response.json()
+                if not isinstance(manifest, dict):
+                    raise ValueError("清单格式错误")
+        except Exception as e:
+            log_print(f"      可信哈希清单不可用: {owner}/{repo} ({str(e)})")
+            manifest = None
+        with self._lock:
+            self._manifests[(owner, repo)] = (now, manifest)
+        return manifest
+
+    def lookup(self, key):
+        """GitHub 文件（键 github/<owner>/<repo>/<路径>）的可信 sha256，没有时返回 None"""
+        parts = key.split('/', 3)
+        if len(parts) != 4 or parts[0] != 'github':
+            return None
+        manifest = self.manifest(parts[1], parts[2])
+        digest = manifest.get(parts[3]) if manifest else None
+        return digest.lower() if isinstance(digest, str) else None
+
+
+class MirrorSource:
+    """局域网镜像下载源（另一台机器的 --serve-cache）：镜像清单只用来定位文件，
+    内容必须与可信哈希一致；没有可信哈希的文件不从镜像下载"""
+
+    kind = 'mirror'
+
+    def __init__(self, base_url, timeout=5.0, manifest_ttl=60.0, retry_after=300.0):
+        self.base_url = base_url.rstrip('/')
+        self.name = f"mirror {self.base_url}"
+        self.timeout = timeout
+        self.manifest_ttl = manifest_ttl
+        self.retry_after = retry_after
+        self._manifest = None
+        self._manifest_at = 0.0
+        self._unavailable_until = 0.0
+
+    def manifest(self):
+        """镜像清单（短时间内复用；镜像不可达时暂停使用一段时间，不拖慢后续下载）"""
+        now = time.time()
+        if self._manifest is not None and now - self._manifest_at < self.manifest_ttl:
+            return self._manifest
+        if now < self._unavailable_until:
+            return None
+        try:
+            response = requests.get(f"{self.base_url}/manifest.json", timeout=self.timeout)
+            response.raise_for_status()
+            manifest = response.json()
+            if manifest.get('format') != CACHE_MIRROR_FORMAT:
+                raise ValueError(f"不支持的清单格式: {manifest.get('format')}")
+        except Exception as e:
+            log_print(f"      镜像不可用: {self.base_url} ({str(e)})")
+            self._manifest = None
+            self._unavailable_until = now + self.retry_after
+            return None
+        self._manifest, self._manifest_at = manifest, now
+        return manifest
+
+    def fetch(self, key, url, temp_path, progress_callback=None, cancel_event=None, cached=None,
+              expected_sha256=None):
+        if not expected_sha256:
+            return None  # 镜像自己的清单不能证明内容可信
+        manifest = self.manifest()
+        entry = manifest['files'].get(key) if manifest else None
+        if not entry:
+            return None
+        if entry['sha256'] != expected_sha256:
+            log_print(f"      镜像上的版本与可信哈希不一致，跳过: {key} ({self.name})")
+            return None
+        if cached and cached['sha256'] == expected_sha256:
+            # 镜像上的版本与本地相同，不必下载
+            return {"sha256": entry['sha256'], "size": entry['size'], "attempts": 1, "not_modified": True}
+        try:
+            response = requests.get(f"{self.base_url}/files/{urllib.parse.quote(key)}",
+                                    timeout=self.timeout, stream=True)
+            if response.status_code != 200:
+                return None
+            digest, size = stream_to_file(response, temp_path, progress_callback, cancel_event)
+        except DownloadCancelled:
+            return None
+        except Exception as e:
+            log_print(f"      镜像下载异常: {str(e)}")
+            return None
+        if digest != expected_sha256:
+            log_print(f"      ✗ 镜像文件校验失败，已丢弃: {key}")
+            self._manifest = None  # 清单可能已过期，下次重新获取
+            return None
+        return {"sha256": digest, "size": size, "attempts": 1}
+
+
+class HedgedDownloader:
+    """多源竞速下载：先请求第一个下载源，超过对冲延迟仍未完成时再并发请求下一个，
+    第一个通过哈希校验的结果胜出，其余立即取消。
+
+    GitHub（kind 为 origin）本身是可信来源，其结果总是有效；镜像和备用源的结果必须与可信哈希一致，
+    没有可信哈希时只请求原始地址。
+
+    对冲延迟按各下载源以往耗时自适应：平滑耗时 + 4 倍平滑偏差（与 TCP 重传超时的估计方式相同），
+    限制在 [min_delay, max_delay] 之间；被取消的下载只知道耗时不少于已等待的时间，
+    只有超过当前平滑耗时时才作为样本，慢的源估计值随之变大，而不会被提前取消拉低。
+    """
+
+    def __init__(self, sources, hedge=True, min_delay=0.5, max_delay=10.0, initial_delay=3.0,
+                 state_file=None, wait=None, trusted=None):
+        self.sources = sources
+        self.trusted = trusted  # TrustedHashes，可为空
+        self.hedge = hedge
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.state_file = state_file
+        self.wait = wait or time.sleep
+        self.latency = self._load_latency()  # 下载源名称 -> [平滑耗时, 平滑偏差]
+        self._lock = threading.Lock()
+
+    def _load_latency(self):
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_latency(self):
+        if not self.state_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            temp_file = self.state_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.latency, f)
+            os.replace(temp_file, self.state_file)
+        except Exception:
+            pass
+
+    def record(self, name, seconds):
+        """记录一次耗时样本，更新平滑耗时和偏差"""
+        estimate = self.latency.get(name)
+        if estimate is None:
+            self.latency[name] = [seconds, seconds / 2]
+        else:
+            srtt, rttvar = estimate
+            rttvar = 0.75 * rttvar + 0.25 * abs(srtt - seconds)
+            srtt = 0.875 * srtt + 0.125 * seconds
+            self.latency[name] = [srtt, rttvar]
+
+    def record_cancelled(self, name, seconds):
+        """被取消的下载：已等待时间是耗时的下限，超过平滑耗时才有信息量"""
+        estimate = self.latency.get(name)
+        if estimate is not None and seconds > estimate[0]:
+            self.record(name, seconds)
+
+    def hedge_delay(self, source):
+        """等待该下载源多久后开始请求下一个"""
+        estimate = self.latency.get(source.name)
+        if estimate is None:
+            return self.initial_delay
+        return max(self.min_delay, min(self.max_delay, estimate[0] + 4 * estimate[1]))
+
+    def trusted_hash(self, key):
+        """可信哈希清单中该文件的 sha256（在线程中查询，等待期间不阻塞事件循环），没有时返回 None"""
+        if self.trusted is None:
+            return None
+        found = []
+        thread = threading.Thread(target=lambda: found.append(self.trusted.lookup(key)), daemon=True,
+                                  name="trusted-hash")
+        thread.start()
+        while thread.is_alive():
+            self.wait(0.05)
+        return found[0] if found else None
+
+    def fetch(self, key, url, temp_path, progress_callback=None, expected_sha256=None, cached=None):
+        """竞速下载到 temp_path，返回胜出结果 {sha256, size, attempts, source, seconds, hedged}，全部失败返回 None
+
+        expected_sha256 为空时查询可信哈希清单（镜像清单不作为依据）；仍然没有时只请求原始地址。
+        原始地址的结果与可信哈希不一致时以原始地址为准（清单可能尚未更新）。
+        cached 传给各下载源做重新验证，胜出结果带 not_modified 时 temp_path 不会写入。
+        """
+        expected_sha256 = expected_sha256 or self.trusted_hash(key)
+        sources = [source for source in self.sources if expected_sha256 or source.kind == 'origin']
+        if len(sources) < len(self.sources):
+            log_print("      没有可信哈希，不使用镜像和备用源")
+        cancel = threading.Event()
+        state = {"winner": None, "finished": 0}
+        progress = {}
+
+        def report(index):
+            def callback(done, total):
+                # 多个源同时下载时只汇报进度最快的一个，避免进度条来回跳
+                with self._lock:
+                    progress[index] = (done, total)
+                    best = max(progress.values(), key=lambda item: item[0] / item[1] if item[1] else 0)
+                    if best is progress[index] and progress_callback:
+                        progress_callback(done, total)
+            return callback
+
+        def run(index, source, started):
+            part_path = f"{temp_path}.{index}"
+            try:
+                result = source.fetch(key, url, part_path, report(index), cancel, cached, expected_sha256)
+            except Exception as e:
+                log_print(f"      下载异常: {str(e)} ({source.name})")
+                result = None
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                matches = result is not None and result["sha256"] == expected_sha256
+                valid = result is not None and (matches or source.kind == 'origin')
+                if valid and not matches and expected_sha256:
+                    log_print(f"      ⚠ {source.name} 的内容与可信哈希清单不一致，以原始地址为准")
+                if valid and state["winner"] is None:
+                    if not result.get("not_modified"):
+                        os.replace(part_path, temp_path)
+                    state["winner"] = dict(result, source=source, seconds=elapsed)
+                    cancel.set()
+                    self.record(source.name, elapsed)
+                else:
+                    if result is not None and not valid:
+                        log_print(f"      ✗ 哈希不匹配，已丢弃 {source.name} 的结果")
+                    if cancel.is_set() and result is None:
+                        self.record_cancelled(source.name, elapsed)
+                    try:
+                        os.remove(part_path)
+                    except OSError:
+                        pass
+                state["finished"] += 1
+
+        launched = 0
+        deadline = 0.0
+        while True:
+            with self._lock:
+                if state["winner"] is not None or (state["finished"] == launched and launched == len(sources)):
+                    break
+                all_failed = state["finished"] == launched
+            now = time.perf_counter()
+            # 首次请求、前面的源全部失败、或对冲延迟已到时启动下一个源
+            if launched < len(sources) and (all_failed or (self.hedge and now >= deadline)):
+                source = sources[launched]
+                if launched > 0 and not all_failed:
+                    log_print(f"      ⇉ {sources[launched - 1].name} 响应较慢，同时尝试 {source.name}")
+                threading.Thread(target=run, args=(launched, source, now), daemon=True,
+                                 name=f"download-{launched}").start()
+                deadline = now + self.hedge_delay(source)
+                launched += 1
+                continue
+            self.wait(0.05)
+
+        cancel.set()
+        # 被取消的下载通常很快结束：稍等它们记下耗时样本，再一并保存
+        settle_until = time.perf_counter() + 0.5
+        while time.perf_counter() < settle_until:
+            with self._lock:
+                if state["finished"] == launched:
+                    break
+            self.wait(0.01)
+        self._save_latency()
+        winner = state["winner"]
+        if winner:
+            winner["hedged"] = launched > 1
+        return winner
+
+
+class CacheMirrorServer:
+    """局域网缓存镜像服务：/manifest.json 列出可下载文件及其 sha256，/files/<键> 返回文件内容
+
+    没有访问控制，默认只监听本机；公开到局域网需要显式指定地址。
+    """
+
+    def __init__(self, files_provider, artifact, host='127.0.0.1', port=8765):
+        self.files_provider = files_provider  # 返回 {键: 本地路径}
+        self.artifact = artifact              # 路径 -> (mtime, size, sha256)，按 mtime/大小缓存哈希
+        mirror = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                mirror.handle(self)
+
+            def log_message(self, format, *args):
+                pass  # 不逐条记录请求
+
+        self.httpd = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+
+    def build_manifest(self):
+        """返回 (清单, {键: 路径})"""
+        files = {}
+        paths = {}
+        for key, path in self.files_provider().items():
+            entry = self.artifact(path)
+            if entry is None:
+                continue
+            files[key] = {"sha256": entry[2], "size": entry[1]}
+            paths[key] = path
+        return {"format": CACHE_MIRROR_FORMAT, "created_at": time.time(), "files": files}, paths
+
+    def handle(self, request):
+        path = urllib.parse.urlsplit(request.path).path
+        manifest, paths = self.build_manifest()
+        if path == '/manifest.json':
+            body = json.dumps(manifest, ensure_ascii=False).encode('utf-8')
+            request.send_response(200)
+            request.send_header('Content-Type', 'application/json; charset=utf-8')
+            request.send_header('Content-Length', str(len(body)))
+            request.end_headers()
+            request.wfile.write(body)
+            return
+        
+        # 只提供清单中的文件，请求路径不会映射到任意本地路径
+        key = urllib.parse.unquote(path[len('/files/'):]) if path.startswith('/files/') else None
+        if key not in paths:
+            request.send_error(404)
+            return
+        try:
+            with open(paths[key], 'rb') as f:
+                request.send_response(200)
+                request.send_header('Content-Type', 'application/octet-stream')
+                request.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+                request.send_header('X-Content-SHA256', manifest['files'][key]['sha256'])
+                request.end_headers()
+                shutil.copyfileobj(f, request.wfile, 1024 * 1024)
+        except (ConnectionError, OSError):
+            pass  # 客户端中途断开
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def close(self):
+        self.httpd.server_close()
+
+
+# pip 镜像源（依赖安装与 wheel 下载共用）
+PIP_INDEX_URL = 'https://pypi.tuna.tsinghua.edu.cn/simple'
+PIP_TRUSTED_HOST = 'pypi.tuna.tsinghua.edu.cn'
+
+# 缓存包格式版本（manifest.json 中的 format）
+CACHE_BUNDLE_FORMAT = 1
+
+
+class DeviceNotAuthorizedError(Exception):
+    """当前设备未在授权列表中"""
+
 
 class EelToolLauncher:
     def __init__(self):
@@ -76,23 +2130,68 @@ class EelToolLauncher:
                     "repo": "Subtitle-merging",
                     "file_path": "专业字幕合并工具.py",
                     "local_name": "专业字幕合并工具.py",
-                    "dependencies": ["pysrt", "opencv-python"]
+                    "dependencies": ["pysrt", "opencv-python"],
+                    "cost": {"cores": 1, "memory_mb": 1024}
                 },
                 "video_converter": {
                     "owner": "jwwl520",
                     "repo": "Automatic-Video-Blurring-Tool",
                     "file_path": "打码工具.py",
                     "local_name": "打码工具.py",
-                    "dependencies": ["opencv-python", "numpy", "moviepy"]
+                    "dependencies": ["opencv-python", "numpy", "moviepy"],
+                    "cost": {"cores": 4, "memory_mb": 3072}
                 },
                 "file_organizer": {
                     "owner": "jwwl520",
                     "repo": "File-Organization-Tool",
                     "file_path": "文件整理工具.py",
                     "local_name": "文件整理工具.py",
-                    "dependencies": []
+                    "dependencies": [],
+                    "cost": {"cores": 0.5, "memory_mb": 256}
                 }
             },
+            # 工具进程监管配置（各工具可在仓库配置中用 "policy" 覆盖默认策略）
+            'supervisor': {
+                "sample_interval": 2.0,  # 采样间隔（秒）
+                "history_size": 50       # 保留的退出记录数
+            },
+            # 工具输出采集：输出写入应用数据目录 tool_logs 下每次启动独立的日志文件，每个进程保留最近的输出
+            'output_capture': {
+                "max_lines": 2000,             # 每个进程保留的行数
+                "max_line_chars": 2000,        # 单行最大长度
+                "retain_exited": 10,           # 保留已退出进程的输出数量
+                "keep_logs": 5,                # 每个工具保留最近几次启动的日志文件
+                "max_log_bytes": 8 * 1024 * 1024  # 单个日志文件上限，超过时转存为 .1 并截断
+            },
+            # 线程预算：按运行中的工具划分 CPU，避免多个 OpenCV/NumPy 工具互相争抢
+            'thread_budget': {
+                "enabled": True,
+                "pin_affinity": False  # 同时绑定 CPU 亲和性（需要 psutil）
+            },
+            # 局域网镜像（其他机器 --serve-cache 的地址），下载时优先尝试；
+            # 也可以用环境变量 TOOL_LAUNCHER_MIRRORS 指定（逗号分隔）
+            'mirrors': {
+                "urls": [],
+                "timeout": 5.0
+            },
+            # 多源竞速下载：第一个源超过对冲延迟（按以往耗时自适应）仍未完成时并发请求下一个，
+            # 先通过哈希校验的结果胜出；alternates 为备用源地址模板，例如
+            # "https://cdn.jsdelivr.net/gh/{owner}/{repo}@main/{file}" 或 "https://<代理地址>/{url}"
+            'download': {
+                "hedge": True,
+                "hedge_min_delay": 0.5,
+                "hedge_max_delay": 10.0,
+                "hedge_initial_delay": 3.0,
+                "alternates": [],
+                # 可信哈希清单（各仓库 main 分支根目录，{文件路径: sha256}）：镜像和备用源的内容
+                # 必须与之一致，仓库没有清单时只从 GitHub 下载
+                "trusted_manifest": "sha256sums.json"
+            },
+            # 本地指标与追踪（JSON Lines 写入应用数据目录下的 metrics）
+            'telemetry': {
+                "export": True,
+                "max_spans": 500
+            },
             # 前端界面仓库配置
             'web_interface': {
                 "owner": "jwwl520",
@@ -101,7 +2200,7 @@ class EelToolLauncher:
                     {"path": "web/index.html", "local": "index.html"},
                     {"path": "web/style.css", "local": "style.css"},
                     {"path": "web/script.js", "local": "script.js"},
-                    {"path": "web/config.js", "local": "config.js"}  # 授权配置文件
+                    {"path": "web/config.js", "local": "config.js", "mirror": False}  # 授权配置文件，不通过镜像公开
                 ]
             }
         }
@@ -128,13 +2227,44 @@ class EelToolLauncher:
         # 缓存配置
         self.cache_duration = 7 * 24 * 60 * 60  # 工具文件：7天
         self.web_cache_duration = 7 * 24 * 60 * 60  # 前端文件：7天（按周缓存）
+        # 到期前的刷新窗口：每台机器按 机器ID + 文件 固定提前一段时间重新验证，避免全员同时刷新
+        self.refresh_window = 2 * 24 * 60 * 60
         self.machine_id = self.get_machine_id()
         
+        # 指标与追踪（授权验证之前创建，授权耗时也要记录）
+        telemetry_config = self._internal_config['telemetry']
+        self.telemetry = Telemetry(
+            export_dir=os.path.join(get_app_data_dir(), 'metrics') if telemetry_config['export'] else None,
+            max_spans=telemetry_config['max_spans']
+        )
+        atexit.register(self.telemetry.flush)
+        
+        # 下载源链：局域网镜像优先，其次 GitHub 和备用源，慢时竞速
+        self.download_sources = self.build_download_sources()
+        download_config = self._internal_config['download']
+        self.downloader = HedgedDownloader(
+            self.download_sources,
+            hedge=download_config['hedge'],
+            min_delay=download_config['hedge_min_delay'],
+            max_delay=download_config['hedge_max_delay'],
+            initial_delay=download_config['hedge_initial_delay'],
+            state_file=os.path.join(get_app_data_dir(), 'download_latency.json'),
+            wait=self.cooperative_wait,
+            trusted=(TrustedHashes(download_config['trusted_manifest'])
+                     if download_config['trusted_manifest'] else None)
+        )
+        
         self.cache_dir = self.get_or_create_hidden_cache_dir()
-        self.web_cache_dir = os.path.join(self.cache_dir, 'web')
+        # 工具与前端文件按代存放，web_cache_dir 和工具路径都指向当前代
+        self.generations = CacheGenerations(self.cache_dir)
+        self._building_generation = None
         self.ensure_cache_directory()
         self.cleanup_old_cache_directories()
         
+        # 内容仓库：按哈希保存已验证的文件，新缓存目录从这里恢复，跨周不必重新下载
+        self.content_store = ContentStore(os.path.join(get_app_data_dir(), 'store'))
+        self.carry_over_artifacts()
+        
         # 设备授权验证（在下载前端文件之前先用本地配置验证）
         if not self.verify_device_authorization():
             log_print("\n" + "="*60)
@@ -142,10 +2272,60 @@ class EelToolLauncher:
             log_print(f"📱 当前设备ID: {self.machine_id}")
             log_print("📧 请联系管理员获取授权")
             log_print("="*60 + "\n")
-            sys.exit(1)
+            raise DeviceNotAuthorizedError(self.machine_id)
         
-        self.tool_processes = {}
         self._python_interpreter = None
+        
+        # 进度事件总线：合并限速后推送到页面
+        self.dispatcher = HubDispatcher()
+        self.progress = ProgressBus(self.push_progress, self.dispatcher, max_rate=10.0)
+        
+        # 工具进程监管
+        supervisor_config = self._internal_config['supervisor']
+        self.supervisor = ToolSupervisor(
+            interval=supervisor_config['sample_interval'],
+            history_size=supervisor_config['history_size'],
+            on_update=self.push_process_table,
+            on_exit=self.handle_tool_exit,
+            on_restart=self.launch_tool
+        )
+        
+        # 工具输出采集
+        capture_config = self._internal_config['output_capture']
+        self.output_capture = ToolOutputCapture(
+            os.path.join(get_app_data_dir(), 'tool_logs'),
+            max_lines=capture_config['max_lines'],
+            max_line_chars=capture_config['max_line_chars'],
+            retain_exited=capture_config['retain_exited'],
+            keep_logs=capture_config['keep_logs'],
+            max_log_bytes=capture_config['max_log_bytes']
+        )
+        
+        # 启动调度：按成本声明准入，超出容量的启动排队
+        self.scheduler = LaunchScheduler(
+            self.supervisor,
+            spawn=self.spawn_tool,
+            cost_lookup=lambda tool_id: self._internal_config['repositories'].get(tool_id, {}).get('cost')
+        )
+
+        # 单实例模式：等待页面就绪后处理的意图、窗口是否打开
+        self.pending_intents = []
+        self.window_open = False
+        
+        # 无界面模式：进度输出到日志而不是页面
+        self.headless = False
+        self._console_progress = {}
+        
+        # 内存中的前端资源（Eel 启动前载入）
+        self.assets = None
+        
+        # 工具就绪状态索引（依赖指纹持久化在应用数据目录）
+        self.status_index = ToolStatusIndex(get_app_data_dir())
+        self._pushed_status = None
+        self._pushed_running = None
+        
+        # 本地 wheel 目录（由缓存包导入，不随周缓存轮换），安装依赖时优先离线安装
+        self.wheelhouse_dir = os.path.join(get_app_data_dir(), 'wheelhouse')
 
     def get_machine_id(self):
         """获取Windows设备ID（系统属性中显示的设备ID）"""
@@ -191,6 +2371,7 @@ class EelToolLauncher:
             self._original_guid = fallback
             return hashlib.sha256(fallback.encode()).hexdigest()[:16]
 
+    @traced('auth')
     def verify_device_authorization(self):
         """验证设备是否授权（从GitHub下载的config.js读取）"""
         try:
@@ -257,18 +2438,33 @@ class EelToolLauncher:
         return f"{now.year}-W{week_num:02d}"
 
     def get_or_create_hidden_cache_dir(self):
-        """创建隐藏的缓存目录"""
+        """创建隐藏的缓存目录
+
+        目录名只由 机器ID + 周标识 决定，同一周内每次启动都打开同一个目录，
+        分代指针（CURRENT）和回滚用的上一代才能跨启动保留。
+        """
         week_id = self.get_week_identifier()
-        cache_name = f".{self.machine_id}_{week_id}_{secrets.token_hex(4)}"
-        
-        if platform.system() == 'Windows':
-            base_dir = os.path.join(os.getenv('LOCALAPPDATA', os.path.expanduser('~')), 'Temp')
-        else:
-            base_dir = '/tmp'
-        
+        cache_name = f".{self.machine_id}_{week_id}"
+        base_dir = get_cache_base_dir()
         cache_dir = os.path.join(base_dir, cache_name)
         
         if not os.path.exists(cache_dir):
+            # 旧版本每次启动带随机后缀：沿用本周最近的一个，其中的文件由 adopt_legacy_layout 移入当前代
+            legacy = []
+            try:
+                for item in os.listdir(base_dir):
+                    path = os.path.join(base_dir, item)
+                    if item.startswith(cache_name + '_') and os.path.isdir(path):
+                        legacy.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+            for _, path in sorted(legacy, reverse=True):
+                try:
+                    os.replace(path, cache_dir)
+                    return cache_dir
+                except OSError:
+                    continue
+            
             os.makedirs(cache_dir, exist_ok=True)
             if platform.system() == 'Windows':
                 try:
@@ -279,23 +2475,24 @@ class EelToolLauncher:
         
         return cache_dir
 
+    @property
+    def web_cache_dir(self):
+        """当前代的前端文件目录"""
+        return os.path.join(self.generations.active_dir, 'web')
+
     def ensure_cache_directory(self):
         """确保缓存目录存在"""
         os.makedirs(self.cache_dir, exist_ok=True)
         os.makedirs(self.web_cache_dir, exist_ok=True)
 
     def cleanup_old_cache_directories(self):
-        """清理旧的缓存目录"""
-        current_week = self.get_week_identifier()
-        
-        if platform.system() == 'Windows':
-            base_dir = os.path.join(os.getenv('LOCALAPPDATA', os.path.expanduser('~')), 'Temp')
-        else:
-            base_dir = '/tmp'
+        """清理旧的缓存目录（往周的目录和旧版本留下的随机后缀目录）"""
+        base_dir = os.path.dirname(self.cache_dir)
+        current = os.path.basename(self.cache_dir)
         
         try:
             for item in os.listdir(base_dir):
-                if item.startswith(f".{self.machine_id}_") and current_week not in item:
+                if item.startswith(f".{self.machine_id}_") and item != current:
                     old_cache_path = os.path.join(base_dir, item)
                     try:
                         shutil.rmtree(old_cache_path)
@@ -393,66 +2590,153 @@ class EelToolLauncher:
         # 如果找不到 pythonw，返回普通的 python
         return self.get_python_interpreter()
 
+    @traced('download')
     def download_file_from_github(self, owner, repo, file_path, local_path, progress_callback=None):
-        """从GitHub下载文件（使用raw.githubusercontent.com，无速率限制）"""
+        """从GitHub下载文件（使用raw.githubusercontent.com，无速率限制）
+        
+        按下载源链依次尝试：局域网镜像在前（按仓库可信哈希清单中的 sha256 校验），GitHub 在最后。
+        progress_callback(downloaded, total) 在每个数据块到达时调用（总大小未知时 total 为 0）
+        """
         # 确保父目录存在
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
         
         # 使用 raw.githubusercontent.com 直接下载（避免API速率限制）
         raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/main/{file_path}"
+        key = f"github/{owner}/{repo}/{file_path}"
+        self.telemetry.annotate(file=file_path)
         
-        headers = {
-            'User-Agent': 'Python-Tool-Launcher'
-        }
+        # 先写入临时文件，完整下载（并通过校验）后再替换，避免留下半个文件
+        temp_path = local_path + '.part'
+        cached = self.content_store.lookup(key)
+        result = self.downloader.fetch(key, raw_url, temp_path, progress_callback, cached=cached)
+        if result and result.get('not_modified'):
+            if self.content_store.materialize(key, local_path):
+                self.content_store.touch(key)
+                log_print(f"      内容未变化，沿用本地副本 ({result['source'].name})")
+                self.telemetry.increment('download.not_modified')
+                self.telemetry.annotate(not_modified=True, source=result['source'].name)
+                return True
+            # 本地副本已丢失，完整下载
+            result = self.downloader.fetch(key, raw_url, temp_path, progress_callback)
+        if not result:
+            self.telemetry.increment('download.failures')
+            return False
+        os.replace(temp_path, local_path)
+        self.content_store.put(key, local_path, result['sha256'], result.get('etag'))
         
-        # 重试机制：最多3次
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                if attempt > 0:
-                    log_print(f"      重试下载 ({attempt+1}/{max_retries})...")
-                    time.sleep(2)  # 等待2秒再重试
-                
-                response = requests.get(raw_url, headers=headers, timeout=30)
-                
-                if response.status_code == 200:
-                    file_content = response.content
-                    
-                    with open(local_path, 'wb') as f:
-                        f.write(file_content)
-                    
-                    log_print(f"      下载完成: {len(file_content)} bytes")
-                    
-                    if progress_callback:
-                        try:
-                            progress_callback(100, f"文件下载完成")
-                        except:
-                            pass  # 忽略回调错误（可能Eel未初始化）
-                    
-                    return True
-                else:
-                    error_msg = f"HTTP {response.status_code}"
-                    log_print(f"      下载失败: {error_msg}")
-                    if attempt == max_retries - 1:  # 最后一次尝试
-                        if progress_callback:
-                            try:
-                                progress_callback(0, f"下载失败: {error_msg}")
-                            except:
-                                pass
-                        return False
-                    
-            except Exception as e:
-                error_msg = str(e)
-                log_print(f"      下载异常: {error_msg}")
-                if attempt == max_retries - 1:  # 最后一次尝试
-                    if progress_callback:
-                        try:
-                            progress_callback(0, f"下载失败，请检查网络连接")
-                        except:
-                            pass
-                    return False
+        source = result['source']
+        log_print(f"      下载完成: {result['size']} bytes ({source.name}, {result['seconds']:.1f} 秒)")
+        self.telemetry.increment('download.bytes', result['size'])
+        self.telemetry.increment(f"download.source.{source.kind}")
+        if result['hedged']:
+            self.telemetry.increment('download.hedged')
+        self.telemetry.observe('download.size_bytes', result['size'])
+        self.telemetry.observe('download.seconds', result['seconds'])
+        self.telemetry.annotate(bytes=result['size'], attempts=result['attempts'], source=source.name,
+                                hedged=result['hedged'])
+        return True
+
+    def cooperative_wait(self, seconds):
+        """等待下载时让出 Eel 事件循环（在主线程中），进度推送不被阻塞"""
+        if threading.get_ident() == self.dispatcher.thread_ident:
+            eel.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+    def build_download_sources(self):
+        """下载源链：配置和环境变量 TOOL_LAUNCHER_MIRRORS 中的局域网镜像，其次是 GitHub，最后是备用源"""
+        mirror_config = self._internal_config['mirrors']
+        urls = list(mirror_config['urls'])
+        for url in re.split(r'[,;\s]+', os.environ.get('TOOL_LAUNCHER_MIRRORS', '')):
+            if url and url not in urls:
+                urls.append(url)
         
-        return False
+        sources = [MirrorSource(url, timeout=mirror_config['timeout']) for url in urls]
+        sources.append(HttpSource('github', telemetry=self.telemetry))
+        for index, template in enumerate(self._internal_config['download']['alternates']):
+            sources.append(HttpSource(f"alternate {urllib.parse.urlsplit(template).netloc or index}",
+                                      telemetry=self.telemetry, url_template=template))
+        if urls:
+            log_print(f"✓ 局域网镜像: {', '.join(urls)}")
+        return sources
+
+    def tool_key(self, tool_id):
+        """工具脚本的镜像键（下载源、镜像、内容仓库共用）"""
+        repo_config = self._internal_config['repositories'][tool_id]
+        return f"github/{repo_config['owner']}/{repo_config['repo']}/{repo_config['file_path']}"
+
+    def web_key(self, file_info):
+        """前端文件的镜像键"""
+        web_config = self._internal_config['web_interface']
+        return f"github/{web_config['owner']}/{web_config['repo']}/{file_info['path']}"
+
+    def artifact_paths(self):
+        """当前代中各工具脚本和前端文件的 {镜像键: 本地路径}"""
+        files = {}
+        for tool_id in self._internal_config['repositories']:
+            files[self.tool_key(tool_id)] = self.get_tool_cache_path(tool_id)
+        web_config = self._internal_config.get('web_interface')
+        if web_config:
+            for file_info in web_config['files']:
+                files[self.web_key(file_info)] = os.path.join(self.web_cache_dir, file_info['local'])
+        return files
+
+    def carry_over_artifacts(self):
+        """当前代缺少的文件从内容仓库恢复，缓存年龄按上次验证时间计算（跨周轮换后不会全部过期）"""
+        restored = 0
+        for key, path in self.artifact_paths().items():
+            if not os.path.exists(path) and self.content_store.materialize(key, path, keep_validated_time=True):
+                restored += 1
+        if restored:
+            if os.path.isdir(self.web_cache_dir) and os.listdir(self.web_cache_dir):
+                write_precompressed(self.web_cache_dir)
+            log_print(f"✓ 从内容仓库恢复 {restored} 个文件")
+        return restored
+
+    def refresh_jitter(self, key):
+        """该机器该文件固定的提前刷新量（0 ~ refresh_window 秒），让各机器的重新验证分散在到期前的窗口内"""
+        digest = hashlib.sha256(f"{self.machine_id}:{key}".encode('utf-8')).digest()
+        return int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF * self.refresh_window
+
+    def mirror_files(self, extra_dir=None):
+        """本机可通过镜像公开的文件：{镜像键: 本地路径}（键与下载源使用的一致），不含标记 mirror: False 的文件"""
+        files = self.artifact_paths()
+        web_config = self._internal_config.get('web_interface')
+        if web_config:
+            for file_info in web_config['files']:
+                if not file_info.get('mirror', True):
+                    files.pop(self.web_key(file_info), None)
+        if os.path.isdir(self.wheelhouse_dir):
+            for file in os.listdir(self.wheelhouse_dir):
+                files[f"wheelhouse/{file}"] = os.path.join(self.wheelhouse_dir, file)
+        if extra_dir and os.path.isdir(extra_dir):
+            # 额外目录中的文件按 release/<文件名> 公开（例如 Tk 启动器下载的 exe）
+            for file in os.listdir(extra_dir):
+                path = os.path.join(extra_dir, file)
+                if os.path.isfile(path):
+                    files[f"release/{file}"] = path
+        return {key: path for key, path in files.items() if os.path.isfile(path)}
+
+    def serve_cache(self, host='127.0.0.1', port=8765, extra_dir=None):
+        """以局域网镜像方式公开本机缓存（阻塞运行，Ctrl+C 结束）；默认只监听本机"""
+        errors = self.verify_cache_generation(self.generations.current)
+        if errors:
+            log_print(f"⚠ 当前缓存不完整，只公开已有的文件: {errors[0]}")
+        
+        server = CacheMirrorServer(lambda: self.mirror_files(extra_dir), self.status_index.artifact, host, port)
+        log_print(f"📡 局域网镜像已启动: http://{host}:{server.port}/manifest.json")
+        if host in ('127.0.0.1', 'localhost', '::1'):
+            log_print("   只监听本机；公开给其他机器请用 --serve-host 指定局域网地址")
+        else:
+            log_print("   ⚠ 镜像没有访问控制，只应在可信局域网中公开")
+            log_print(f"   其他机器设置 TOOL_LAUNCHER_MIRRORS=http://<本机地址>:{server.port} 即可优先从本机下载")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+        return True
 
     def download_web_interface(self):
         """从GitHub下载前端界面文件（仅在缓存无效时）"""
@@ -469,7 +2753,7 @@ class EelToolLauncher:
                     all_cached = False
                     break
                 file_age = time.time() - os.path.getmtime(local_path)
-                if file_age >= self.web_cache_duration:
+                if file_age >= self.web_cache_duration - self.refresh_jitter(self.web_key(file_info)):
                     all_cached = False
                     break
             
@@ -489,11 +2773,13 @@ class EelToolLauncher:
                 cache_valid = False
                 if os.path.exists(local_path):
                     file_age = time.time() - os.path.getmtime(local_path)
-                    cache_valid = file_age < self.web_cache_duration
+                    cache_valid = file_age < self.web_cache_duration - self.refresh_jitter(self.web_key(file_info))
                     if cache_valid:
                         days_old = file_age / (24 * 60 * 60)
                         log_print(f"   ✓ 缓存有效: {file_info['local']} (已缓存 {days_old:.1f} 天)")
                 
+                self.telemetry.increment('web_cache.hits' if cache_valid else 'web_cache.misses')
+                
                 # 如果缓存无效，下载新版本
                 if not cache_valid:
                     log_print(f"   → 下载: {file_info['path']}")
@@ -515,97 +2801,372 @@ class EelToolLauncher:
                     else:
                         log_print(f"   ✓ 下载成功: {file_info['local']}")
             
+            # 生成预压缩版本，运行时直接载入
+            write_precompressed(self.web_cache_dir)
+            
             log_print("前端文件准备完成")
             return True
-            
+            
+        except Exception as e:
+            log_print(f"下载前端文件失败: {str(e)}")
+            # 如果下载失败，尝试从本地web目录复制
+            try:
+                for file_info in web_config['files']:
+                    local_path = os.path.join(self.web_cache_dir, file_info['local'])
+                    if not os.path.exists(local_path):
+                        local_web_file = os.path.join('web', file_info['local'])
+                        if os.path.exists(local_web_file):
+                            shutil.copy2(local_web_file, local_path)
+            except:
+                pass
+            return True
+
+    def check_for_updates(self):
+        """手动检查更新 - 在当前缓存代旁边构建新一代，校验通过后切换（失败时继续使用当前版本）"""
+        log_print("")
+        log_print("============================================================")
+        log_print("🔄 开始检查更新...")
+        log_print("============================================================")
+        
+        result = self.update_cache_generation('update')
+        
+        log_print("")
+        if result["success"]:
+            log_print(f"✅ 更新完成！当前缓存代: {result['generation']}")
+            log_print(f"   更新了 {len(result['updated'])} 个文件")
+            if result.get('previous'):
+                log_print(f"   上一代 {result['previous']} 已保留，可随时回滚")
+        else:
+            log_print(f"✗ {result['message']}")
+        log_print("============================================================")
+        log_print("")
+        
+        return result
+
+    def build_cache_generation(self, name, job):
+        """向新一代目录下载全部前端与工具文件，返回 (已更新文件列表, 错误列表)"""
+        updated = []
+        errors = []
+        
+        # 1. 前端文件：下载失败时沿用预置的当前版本
+        web_config = self._internal_config.get('web_interface')
+        if web_config:
+            self.progress.publish(job, 10, "正在更新前端界面...")
+            web_dir = os.path.join(self.generations.path(name), 'web')
+            for file_info in web_config['files']:
+                local_path = os.path.join(web_dir, file_info['local'])
+                success = self.download_file_from_github(
+                    web_config['owner'],
+                    web_config['repo'],
+                    file_info['path'],
+                    local_path
+                )
+                if success:
+                    updated.append(f"web/{file_info['local']}")
+                else:
+                    log_print(f"警告: 更新前端文件 {file_info['path']} 失败，沿用当前版本")
+            if os.path.isdir(web_dir):
+                write_precompressed(web_dir)
+        
+        # 2. 工具文件：任何一个失败都放弃这一代
+        total_tools = len(self._internal_config['repositories'])
+        
+        for i, (tool_id, repo_config) in enumerate(self._internal_config['repositories'].items()):
+            percent = 20 + (i / total_tools) * 80  # 20-100%
+            status = f"更新 {self.tools[tool_id]['name']}..."
+            self.progress.publish(job, percent, status)
+            
+            success = self.download_file_from_github(
+                repo_config['owner'],
+                repo_config['repo'],
+                repo_config['file_path'],
+                self.get_tool_cache_path(tool_id, name),
+                progress_callback=self.download_progress(job, percent, percent + 80 / total_tools, status)
+            )
+            
+            if not success:
+                errors.append(f"更新 {self.tools[tool_id]['name']} 失败")
+                break
+            updated.append(repo_config['local_name'])
+        
+        return updated, errors
+
+    def verify_cache_generation(self, name):
+        """校验新一代缓存：工具脚本存在、非空且能编译，前端文件非空；返回错误列表"""
+        errors = []
+        for tool_id in self._internal_config['repositories']:
+            local_file = self.get_tool_cache_path(tool_id, name)
+            try:
+                with open(local_file, 'rb') as f:
+                    source = f.read()
+                if not source.strip():
+                    errors.append(f"{self.tools[tool_id]['name']} 文件为空")
+                    continue
+                compile(source, local_file, 'exec')
+            except SyntaxError as e:
+                errors.append(f"{self.tools[tool_id]['name']} 校验失败: 第 {e.lineno} 行语法错误")
+            except Exception as e:
+                errors.append(f"{self.tools[tool_id]['name']} 校验失败: {str(e)}")
+        
+        web_config = self._internal_config.get('web_interface')
+        if web_config:
+            web_dir = os.path.join(self.generations.path(name), 'web')
+            for file_info in web_config['files']:
+                local_path = os.path.join(web_dir, file_info['local'])
+                if os.path.exists(local_path) and os.path.getsize(local_path) == 0:
+                    errors.append(f"前端文件 {file_info['local']} 为空")
+        return errors
+
+    def update_cache_generation(self, job):
+        """构建、校验并原子切换到新一代缓存；失败时丢弃新一代，当前代始终完整可用"""
+        if self._building_generation:
+            return {"success": False, "message": "更新正在进行中，请稍候"}
+        
+        name = self.generations.begin()
+        self._building_generation = name
+        previous = self.generations.current
+        try:
+            updated, errors = self.build_cache_generation(name, job)
+            if not errors:
+                errors = self.verify_cache_generation(name)
+            if errors:
+                for error in errors:
+                    log_print(f"   ✗ {error}")
+                self.generations.discard(name)
+                self.telemetry.increment('generations.failed')
+                return {"success": False, "message": f"{errors[0]}，继续使用当前版本",
+                        "generation": previous}
+            self.generations.commit(name)
+            self.telemetry.increment('generations.commits')
+        except Exception as e:
+            self.generations.discard(name)
+            self.telemetry.increment('generations.failed')
+            return {"success": False, "message": f"更新失败: {str(e)}，继续使用当前版本",
+                    "generation": previous}
+        finally:
+            self._building_generation = None
+        
+        log_print(f"   ✓ 缓存已切换: {previous} → {name}")
+        
+        # 依赖指纹一并失效，下次启动重新检查
+        self.status_index.clear_dependencies()
+        self.reload_web_assets()
+        self.progress.publish(job, 100, "更新完成")
+        self.push_tool_status()
+        
+        return {
+            "success": True,
+            "message": "所有工具和界面已更新到最新版本",
+            "generation": name,
+            "previous": previous,
+            "updated": updated
+        }
+
+    def rollback_update(self):
+        """回滚到上一代缓存（上一次更新之前的版本）"""
+        current = self.generations.current
+        if not self.generations.rollback():
+            return {"success": False, "message": "没有可回滚的版本"}
+        
+        log_print(f"↩️ 缓存已回滚: {current} → {self.generations.current}")
+        self.telemetry.increment('generations.rollbacks')
+        self.status_index.clear_dependencies()
+        self.reload_web_assets()
+        self.push_tool_status()
+        return {"success": True, "message": "已回滚到上一版本",
+                "generation": self.generations.current, "previous": current}
+
+    def build_wheelhouse(self):
+        """把所有工具的依赖（含传递依赖）下载到本地 wheel 目录，返回是否成功"""
+        packages = sorted({package for repo_config in self._internal_config['repositories'].values()
+                           for package in repo_config.get('dependencies', [])})
+        if not packages:
+            return True
+        
+        log_print(f"   → 下载依赖 wheel: {', '.join(packages)}")
+        os.makedirs(self.wheelhouse_dir, exist_ok=True)
+        try:
+            result = subprocess.run(
+                [self.get_python_interpreter(), '-m', 'pip', 'download', *packages,
+                 '-d', self.wheelhouse_dir,
+                 '-i', PIP_INDEX_URL,
+                 '--trusted-host', PIP_TRUSTED_HOST],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=1800,
+                creationflags=subprocess.CREATE_NO_WINDOW if platform.system() == 'Windows' else 0
+            )
+        except Exception as e:
+            log_print(f"   ⚠ 下载依赖 wheel 失败: {str(e)}")
+            return False
+        if result.returncode != 0:
+            log_print(f"   ⚠ 下载依赖 wheel 失败: {result.stderr.decode('utf-8', errors='ignore').strip()[-500:]}")
+            return False
+        return True
+
+    def export_bundle(self, bundle_path, include_wheels=True):
+        """把校验通过的当前代缓存、依赖 wheel 和清单打包为一个 zip（新机器或离线机器预置缓存用）"""
+        current = self.generations.current
+        errors = self.verify_cache_generation(current)
+        if errors:
+            return {"success": False, "message": f"当前缓存不完整，无法导出: {errors[0]}"}
+        
+        wheels_ready = self.build_wheelhouse() if include_wheels else False
+        
+        # 待打包的文件：当前代（预压缩文件导入时重新生成）和 wheel 目录
+        entries = []
+        source = self.generations.active_dir
+        for directory, _, files in os.walk(source):
+            for file in sorted(files):
+                if file.endswith(('.part', '.tmp') + StaticAssetBundle.COMPRESSED_SUFFIXES):
+                    continue
+                path = os.path.join(directory, file)
+                entries.append((path, 'cache/' + os.path.relpath(path, source).replace(os.sep, '/')))
+        if include_wheels and os.path.isdir(self.wheelhouse_dir):
+            for file in sorted(os.listdir(self.wheelhouse_dir)):
+                if file.endswith(('.whl', '.tar.gz', '.zip')):
+                    entries.append((os.path.join(self.wheelhouse_dir, file), 'wheelhouse/' + file))
+        
+        manifest = {
+            "format": CACHE_BUNDLE_FORMAT,
+            "created_at": time.time(),
+            "generation": current,
+            "platform": {"system": platform.system(), "machine": platform.machine()},
+            "wheels_complete": wheels_ready,
+            "files": {}
+        }
+        temp_path = bundle_path + '.part'
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(bundle_path)), exist_ok=True)
+            with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as bundle:
+                for path, arcname in entries:
+                    info = zipfile.ZipInfo.from_file(path, arcname)
+                    # wheel 本身已压缩，直接存储
+                    info.compress_type = zipfile.ZIP_STORED if arcname.startswith('wheelhouse/') else zipfile.ZIP_DEFLATED
+                    digest = hashlib.sha256()
+                    with open(path, 'rb') as src, bundle.open(info, 'w', force_zip64=True) as dst:
+                        for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                            digest.update(chunk)
+                            dst.write(chunk)
+                    manifest["files"][arcname] = {"sha256": digest.hexdigest(), "size": info.file_size}
+                bundle.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2))
+            os.replace(temp_path, bundle_path)
         except Exception as e:
-            log_print(f"下载前端文件失败: {str(e)}")
-            # 如果下载失败，尝试从本地web目录复制
             try:
-                for file_info in web_config['files']:
-                    local_path = os.path.join(self.web_cache_dir, file_info['local'])
-                    if not os.path.exists(local_path):
-                        local_web_file = os.path.join('web', file_info['local'])
-                        if os.path.exists(local_web_file):
-                            shutil.copy2(local_web_file, local_path)
-            except:
+                os.remove(temp_path)
+            except OSError:
                 pass
-            return True
+            return {"success": False, "message": f"导出缓存包失败: {str(e)}"}
+        
+        wheels = sum(1 for arcname in manifest["files"] if arcname.startswith('wheelhouse/'))
+        log_print(f"✓ 已导出缓存包: {bundle_path} ({len(manifest['files'])} 个文件，其中 wheel {wheels} 个)")
+        return {"success": True, "message": f"已导出 {len(manifest['files'])} 个文件", "path": bundle_path,
+                "files": len(manifest["files"]), "wheels": wheels, "wheels_complete": wheels_ready}
 
-    def check_for_updates(self):
-        """手动检查更新 - 清除所有缓存的工具文件"""
-        try:
-            log_print("")
-            log_print("============================================================")
-            log_print("🔄 开始检查更新...")
-            log_print("============================================================")
-            
-            # 清除工具文件缓存
-            tools_cleared = 0
-            if os.path.exists(self.cache_dir):
-                for file in os.listdir(self.cache_dir):
-                    if file.endswith('.py'):
-                        file_path = os.path.join(self.cache_dir, file)
-                        try:
-                            os.remove(file_path)
-                            log_print(f"   ✓ 已清除: {file}")
-                            tools_cleared += 1
-                        except Exception as e:
-                            log_print(f"   ✗ 清除失败: {file} - {str(e)}")
-            
-            # 清除前端文件缓存
-            web_cleared = 0
-            if os.path.exists(self.web_cache_dir):
-                for file in os.listdir(self.web_cache_dir):
-                    file_path = os.path.join(self.web_cache_dir, file)
-                    try:
-                        os.remove(file_path)
-                        log_print(f"   ✓ 已清除: web/{file}")
-                        web_cleared += 1
-                    except Exception as e:
-                        log_print(f"   ✗ 清除失败: web/{file} - {str(e)}")
-            
-            log_print("")
-            log_print(f"✅ 更新检查完成！")
-            log_print(f"   清除了 {tools_cleared} 个工具文件")
-            log_print(f"   清除了 {web_cleared} 个前端文件")
-            log_print(f"   下次启动工具时将自动下载最新版本")
-            log_print("============================================================")
-            log_print("")
+    def import_bundle(self, bundle_path):
+        """导入缓存包：逐个校验 sha256 后解压为新一代缓存，wheel 放入本地 wheel 目录，校验通过后切换"""
+        try:
+            bundle = zipfile.ZipFile(bundle_path)
+        except Exception as e:
+            return {"success": False, "message": f"无法打开缓存包: {str(e)}"}
+        
+        with bundle:
+            try:
+                manifest = json.loads(bundle.read('manifest.json').decode('utf-8'))
+            except Exception:
+                return {"success": False, "message": "缓存包缺少有效的 manifest.json"}
+            if manifest.get('format') != CACHE_BUNDLE_FORMAT:
+                return {"success": False, "message": f"不支持的缓存包格式: {manifest.get('format')}"}
+            if set(bundle.namelist()) - {'manifest.json'} != set(manifest['files']):
+                return {"success": False, "message": "缓存包内容与清单不一致"}
             
-            return {
-                "success": True,
-                "message": f"已清除 {tools_cleared} 个工具缓存，下次启动将自动更新",
-                "tools_cleared": tools_cleared,
-                "web_cleared": web_cleared
-            }
+            source_platform = manifest.get('platform', {})
+            if source_platform.get('system') != platform.system():
+                log_print(f"   ⚠ 缓存包来自 {source_platform.get('system')}，其中的 wheel 可能无法在本机安装")
             
-        except Exception as e:
-            error_msg = f"检查更新失败: {str(e)}"
-            log_print(f"✗ {error_msg}")
-            return {
-                "success": False,
-                "message": error_msg
-            }
+            name = self.generations.begin()
+            try:
+                for arcname, expected in manifest['files'].items():
+                    area, _, relative = arcname.partition('/')
+                    parts = relative.split('/')
+                    if area not in ('cache', 'wheelhouse') or not relative or any(part in ('', '.', '..') for part in parts) \
+                            or (area == 'wheelhouse' and len(parts) != 1):
+                        raise ValueError(f"非法路径: {arcname}")
+                    base_dir = self.generations.path(name) if area == 'cache' else self.wheelhouse_dir
+                    target = os.path.join(base_dir, *parts)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    
+                    # 解压到临时文件，哈希一致才替换到位
+                    digest = hashlib.sha256()
+                    temp_path = target + '.part'
+                    with bundle.open(arcname) as src, open(temp_path, 'wb') as dst:
+                        for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                            digest.update(chunk)
+                            dst.write(chunk)
+                    if digest.hexdigest() != expected['sha256']:
+                        os.remove(temp_path)
+                        raise ValueError(f"校验失败: {arcname}")
+                    os.replace(temp_path, target)
+                
+                web_dir = os.path.join(self.generations.path(name), 'web')
+                if os.path.isdir(web_dir):
+                    write_precompressed(web_dir)
+                errors = self.verify_cache_generation(name)
+                if errors:
+                    raise ValueError(errors[0])
+                previous = self.generations.current
+                self.generations.commit(name)
+            except Exception as e:
+                self.generations.discard(name)
+                log_print(f"✗ 导入缓存包失败: {str(e)}")
+                return {"success": False, "message": f"导入缓存包失败: {str(e)}"}
+        
+        # 校验过的工具脚本和前端文件登记到内容仓库（与下载的键和哈希一致），之后的缓存目录从这里恢复
+        stored = 0
+        for key, path in self.artifact_paths().items():
+            arcname = 'cache/' + os.path.relpath(path, self.generations.active_dir).replace(os.sep, '/')
+            if arcname in manifest['files']:
+                self.content_store.put(key, path, manifest['files'][arcname]['sha256'])
+                stored += 1
+        log_print(f"   已登记 {stored} 个文件到内容仓库")
+        
+        log_print(f"✓ 已导入缓存包: {previous} → {name} ({len(manifest['files'])} 个文件)")
+        self.telemetry.increment('bundles.imported')
+        self.status_index.clear_dependencies()
+        self.reload_web_assets()
+        self.push_tool_status()
+        return {"success": True, "message": f"已导入 {len(manifest['files'])} 个文件", "generation": name}
+
+    @traced('dependencies')
+    def check_and_install_dependencies(self, tool_id, job=None):
+        """检查并安装依赖；job 为启动作业时在 0~30% 区间汇报进度"""
+        def publish(percent, status, final=False):
+            if job:
+                self.progress.publish(job, percent, status, final=final)
 
-    def check_and_install_dependencies(self, tool_id):
-        """检查并安装依赖"""
         repo_config = self._internal_config['repositories'].get(tool_id)
         if not repo_config or not repo_config.get('dependencies'):
             log_print("   → 无需依赖")
             return True
         
-        log_print(f"   → 检查依赖: {', '.join(repo_config['dependencies'])}")
         python_cmd = self.get_python_interpreter()
+        packages = repo_config['dependencies']
+        
+        # 指纹未变化说明上次已检查通过，跳过逐个 pip show
+        if self.status_index.dependencies_satisfied(tool_id, python_cmd, packages):
+            self.telemetry.increment('dependencies.fingerprint_hits')
+            log_print("   ✓ 依赖指纹未变化，跳过检查")
+            publish(30, "依赖检查完成")
+            return True
+        
+        log_print(f"   → 检查依赖: {', '.join(repo_config['dependencies'])}")
         
         for i, package in enumerate(repo_config['dependencies']):
-            try:
-                percent = (i / len(repo_config['dependencies'])) * 30
-                eel.updateProgress(percent, f"检查依赖: {package}")
-            except:
-                pass
+            percent = (i / len(repo_config['dependencies'])) * 30
+            publish(percent, f"检查依赖: {package}")
             
             try:
+                check_started = time.perf_counter()
                 result = subprocess.run(
                     [python_cmd, '-m', 'pip', 'show', package],
                     stdout=subprocess.PIPE,
@@ -613,34 +3174,24 @@ class EelToolLauncher:
                     timeout=30,
                     creationflags=subprocess.CREATE_NO_WINDOW if platform.system() == 'Windows' else 0
                 )
+                self.telemetry.observe('pip.check.seconds', time.perf_counter() - check_started)
                 
                 if result.returncode != 0:
                     log_print(f"      → 安装依赖: {package}")
-                    try:
-                        eel.updateProgress(percent, f"安装依赖: {package}")
-                    except:
-                        pass
+                    publish(percent, f"安装依赖: {package}")
                     
-                    # 使用清华镜像源加速下载，延长超时时间（opencv-python 较大）
-                    install_result = subprocess.run(
-                        [python_cmd, '-m', 'pip', 'install', package, 
-                         '-i', 'https://pypi.tuna.tsinghua.edu.cn/simple',
-                         '--trusted-host', 'pypi.tuna.tsinghua.edu.cn'],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        timeout=600,  # 增加到 10 分钟
-                        creationflags=subprocess.CREATE_NO_WINDOW if platform.system() == 'Windows' else 0
-                    )
+                    install_started = time.perf_counter()
+                    install_result = self.pip_install(python_cmd, package)
+                    self.telemetry.observe('pip.install.seconds', time.perf_counter() - install_started)
+                    self.telemetry.increment('pip.installs')
                     
                     if install_result.returncode != 0:
                         error_msg = f"依赖安装失败: {package}"
                         log_print(f"      ✗ {error_msg}")
                         if install_result.stderr:
                             log_print(f"         错误: {install_result.stderr.decode('utf-8', errors='ignore')}")
-                        try:
-                            eel.updateProgress(0, error_msg)
-                        except:
-                            pass
+                        publish(0, error_msg, final=True)
+                        self.status_index.clear_dependencies(tool_id)
                         return False
                     else:
                         log_print(f"      ✓ 安装成功: {package}")
@@ -648,31 +3199,329 @@ class EelToolLauncher:
                     log_print(f"      ✓ 已安装: {package}")
             except Exception as e:
                 log_print(f"      ✗ 检查依赖失败: {package} - {str(e)}")
+                self.status_index.clear_dependencies(tool_id)
                 return False
         
+        self.status_index.mark_dependencies(tool_id, python_cmd, packages, self.get_site_dirs(python_cmd))
         log_print("   ✓ 依赖检查完成")
-        try:
-            eel.updateProgress(30, "依赖检查完成")
-        except:
-            pass
+        publish(30, "依赖检查完成")
         
         return True
 
+    def get_site_dirs(self, python_cmd):
+        """查询解释器的 site-packages 目录（用于依赖指纹），失败时返回空列表"""
+        code = ("import json, site; dirs = list(getattr(site, 'getsitepackages', list)()); "
+                "dirs.append(site.getusersitepackages()); print(json.dumps(dirs))")
+        try:
+            result = subprocess.run(
+                [python_cmd, '-c', code],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=15,
+                creationflags=subprocess.CREATE_NO_WINDOW if platform.system() == 'Windows' else 0
+            )
+            return json.loads(result.stdout.decode('utf-8')) if result.returncode == 0 else []
+        except Exception:
+            return []
+
+    def pip_install(self, python_cmd, package):
+        """安装单个依赖：本地 wheel 目录有文件时先离线安装，失败再从镜像源下载安装"""
+        creationflags = subprocess.CREATE_NO_WINDOW if platform.system() == 'Windows' else 0
+        if os.path.isdir(self.wheelhouse_dir) and os.listdir(self.wheelhouse_dir):
+            result = subprocess.run(
+                [python_cmd, '-m', 'pip', 'install', package,
+                 '--no-index', '--find-links', self.wheelhouse_dir],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=600,
+                creationflags=creationflags
+            )
+            if result.returncode == 0:
+                self.telemetry.increment('pip.offline_installs')
+                log_print(f"      ✓ 已从本地 wheel 安装: {package}")
+                return result
+        
+        # 使用清华镜像源加速下载，延长超时时间（opencv-python 较大）
+        return subprocess.run(
+            [python_cmd, '-m', 'pip', 'install', package,
+             '-i', PIP_INDEX_URL,
+             '--trusted-host', PIP_TRUSTED_HOST],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=600,  # 增加到 10 分钟
+            creationflags=creationflags
+        )
+
     def get_tools_list(self):
         """获取工具列表"""
         return self.tools
 
+    def get_metrics(self):
+        """获取指标快照和最近的追踪记录"""
+        return self.telemetry.get_metrics()
+
+    def download_progress(self, job, start, end, status):
+        """生成下载进度回调：把字节进度映射到 start~end 的百分比区间"""
+        def callback(downloaded, total):
+            fraction = min(1.0, downloaded / total) if total else 0.0
+            self.progress.publish(job, start + (end - start) * fraction, status, downloaded, total)
+        return callback
+
+    def push_progress(self, payload):
+        """把合并后的进度推送到页面"""
+        if self.headless:
+            # 命令行只在状态变化或进度前进 10% 以上时输出一行
+            job = payload.get('job')
+            last = self._console_progress.get(job)
+            if last is None or last[1] != payload['status'] or payload['percent'] - last[0] >= 10 or payload['percent'] >= 100:
+                self._console_progress[job] = (payload['percent'], payload['status'])
+                log_print(f"   [{payload['percent']:3.0f}%] {payload['status']}")
+            return
+        try:
+            eel.updateProgress(payload['percent'], payload['status'], payload)
+        except:
+            pass  # Eel 未初始化时忽略
+
+    def get_process_table(self, table=None):
+        """获取运行中工具的进程表（含启动队列）；table 为监管器刚推送的进程表时不再重新生成"""
+        table = dict(table) if table is not None else self.supervisor.get_table()
+        table["queue"] = [dict(entry, name=self.tools[entry["tool_id"]]["name"])
+                          for entry in self.scheduler.get_queue()]
+        return table
+
+    def handle_tool_exit(self, entry):
+        """工具退出后保留其输出，释放容量并启动排队中的请求"""
+        self.output_capture.release(entry["pid"])
+        if entry["exit_code"] != 0:
+            entry["stderr_tail"] = self.output_capture.tail(entry["pid"], stream="stderr")
+            for line in entry["stderr_tail"]:
+                log_print(f"      {line}")
+            # 缺少模块说明依赖已被卸载或损坏：清除指纹，下次启动时完整检查
+            if any('ModuleNotFoundError' in line or 'ImportError' in line for line in entry["stderr_tail"]):
+                log_print("   → 检测到依赖导入失败，下次启动时重新检查依赖")
+                self.status_index.clear_dependencies(entry["tool_id"])
+        self.scheduler.drain()
+
+    def get_tool_output(self, pid, since=0):
+        """获取工具进程的最近输出"""
+        output = self.output_capture.get_output(int(pid), since=int(since or 0))
+        if output is None:
+            return {"success": False, "message": "没有该进程的输出记录"}
+        output["success"] = True
+        output["name"] = self.tools.get(output["tool_id"], {}).get("name", output["tool_id"])
+        return output
+
+    def cancel_queued_launch(self, ticket):
+        """取消排队中的启动"""
+        if self.scheduler.cancel(int(ticket)):
+            self.push_process_table()
+            return {"success": True, "message": "已取消排队"}
+        return {"success": False, "message": "该启动已开始或不存在"}
+
+    def terminate_tool_process(self, pid):
+        """终止指定的工具进程"""
+        if self.supervisor.terminate(int(pid)):
+            return {"success": True, "message": "已发送终止信号"}
+        return {"success": False, "message": "进程不存在或已退出"}
+
+    def push_process_table(self, table=None):
+        """把进程表（含启动队列）推送到页面"""
+        if not self.window_open:
+            return
+        table = self.get_process_table(table)
+        try:
+            eel.updateProcessTable(table)
+        except:
+            pass  # Eel 未初始化或页面脚本过旧时忽略
+        # 进程表在进程或资源档位变化时推送；就绪状态只在运行中的工具变化时重新计算
+        running = sorted(entry["tool_id"] for entry in table["running"])
+        if running != self._pushed_running:
+            self._pushed_running = running
+            self.push_tool_status()
+
+    def dependency_state(self, tool_id):
+        """依赖状态：none（无依赖）、ok（指纹匹配）、unknown（需要检查）"""
+        packages = self._internal_config['repositories'][tool_id].get('dependencies')
+        if not packages:
+            return "none"
+        # 状态查询不主动探测解释器，尚未探测时沿用指纹里记录的解释器
+        if self.status_index.dependencies_satisfied(tool_id, self._python_interpreter, packages):
+            return "ok"
+        return "unknown"
+
+    def get_launcher_status(self):
+        """批量返回所有工具的就绪状态"""
+        now = time.time()
+        status = {}
+        for tool_id in self._internal_config['repositories']:
+            try:
+                artifact = self.status_index.artifact(self.get_tool_cache_path(tool_id))
+            except OSError:
+                artifact = None
+            
+            cache_age = now - artifact[0] if artifact else None
+            cache_fresh = artifact is not None and \
+                cache_age < self.cache_duration - self.refresh_jitter(self.tool_key(tool_id))
+            dependencies = self.dependency_state(tool_id)
+            status[tool_id] = {
+                "cache": "fresh" if cache_fresh else ("stale" if artifact else "missing"),
+                "cache_age": round(cache_age) if artifact else None,
+                "size": artifact[1] if artifact else None,
+                "sha256": artifact[2] if artifact else None,
+                "dependencies": dependencies,
+                "running": self.supervisor.running_count(tool_id),
+                "last_launch_ms": self.status_index.launch_latency.get(tool_id),
+                "ready": cache_fresh and dependencies in ("none", "ok")
+            }
+        return status
+
+    def push_tool_status(self):
+        """就绪状态有变化时推送到页面（缓存时长每次都变，不参与比较）"""
+        if not self.window_open:
+            return
+        status = self.get_launcher_status()
+        signature = {tool_id: dict(entry, cache_age=None) for tool_id, entry in status.items()}
+        if signature == self._pushed_status:
+            return
+        self._pushed_status = signature
+        try:
+            eel.updateToolStatus(status)
+        except:
+            pass  # Eel 未初始化或页面脚本过旧时忽略
+
+    def reload_web_assets(self):
+        """前端文件更新后重新载入内存资源，并通知页面只刷新变化的部分（不重启进程）"""
+        if self.assets is None:
+            return None
+        try:
+            web_dir = self.web_cache_dir if os.path.isdir(self.web_cache_dir) and os.listdir(self.web_cache_dir) else None
+            previous_dir = self.assets.web_dir
+            changed = self.assets.reload(web_dir)
+            if web_dir and web_dir != previous_dir:
+                # 切换缓存代后 Eel 的静态目录也指向新一代（旧代之后可能被清理）
+                switch_eel_web_root(web_dir)
+        except Exception as e:
+            log_print(f"⚠️ 重新载入前端资源失败: {str(e)}")
+            return None
+        if not changed:
+            return None
+        
+        # 样式表就地替换；脚本、页面或其他资源变化时页面需要重新载入
+        styles = [{"old": old_url, "new": self.assets.asset_url(name)}
+                  for name, old_url in changed.items()
+                  if name.endswith('.css') and old_url and name in self.assets.source_hashes]
+        reload_page = any(not name.endswith('.css') for name in changed)
+        if any(name.endswith('.js') for name in changed):
+            # 重新扫描页面脚本中 eel.expose 的函数，新增的函数也能从 Python 调用
+            switch_eel_web_root(self.assets.web_dir)
+        
+        update = {"changed": list(changed), "styles": styles, "reload": reload_page}
+        log_print(f"✓ 前端资源已热更新: {', '.join(changed)}")
+        if self.window_open:
+            try:
+                eel.assetsUpdated(update)
+            except:
+                pass  # 旧版页面没有 assetsUpdated，下次打开窗口时生效
+        return update
+
+    def get_tool_cache_path(self, tool_id, generation=None):
+        """工具脚本的本地缓存路径（默认为当前代，构建新一代时传入其名称）"""
+        repo_config = self._internal_config['repositories'][tool_id]
+        base_dir = self.generations.path(generation) if generation else self.generations.active_dir
+        return os.path.join(base_dir, repo_config['local_name'])
+
+    def is_tool_cache_valid(self, tool_id):
+        """工具脚本缓存是否存在且未过期"""
+        local_file = self.get_tool_cache_path(tool_id)
+        if not os.path.exists(local_file):
+            return False
+        # 按机器错开的到期时间，避免所有机器同时重新下载
+        return time.time() - os.path.getmtime(local_file) < self.cache_duration - self.refresh_jitter(self.tool_key(tool_id))
+
+    def get_tools_catalog(self, known_revisions=None):
+        """带版本号的工具目录：前端传入已知的各工具版本，只返回有变化的条目"""
+        known_revisions = known_revisions or {}
+        entries = {}
+        for tool_id, info in self.tools.items():
+            entry = dict(info, cached=self.is_tool_cache_valid(tool_id))
+            entry_json = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+            entry['rev'] = hashlib.sha1(entry_json.encode('utf-8')).hexdigest()[:12]
+            entries[tool_id] = entry
+        
+        version_source = '|'.join(f"{tool_id}:{entry['rev']}" for tool_id, entry in entries.items())
+        return {
+            "version": hashlib.sha1(version_source.encode('utf-8')).hexdigest()[:12],
+            "order": list(entries),
+            "changed": {tool_id: entry for tool_id, entry in entries.items()
+                        if known_revisions.get(tool_id) != entry['rev']},
+            "removed": [tool_id for tool_id in known_revisions if tool_id not in entries]
+        }
+
+    def handle_instance_intent(self, intent):
+        """处理其他启动实例转交过来的意图"""
+        action = intent.get('action', 'focus')
+
+        if action == 'launch':
+            tool_id = intent.get('tool_id')
+            if tool_id not in self.tools:
+                return {"ok": False, "message": f"未知工具: {tool_id}"}
+            log_print(f"📨 收到启动请求: {self.tools[tool_id]['name']}")
+            if self.window_open:
+                # 交给页面启动，复用页面上的进度提示
+                try:
+                    eel.launchTool(tool_id)
+                except AttributeError:
+                    # 页面脚本版本过旧，未暴露 launchTool
+                    eel.spawn(self.launch_tool, tool_id)
+            else:
+                self.pending_intents.append(intent)
+                eel.show('index.html')
+            return {"ok": True, "message": "已转交启动请求"}
+
+        log_print("📨 收到聚焦窗口请求")
+        if self.window_open:
+            try:
+                eel.focusWindow()
+            except AttributeError:
+                pass
+            self.bring_window_to_front()
+        else:
+            eel.show('index.html')
+        return {"ok": True, "message": "已聚焦窗口"}
+
+    def bring_window_to_front(self):
+        """把主窗口切换到前台（仅 Windows）"""
+        if platform.system() != 'Windows':
+            return
+        try:
+            import ctypes
+            user32 = ctypes.windll.user32
+            hwnd = user32.FindWindowW(None, "生产力工具整合")
+            if hwnd:
+                user32.ShowWindow(hwnd, 9)  # SW_RESTORE
+                user32.SetForegroundWindow(hwnd)
+        except:
+            pass
+
+    def consume_pending_intents(self):
+        """页面加载完成时调用：标记窗口已打开并取走待处理的意图"""
+        self.window_open = True
+        intents, self.pending_intents = self.pending_intents, []
+        return intents
+
+    @traced('launch_tool')
     def launch_tool(self, tool_id):
         """启动工具"""
+        self.telemetry.annotate(tool_id=tool_id)
+        started_at = time.time()
+        # 每次启动单独的进度作业，同时进行的启动互不覆盖
+        job = self.launch_job(tool_id)
         try:
             # 检查并安装依赖
-            if not self.check_and_install_dependencies(tool_id):
+            if not self.check_and_install_dependencies(tool_id, job):
                 return {"success": False, "message": "依赖安装失败"}
             
-            try:
-                eel.updateProgress(40, "准备工具文件...")
-            except:
-                pass
+            self.progress.publish(job, 40, "准备工具文件...")
             
             # 获取仓库配置
             repo_config = self._internal_config['repositories'].get(tool_id)
@@ -680,61 +3529,142 @@ class EelToolLauncher:
                 return {"success": False, "message": "工具配置未找到"}
             
             # 本地缓存文件路径
-            local_file = os.path.join(self.cache_dir, repo_config['local_name'])
-            
-            # 检查缓存是否存在且有效
-            cache_valid = False
-            if os.path.exists(local_file):
-                file_age = time.time() - os.path.getmtime(local_file)
-                cache_valid = file_age < self.cache_duration
-                if cache_valid:
-                    days_old = file_age / (24 * 60 * 60)
-                    log_print(f"   ✓ 使用缓存: {repo_config['local_name']} (已缓存 {days_old:.1f} 天)")
-            
-            # 如果缓存无效，下载新版本
-            if not cache_valid:
-                log_print(f"   → 下载工具: {repo_config['local_name']}")
-                try:
-                    eel.updateProgress(50, "正在下载工具...")
-                except:
-                    pass
-                success = self.download_file_from_github(
-                    repo_config['owner'],
-                    repo_config['repo'],
-                    repo_config['file_path'],
-                    local_file
-                )
-                
-                if not success:
-                    return {"success": False, "message": "工具下载失败"}
+            local_file = self.get_tool_cache_path(tool_id)
             
-            try:
-                eel.updateProgress(90, "启动工具...")
-            except:
-                pass
+            if self.fetch_tool(tool_id, job, 50, 90) is None:
+                return {"success": False, "message": "工具下载失败"}
+            
+            self.progress.publish(job, 90, "启动工具...")
+            
+            # 交给调度器：资源允许则立即启动，否则排队
+            result = self.scheduler.submit(tool_id, local_file)
+            if result.get("success") and not result.get("queued"):
+                self.status_index.record_launch(tool_id, time.time() - started_at)
+                self.telemetry.observe('launch.latency_seconds', time.time() - started_at)
+            self.push_process_table()
+            return result
+            
+        except Exception as e:
+            error_msg = f"启动失败: {str(e)}"
+            log_print(f"   ✗ {error_msg}")
+            import traceback
+            log_print(traceback.format_exc())
+            return {"success": False, "message": error_msg}
+        finally:
+            self.progress.clear(job)
+
+    @staticmethod
+    def launch_job(tool_id):
+        """启动工具的进度作业名（页面按它区分同时进行的启动）"""
+        return f"launch:{tool_id}"
+
+    def fetch_tool(self, tool_id, job, start, end):
+        """确保工具脚本已缓存且未过期，返回 'cached'、'downloaded'，下载失败返回 None"""
+        repo_config = self._internal_config['repositories'][tool_id]
+        local_file = self.get_tool_cache_path(tool_id)
+        
+        # 检查缓存是否存在且有效
+        cache_valid = self.is_tool_cache_valid(tool_id)
+        self.telemetry.increment('cache.hits' if cache_valid else 'cache.misses')
+        if cache_valid:
+            days_old = (time.time() - os.path.getmtime(local_file)) / (24 * 60 * 60)
+            log_print(f"   ✓ 使用缓存: {repo_config['local_name']} (已缓存 {days_old:.1f} 天)")
+            return 'cached'
+        
+        # 缓存无效，下载新版本
+        log_print(f"   → 下载工具: {repo_config['local_name']}")
+        self.progress.publish(job, start, "正在下载工具...")
+        success = self.download_file_from_github(
+            repo_config['owner'],
+            repo_config['repo'],
+            repo_config['file_path'],
+            local_file,
+            progress_callback=self.download_progress(job, start, end, "正在下载工具...")
+        )
+        return 'downloaded' if success else None
+
+    def prefetch(self):
+        """预热缓存：下载前端文件和所有工具脚本，并检查安装依赖（不启动工具）"""
+        self.download_web_interface()
+        
+        tools = {}
+        repositories = self._internal_config['repositories']
+        for i, tool_id in enumerate(repositories):
+            start = i * 100 / len(repositories)
+            log_print(f"📦 预取: {self.tools[tool_id]['name']}")
+            state = self.fetch_tool(tool_id, 'prefetch', start, start + 50 / len(repositories))
+            if state and not self.check_and_install_dependencies(tool_id):
+                state = None
+            tools[tool_id] = state or 'failed'
+        self.progress.publish('prefetch', 100, "预取完成")
+        self.push_tool_status()
+        
+        failed = [tool_id for tool_id, state in tools.items() if state == 'failed']
+        return {
+            "success": not failed,
+            "message": f"预取失败: {', '.join(failed)}" if failed else "所有工具已预取",
+            "tools": tools
+        }
+
+    def spawn_tool(self, tool_id, local_file):
+        """在新进程中启动已准备好的工具"""
+        try:
+            repo_config = self._internal_config['repositories'][tool_id]
             
             # 启动工具（在新进程中）
             # 设置环境变量标记，防止子进程重新初始化 Eel
             env = os.environ.copy()
             env['_TOOL_LAUNCHER_SUBPROCESS'] = '1'
+            # 输出写入日志文件后跟随读取：统一 UTF-8 并关闭缓冲，保证输出及时到达
+            env['PYTHONIOENCODING'] = 'utf-8'
+            env['PYTHONUNBUFFERED'] = '1'
+            
+            # 注入线程预算（用户已显式设置的变量保持不变）
+            budget_config = self._internal_config['thread_budget']
+            threads = None
+            if budget_config['enabled']:
+                threads = self.scheduler.thread_budget(tool_id)
+                for name in THREAD_ENV_VARS:
+                    if name not in os.environ:
+                        env[name] = str(threads)
+                log_print(f"   → 线程预算: {threads} / {self.scheduler.capacity_cores} 核")
             
             # 使用 pythonw.exe 启动GUI工具，不显示控制台窗口
             python_cmd = self.get_pythonw_interpreter()
             log_print(f"   → 使用解释器: {python_cmd}")
             
-            process = subprocess.Popen(
-                [python_cmd, local_file],
-                env=env
-            )
+            # 输出直接写入文件（而不是启动器持有的管道），启动器退出后工具不受影响
+            log_files = self.output_capture.open_logs(tool_id)
+            try:
+                with self.telemetry.span('popen', tool_id=tool_id) as span:
+                    process = subprocess.Popen(
+                        [python_cmd, local_file],
+                        env=env,
+                        stdout=log_files[0],
+                        stderr=log_files[1],
+                        stdin=subprocess.DEVNULL
+                    )
+                    span["attributes"]["pid"] = process.pid
+            finally:
+                for log_file in log_files:
+                    log_file.close()
+            self.telemetry.increment('spawn.count')
+            self.output_capture.attach(tool_id, process, log_files)
+            
+            record = self.supervisor.register(tool_id, process, self.tools[tool_id]['name'], repo_config.get('policy'))
             
-            self.tool_processes[tool_id] = process
+            if threads and budget_config['pin_affinity'] and record["_ps"] is not None:
+                cpus = self.scheduler.pick_cpus(threads)
+                try:
+                    record["_ps"].cpu_affinity(cpus)
+                    record["cpus"] = cpus
+                    log_print(f"   → CPU 亲和性: {cpus}")
+                except Exception:
+                    pass  # 部分平台不支持设置亲和性
             
-            log_print(f"   ✓ 工具已启动: {self.tools[tool_id]['name']}")
+            log_print(f"   ✓ 工具已启动: {self.tools[tool_id]['name']} (PID {process.pid})")
             
-            try:
-                eel.updateProgress(100, "启动成功")
-            except:
-                pass
+            self.progress.publish(self.launch_job(tool_id), 100, "启动成功")
             
             return {"success": True, "message": f"{self.tools[tool_id]['name']} 已启动"}
             
@@ -745,59 +3675,10 @@ class EelToolLauncher:
             log_print(traceback.format_exc())
             return {"success": False, "message": error_msg}
 
+    @traced('update_all')
     def check_and_update_all(self):
-        """检查并更新所有工具和前端界面"""
-        try:
-            # 1. 更新前端文件
-            try:
-                eel.updateProgress(10, "正在更新前端界面...")
-            except:
-                pass  # Eel 未初始化时忽略
-            
-            web_config = self._internal_config.get('web_interface')
-            if web_config:
-                for file_info in web_config['files']:
-                    local_path = os.path.join(self.web_cache_dir, file_info['local'])
-                    success = self.download_file_from_github(
-                        web_config['owner'],
-                        web_config['repo'],
-                        file_info['path'],
-                        local_path
-                    )
-                    if not success:
-                        log_print(f"警告: 更新前端文件 {file_info['path']} 失败")
-            
-            # 2. 更新工具文件
-            total_tools = len(self._internal_config['repositories'])
-            
-            for i, (tool_id, repo_config) in enumerate(self._internal_config['repositories'].items()):
-                percent = 20 + (i / total_tools) * 80  # 20-100%
-                try:
-                    eel.updateProgress(percent, f"更新 {self.tools[tool_id]['name']}...")
-                except:
-                    pass  # Eel 未初始化时忽略
-                
-                local_file = os.path.join(self.cache_dir, repo_config['local_name'])
-                
-                success = self.download_file_from_github(
-                    repo_config['owner'],
-                    repo_config['repo'],
-                    repo_config['file_path'],
-                    local_file
-                )
-                
-                if not success:
-                    return {"success": False, "message": f"更新 {self.tools[tool_id]['name']} 失败"}
-            
-            try:
-                eel.updateProgress(100, "更新完成")
-            except:
-                pass  # Eel 未初始化时忽略
-            
-            return {"success": True, "message": "所有工具和界面已更新到最新版本"}
-            
-        except Exception as e:
-            return {"success": False, "message": f"更新失败: {str(e)}"}
+        """检查并更新所有工具和前端界面（构建新一代缓存后原子切换）"""
+        return self.update_cache_generation('update')
 
 
 # 全局 launcher 实例
@@ -810,6 +3691,24 @@ def get_tools_list():
     return launcher.get_tools_list()
 
 
+@eel.expose
+def get_tools_catalog(known_revisions=None):
+    """获取工具目录的增量更新"""
+    return launcher.get_tools_catalog(known_revisions)
+
+
+@eel.expose
+def get_launcher_status():
+    """批量获取所有工具的就绪状态"""
+    return launcher.get_launcher_status()
+
+
+@eel.expose
+def get_metrics():
+    """获取启动器指标与追踪记录"""
+    return launcher.get_metrics()
+
+
 @eel.expose
 def launch_tool(tool_id):
     """启动工具"""
@@ -818,7 +3717,7 @@ def launch_tool(tool_id):
 
 @eel.expose
 def check_for_updates():
-    """检查更新 - 清除缓存的工具文件"""
+    """检查更新 - 构建并切换到新一代缓存"""
     return launcher.check_for_updates()
 
 
@@ -828,6 +3727,214 @@ def check_and_update_all():
     return launcher.check_and_update_all()
 
 
+@eel.expose
+def rollback_update():
+    """回滚到上一次更新之前的缓存版本"""
+    return launcher.rollback_update()
+
+
+@eel.expose
+def get_process_table():
+    """获取运行中工具的进程表"""
+    return launcher.get_process_table()
+
+
+@eel.expose
+def terminate_tool_process(pid):
+    """终止工具进程"""
+    return launcher.terminate_tool_process(pid)
+
+
+@eel.expose
+def get_tool_output(pid, since=0):
+    """获取工具进程的最近输出"""
+    return launcher.get_tool_output(pid, since)
+
+
+@eel.expose
+def cancel_queued_launch(ticket):
+    """取消排队中的启动"""
+    return launcher.cancel_queued_launch(ticket)
+
+
+@eel.expose
+def consume_pending_intents():
+    """页面就绪：取走待处理的启动意图"""
+    return launcher.consume_pending_intents()
+
+
+def on_window_closed(page, sockets):
+    """窗口关闭回调（进程保持运行，等待单实例唤醒）"""
+    if launcher:
+        launcher.window_open = bool(sockets)
+    log_print("应用已关闭")
+
+
+# 无界面模式的退出码
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_UNAUTHORIZED = 3
+
+
+def parse_arguments(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="生产力工具整合")
+    parser.add_argument('--launch', metavar='TOOL_ID',
+                        help="启动指定工具（已有实例运行时转交给该实例）")
+    parser.add_argument('--new-instance', action='store_true',
+                        help="不转交给已运行的实例，强制启动新实例")
+    
+    headless = parser.add_argument_group("无界面模式（不打开窗口，执行完毕后退出）")
+    headless.add_argument('--headless', action='store_true',
+                          help="与 --launch 一起使用：在命令行中启动工具并等待其退出")
+    headless.add_argument('--prefetch', action='store_true',
+                          help="预取前端文件、所有工具和依赖")
+    headless.add_argument('--update-all', action='store_true',
+                          help="更新所有工具和前端文件（构建并切换到新一代缓存）")
+    headless.add_argument('--import-bundle', metavar='PATH',
+                          help="导入缓存包（新机器或离线机器预置缓存）")
+    headless.add_argument('--export-bundle', metavar='PATH',
+                          help="把当前缓存和依赖 wheel 导出为缓存包")
+    headless.add_argument('--serve-cache', metavar='PORT', type=int, nargs='?', const=8765,
+                          help="以局域网镜像方式公开本机缓存（默认端口 8765），供其他机器优先下载")
+    headless.add_argument('--serve-extra', metavar='DIR',
+                          help="与 --serve-cache 一起使用：同时公开目录中的文件（如 Tk 启动器的 exe）")
+    headless.add_argument('--serve-host', metavar='HOST', default='127.0.0.1',
+                          help="与 --serve-cache 一起使用：监听地址（默认只监听本机，公开到局域网需指定如 0.0.0.0）")
+    headless.add_argument('--status', action='store_true',
+                          help="输出各工具的就绪状态")
+    headless.add_argument('--json', action='store_true',
+                          help="与 --status 一起使用：以 JSON 输出")
+    
+    # 忽略未知参数（例如打包环境附加的参数）
+    args, _ = parser.parse_known_args(argv)
+    
+    # 预取、更新、缓存包、状态查询总是在无界面模式下执行
+    if args.prefetch or args.update_all or args.status or args.import_bundle or args.export_bundle \
+            or args.serve_cache:
+        args.headless = True
+    if args.json and not args.status:
+        parser.error("--json 需要与 --status 一起使用")
+    if args.serve_extra and not args.serve_cache:
+        parser.error("--serve-extra 需要与 --serve-cache 一起使用")
+    if args.serve_host != '127.0.0.1' and not args.serve_cache:
+        parser.error("--serve-host 需要与 --serve-cache 一起使用")
+    if args.headless and not (args.prefetch or args.update_all or args.status or args.launch
+                              or args.import_bundle or args.export_bundle or args.serve_cache):
+        parser.error("--headless 需要指定 --prefetch、--update-all、--launch、--import-bundle、"
+                     "--export-bundle、--serve-cache 或 --status")
+    return args
+
+
+def wait_for_headless_launch(tool_id):
+    """无界面模式启动工具并等待其退出，工具以退出码 0 结束时返回 EXIT_OK"""
+    result = launcher.launch_tool(tool_id)
+    log_print(f"{'✓' if result.get('success') else '✗'} {result.get('message')}")
+    if not result.get('success'):
+        return EXIT_FAILURE
+    
+    # 没有 Eel 主循环时由这里驱动进程采样和排队启动
+    launcher.supervisor.start()
+    try:
+        while launcher.supervisor.running or launcher.scheduler.queue:
+            eel.sleep(launcher.supervisor.interval)
+    except KeyboardInterrupt:
+        for pid in list(launcher.supervisor.running):
+            launcher.supervisor.terminate(pid)
+        return EXIT_FAILURE
+    
+    entry = next((entry for entry in launcher.supervisor.history if entry["tool_id"] == tool_id), None)
+    return EXIT_OK if entry and entry["exit_code"] == 0 else EXIT_FAILURE
+
+
+def print_launcher_status(as_json=False):
+    """把就绪状态输出到标准输出（日志仍输出到标准错误）"""
+    status = launcher.get_launcher_status()
+    if as_json:
+        print(json.dumps({
+            "machine_id": launcher.machine_id,
+            "generation": launcher.generations.describe(),
+            "tools": status
+        }, ensure_ascii=False, indent=2))
+        return
+    
+    print(f"缓存代: {launcher.generations.current}")
+    for tool_id, state in status.items():
+        age = f"{state['cache_age'] / 3600:.1f} 小时" if state['cache_age'] is not None else "-"
+        print(f"{'✓' if state['ready'] else '·'} {tool_id:<18} 缓存 {state['cache']:<7} ({age})  "
+              f"依赖 {state['dependencies']:<7}  运行中 {state['running']}")
+
+
+def run_headless(args):
+    """无界面模式：在同一个 EelToolLauncher 核心上执行预取、更新、启动、状态查询，不初始化 Eel"""
+    global launcher
+    
+    if getattr(sys, 'frozen', False) and sys.__stdout__ is not None:
+        # 打包版从控制台运行时恢复标准输出，日志同时输出到控制台
+        sys.stdout = sys.__stdout__
+        sys.stderr = sys.__stderr__
+        logging.getLogger().addHandler(logging.StreamHandler())
+    
+    try:
+        launcher = EelToolLauncher()
+    except DeviceNotAuthorizedError:
+        return EXIT_UNAUTHORIZED
+    launcher.headless = True
+    
+    if args.launch and args.launch not in launcher._internal_config['repositories']:
+        log_print(f"✗ 未知工具: {args.launch}（可用: {', '.join(launcher._internal_config['repositories'])}）")
+        return EXIT_USAGE
+    
+    # 按 导入 → 预取 → 更新 → 导出 → 启动 → 状态 → 镜像服务 的顺序执行，任何一步失败退出码为 1
+    exit_code = EXIT_OK
+    if args.import_bundle:
+        result = launcher.import_bundle(args.import_bundle)
+        if not result['success']:
+            exit_code = EXIT_FAILURE
+    if args.prefetch:
+        result = launcher.prefetch()
+        log_print(f"{'✓' if result['success'] else '✗'} {result['message']}")
+        if not result['success']:
+            exit_code = EXIT_FAILURE
+    if args.update_all:
+        result = launcher.check_and_update_all()
+        log_print(f"{'✓' if result['success'] else '✗'} {result['message']}")
+        if not result['success']:
+            exit_code = EXIT_FAILURE
+    if args.export_bundle:
+        result = launcher.export_bundle(args.export_bundle)
+        if not result['success']:
+            log_print(f"✗ {result['message']}")
+            exit_code = EXIT_FAILURE
+    if args.launch:
+        if wait_for_headless_launch(args.launch) != EXIT_OK:
+            exit_code = EXIT_FAILURE
+    if args.status:
+        print_launcher_status(args.json)
+    if args.serve_cache:
+        # 最后执行：前面的预取/更新/导入完成后再公开缓存
+        launcher.serve_cache(host=args.serve_host, port=args.serve_cache, extra_dir=args.serve_extra)
+    return exit_code
+
+
+# 界面使用固定端口：页面来源（origin）不变，localStorage 中的目录快照在重启后仍然可用
+UI_PORT = 27310
+UI_PORT_ATTEMPTS = 10
+
+
+def find_ui_port(preferred=UI_PORT, attempts=UI_PORT_ATTEMPTS):
+    """依次尝试固定端口段，都被占用时退回随机端口（0）"""
+    for port in range(preferred, preferred + attempts):
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind(('localhost', port))
+            return port
+        except OSError:
+            continue
+    return 0
+
+
 def main():
     """主函数"""
     global launcher
@@ -840,14 +3947,41 @@ def main():
         # 这是子进程，直接退出，不启动 Eel
         return
     
+    args = parse_arguments()
+    if args.headless:
+        # 无界面模式不占用单实例通道，也不初始化 Eel
+        sys.exit(run_headless(args))
+    
+    if args.launch:
+        intent = {"action": "launch", "tool_id": args.launch}
+    else:
+        intent = {"action": "focus"}
+    
+    # 单实例：已有实例运行时转交意图后立即退出
+    instance_channel = SingleInstanceChannel(get_app_data_dir())
+    if not args.new_instance and instance_channel.forward(intent):
+        if instance_channel.rejected:
+            notify_user("请求未执行", f"正在运行的实例拒绝了本次启动请求：{instance_channel.rejected}")
+        else:
+            log_print("✓ 已转交给正在运行的实例")
+        return
+    
     try:
+        # 尽早占用单实例通道，初始化期间的后续启动会立即得到应答并排队
+        instance_channel.listen()
+        
         log_print("="*60)
         log_print("生产力工具整合 - 正在初始化...")
         log_print("="*60)
         
         # 创建启动器实例
-        launcher = EelToolLauncher()
+        try:
+            launcher = EelToolLauncher()
+        except DeviceNotAuthorizedError:
+            sys.exit(1)
         log_print("✓ 启动器实例创建成功")
+        if args.launch:
+            launcher.pending_intents.append(intent)
         
         # 下载最新的前端界面文件（静默下载，不触发Eel调用）
         log_print("正在检查前端文件更新...")
@@ -865,6 +3999,21 @@ def main():
             log_print("✓ 使用本地前端文件")
         
         eel.init(web_dir)
+        launcher.supervisor.start()
+        
+        # 前端资源预载入内存，由自定义路由提供压缩、ETag 和长期缓存
+        launcher.assets = StaticAssetBundle(web_dir).load()
+        web_app = bottle.Bottle()
+        launcher.assets.register_routes(web_app)
+        
+        # 初始化期间转交来的启动请求在页面载入后执行（窗口随即打开，聚焦请求无需处理）
+        for message in instance_channel.attach(launcher.handle_instance_intent, launcher.dispatcher):
+            if message.get('action') == 'launch' and message.get('tool_id') in launcher.tools:
+                launcher.pending_intents.append(message)
+        
+        ui_port = find_ui_port()
+        if ui_port != UI_PORT:
+            log_print(f"⚠️ 界面端口 {UI_PORT} 被占用，改用 {ui_port or '随机端口'}（本次无法使用上次的目录快照）")
         
         log_print("="*60)
         log_print("🚀 正在启动应用...")
@@ -873,8 +4022,11 @@ def main():
         # 启动应用
         eel.start('index.html', 
                   size=(1280, 720), 
-                  port=0,
-                  close_callback=lambda page, sockets: log_print("应用已关闭"))
+                  port=ui_port,
+                  app=web_app,
+                  cmdline_args=[],        # 不禁用浏览器缓存，哈希资源可直接命中
+                  disable_cache=False,
+                  close_callback=on_window_closed)
                   
     except Exception as e:
         log_print(f"❌ 启动失败: {str(e)}")
@@ -1,8 +1,22 @@
 """
 调试字幕偏移逻辑
 模拟当前代码的执行流程
+
+基准测试：
+    python debug_subtitle_logic.py --bench --episodes 500 --cues 800 --fps 23.976,25,29.97 --missing 0.05
+生成合成剧集数据，运行偏移计算和流式合并，报告吞吐量（条/秒）、峰值内存，并与逐集循环的结果核对。
 """
 
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+import subtitle_engine
+
 def simulate_current_logic():
     """模拟当前代码逻辑"""
     print("=" * 70)
@@ -133,7 +147,168 @@ def simulate_correct_logic():
     print(f"{'='*70}\n")
 
 
+def generate_season(episodes=100, fps_mix=(23.976, 25.0, 29.97), cues_per_episode=600,
+                    missing_ratio=0.05, zero_frame_ratio=0.0, seed=0):
+    """生成合成剧集数据（字段同上面的模拟数据，另含字幕条数和条目间隔）"""
+    rng = random.Random(seed)
+    videos = []
+    for i in range(episodes):
+        fps = rng.choice(fps_mix)
+        duration = rng.uniform(20 * 60, 50 * 60)
+        frames = 0 if rng.random() < zero_frame_ratio else int(duration * fps)
+        has_subtitle = rng.random() >= missing_ratio
+        cue_count = max(1, int(cues_per_episode * rng.uniform(0.5, 1.5))) if has_subtitle else 0
+        videos.append({
+            "name": f"EP{i + 1:04d}.mp4",
+            "frames": frames,
+            "fps": fps,
+            "has_subtitle": has_subtitle,
+            "cue_count": cue_count,
+            "cue_spacing": int(duration * 1000 / (cue_count + 1)) if cue_count else 0
+        })
+    return videos
+
+
+def reference_offsets(videos):
+    """逐集循环计算偏移（与 simulate_current_logic 相同的规则），作为核对基准"""
+    cumulative_frames = 0
+    reference_fps = None
+    offsets = []
+    for video in videos:
+        if reference_fps is None and video["fps"] > 0:
+            reference_fps = video["fps"]
+        if video["has_subtitle"] and reference_fps and reference_fps > 0 and cumulative_frames > 0:
+            offsets.append(int((cumulative_frames * 1000.0) / reference_fps))
+        else:
+            offsets.append(0)
+        if video["frames"] > 0:
+            cumulative_frames += video["frames"]
+    return offsets
+
+
+def write_season_subtitles(videos, directory):
+    """把合成剧集的字幕写成 SRT 文件，返回 merge_srt_files 所需的剧集列表"""
+    episodes = []
+    for video in videos:
+        subtitle = None
+        if video["has_subtitle"]:
+            subtitle = os.path.join(directory, video["name"].replace('.mp4', '.srt'))
+            with open(subtitle, 'w', encoding='utf-8') as f:
+                for j in range(video["cue_count"]):
+                    start = (j + 1) * video["cue_spacing"]
+                    end = start + video["cue_spacing"] // 2
+                    f.write(f"{j + 1}\n{subtitle_engine.format_timestamp(start)} --> "
+                            f"{subtitle_engine.format_timestamp(end)}\n第 {j + 1} 句\n\n")
+        episodes.append({"subtitle": subtitle, "frames": video["frames"], "fps": video["fps"]})
+    return episodes
+
+
+def measure(func, *args):
+    """返回 (结果, 耗时秒, 峰值内存字节)
+
+    tracemalloc 会明显拖慢执行，所以先不跟踪内存计时，再单独跑一次测峰值内存。
+    """
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def verify_merged(output_path, videos, offsets):
+    """流式读取合并结果，逐条核对时间戳和序号，返回错误条数"""
+    expected = ((j + 1) * video["cue_spacing"] + offset
+                for video, offset in zip(videos, offsets)
+                for j in range(video["cue_count"]))
+    errors = 0
+    count = 0
+    for count, (cue, start) in enumerate(zip(subtitle_engine.read_srt_cues(output_path), expected), 1):
+        if cue.start != start:
+            errors += 1
+    total = sum(video["cue_count"] for video in videos)
+    return errors + abs(total - count)
+
+
+def run_benchmark(args):
+    """生成合成数据并测试偏移计算与流式合并"""
+    fps_mix = tuple(float(value) for value in args.fps.split(','))
+    videos = generate_season(args.episodes, fps_mix, args.cues, args.missing, args.zero_frames, args.seed)
+    total_cues = sum(video["cue_count"] for video in videos)
+    backend = "numpy" if subtitle_engine.np is not None else "python"
+
+    print("=" * 70)
+    print(f"字幕流水线基准测试（{backend}）")
+    print(f"  剧集: {len(videos)}  字幕条数: {total_cues}  帧率: {fps_mix}  缺字幕比例: {args.missing}")
+    print("=" * 70)
+
+    # 1. 偏移计算 + 时间戳平移
+    frames = [video["frames"] for video in videos]
+    fps = [video["fps"] for video in videos]
+    has_subtitle = [video["has_subtitle"] for video in videos]
+    cue_counts = [video["cue_count"] for video in videos]
+    starts = [(j + 1) * video["cue_spacing"] for video in videos for j in range(video["cue_count"])]
+    ends = [start + 1 for start in starts]
+
+    def offset_pass():
+        offsets, _ = subtitle_engine.compute_offsets(frames, fps, has_subtitle)
+        return offsets, subtitle_engine.shift_cues(starts, ends, cue_counts, offsets)
+
+    (offsets, shifted), best, peak = measure(offset_pass)
+    for _ in range(args.repeat - 1):
+        started = time.perf_counter()
+        offset_pass()
+        best = min(best, time.perf_counter() - started)
+    offsets = [int(offset) for offset in offsets]
+
+    expected = reference_offsets(videos)
+    offset_errors = sum(1 for a, b in zip(offsets, expected) if a != b)
+    print(f"\n偏移计算: {best * 1000:.2f} 毫秒  {total_cues / best:,.0f} 条/秒  峰值内存 {peak / 1024 / 1024:.1f} MB")
+    print(f"  核对: {'✅ 全部一致' if offset_errors == 0 else f'❌ {offset_errors} 集偏移不一致'}")
+
+    failed = offset_errors > 0
+
+    # 2. 流式合并
+    if not args.no_merge:
+        with tempfile.TemporaryDirectory() as directory:
+            episodes = write_season_subtitles(videos, directory)
+            output_path = os.path.join(directory, 'merged.srt')
+            (count, _), elapsed, peak = measure(
+                subtitle_engine.merge_srt_files, episodes, output_path)
+            merge_errors = verify_merged(output_path, videos, expected)
+
+        print(f"\n流式合并: {elapsed:.2f} 秒  {count / elapsed:,.0f} 条/秒  峰值内存 {peak / 1024 / 1024:.1f} MB")
+        print(f"  核对: {'✅ 全部一致' if merge_errors == 0 else f'❌ {merge_errors} 条时间戳不一致'}")
+        failed = failed or merge_errors > 0
+
+    print("=" * 70)
+    return 1 if failed else 0
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="字幕偏移逻辑调试与基准测试")
+    parser.add_argument('--bench', action='store_true', help="运行基准测试（默认运行逻辑模拟）")
+    parser.add_argument('--episodes', type=int, default=200, help="剧集数")
+    parser.add_argument('--cues', type=int, default=600, help="每集平均字幕条数")
+    parser.add_argument('--fps', default='23.976,25,29.97', help="帧率组合（逗号分隔）")
+    parser.add_argument('--missing', type=float, default=0.05, help="缺少字幕的剧集比例")
+    parser.add_argument('--zero-frames', type=float, default=0.0, help="帧数探测为 0 的剧集比例")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--repeat', type=int, default=5, help="偏移计算重复次数（取最快一次）")
+    parser.add_argument('--no-merge', action='store_true', help="跳过流式合并测试")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_arguments()
+    if args.bench:
+        sys.exit(run_benchmark(args))
+    
     simulate_current_logic()
     print("\n\n")
     simulate_correct_logic()
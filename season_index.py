@@ -0,0 +1,167 @@
+"""
+剧集文件夹的视频/字幕配对索引
+对整个目录树只做一次 os.scandir 遍历，按 季 + 集号（没有集号时按规范化文件名）把视频与字幕配对，
+之后查询"这一集有没有字幕"不再访问磁盘；配对结果可直接交给 subtitle_engine 计算偏移或合并。
+"""
+
+import os
+import re
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.m4v', '.ts', '.flv', '.wmv', '.webm')
+SUBTITLE_EXTENSIONS = ('.srt', '.ass', '.ssa', '.vtt', '.sub')
+
+# 字幕常见的语言后缀（文件名最后一段，如 EP01.chs.srt）
+LANGUAGE_TAGS = {
+    'zh', 'chi', 'chs', 'cht', 'sc', 'tc', 'gb', 'big5',
+    'zh-cn', 'zh-tw', 'zh-hk', 'zh-hans', 'zh-hant',
+    'en', 'eng', 'ja', 'jp', 'jpn', 'ko', 'kor',
+    'chs&eng', 'cht&eng', 'chs_eng', 'cht_eng',
+    '简体', '繁体', '简中', '繁中', '中文', '英文', '双语', '中英', '简英', '繁英'
+}
+
+# 字幕专用子文件夹，视为与上级目录同一季
+SUBTITLE_FOLDERS = {'subs', 'sub', 'subtitles', 'subtitle', '字幕'}
+
+# 同时包含季号和集号的规则，按优先级排列
+SEASON_EPISODE_PATTERNS = (
+    re.compile(r's(\d{1,2})[ ._-]*e(\d{1,4})(?!\d)'),          # S01E02
+    re.compile(r'(?<!\d)(\d{1,2})x(\d{1,3})(?!\d)'),            # 2x05（1920x1080 这类分辨率不匹配）
+)
+# 只有集号的规则（季号缺省为 1），按优先级排列
+EPISODE_PATTERNS = (
+    re.compile(r'第\s*(\d{1,4})\s*[集话話回]'),                  # 第02集
+    re.compile(r'(?<![a-z])(?:ep|e)[ ._-]?(\d{1,4})(?!\d)'),    # EP02 / E02
+    re.compile(r'\[(\d{1,4})\]'),                               # [02]
+)
+# 文件名里与集号无关的数字：分辨率、编码、年份
+NOISE_PATTERN = re.compile(r'\d{3,4}[pi]|[xh][ .]?26[45]|(?:19|20)\d{2}(?!\d)|\d+(?:\.\d+)?(?:fps|bit)')
+NUMBER_PATTERN = re.compile(r'(?<!\d)(\d{1,4})(?!\d)')
+SEPARATOR_PATTERN = re.compile(r'[\s._\-]+')
+
+
+def split_language(stem):
+    """拆出字幕文件名末尾的语言后缀，返回 (主干, 语言)"""
+    head, dot, tail = stem.rpartition('.')
+    if dot and tail.lower() in LANGUAGE_TAGS:
+        return head, tail.lower()
+    return stem, None
+
+
+def normalize_stem(stem):
+    """规范化文件名主干：小写、统一分隔符"""
+    return SEPARATOR_PATTERN.sub(' ', stem.lower()).strip()
+
+
+def parse_episode(stem):
+    """从文件名识别 (季, 集)，无法识别时返回 None（季缺省为 1）"""
+    text = stem.lower()
+    for pattern in SEASON_EPISODE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+    for pattern in EPISODE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return 1, int(match.group(1))
+
+    # 兜底：去掉分辨率/编码/年份后的最后一个数字
+    numbers = NUMBER_PATTERN.findall(NOISE_PATTERN.sub(' ', text))
+    if numbers:
+        return 1, int(numbers[-1])
+    return None
+
+
+def season_root(directory):
+    """字幕子文件夹归入上级目录"""
+    if os.path.basename(directory).lower() in SUBTITLE_FOLDERS:
+        return os.path.dirname(directory)
+    return directory
+
+
+class PairingIndex:
+    """视频/字幕配对索引（一次遍历建立，之后全部在内存中查询）"""
+
+    def __init__(self, root, recursive=True, preferred_languages=('chs', 'zh', 'sc', 'zh-cn', '简体', '中文')):
+        self.root = root
+        self.preferred_languages = preferred_languages
+        self.videos = []     # [(排序键, 路径, 配对键)]
+        self.subtitles = {}  # 配对键 -> [(路径, 语言)]
+        self.scanned_dirs = 0
+        self._scan(root, recursive)
+        self.videos.sort()
+
+    @staticmethod
+    def pairing_key(directory, stem):
+        episode = parse_episode(stem)
+        if episode is not None:
+            return (season_root(directory),) + episode
+        return season_root(directory), normalize_stem(stem)
+
+    def _scan(self, root, recursive):
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            self.scanned_dirs += 1
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                    continue
+                stem, extension = os.path.splitext(entry.name)
+                extension = extension.lower()
+                if extension in VIDEO_EXTENSIONS:
+                    key = self.pairing_key(directory, stem)
+                    sort_key = (key[0],) + ((key[1], key[2]) if len(key) == 3 else (0, 0)) + (entry.name.lower(),)
+                    self.videos.append((sort_key, entry.path, key))
+                elif extension in SUBTITLE_EXTENSIONS:
+                    base, language = split_language(stem)
+                    key = self.pairing_key(directory, base)
+                    self.subtitles.setdefault(key, []).append((entry.path, language))
+
+    def subtitles_for(self, video_key):
+        return self.subtitles.get(video_key, [])
+
+    def pick_subtitle(self, candidates, extensions=('.srt',)):
+        """在候选字幕中按 扩展名 → 首选语言 → 无语言后缀 的顺序挑选一个"""
+        candidates = [c for c in candidates if os.path.splitext(c[0])[1].lower() in extensions]
+        if not candidates:
+            return None
+
+        def rank(candidate):
+            path, language = candidate
+            if language in self.preferred_languages:
+                return 0, self.preferred_languages.index(language), path
+            return (1 if language is None else 2), 0, path
+
+        return min(candidates, key=rank)[0]
+
+    def episodes(self, extensions=('.srt',)):
+        """按 季/集 顺序返回剧集列表：video、subtitle（没有可用字幕时为 None）、season、episode"""
+        result = []
+        for _, path, key in self.videos:
+            result.append({
+                "video": path,
+                "subtitle": self.pick_subtitle(self.subtitles_for(key), extensions),
+                "season": key[1] if len(key) == 3 else None,
+                "episode": key[2] if len(key) == 3 else None
+            })
+        return result
+
+    def orphan_subtitles(self):
+        """没有对应视频的字幕文件"""
+        video_keys = {key for _, _, key in self.videos}
+        return [path for key, items in self.subtitles.items() if key not in video_keys for path, _ in items]
+
+    def build_merge_plan(self, probe_results, extensions=('.srt',)):
+        """结合视频探测结果（video_probe.probe_videos 的返回值）生成 merge_srt_files 所需的剧集列表"""
+        plan = []
+        for episode in self.episodes(extensions):
+            probe = probe_results.get(episode["video"], {})
+            plan.append(dict(episode, frames=probe.get("frames", 0), fps=probe.get("fps", 0.0),
+                             suspect=probe.get("suspect", True)))
+        return plan
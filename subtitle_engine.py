@@ -0,0 +1,541 @@
+"""
+字幕偏移批量计算引擎
+按剧集顺序把前面所有视频的帧数累加为偏移量，与 debug_subtitle_logic.py 中的逐集逻辑一致：
+- 参考帧率取第一个帧率大于 0 的视频，在此之前的剧集没有帧率信息，不做偏移
+- 缺少字幕的剧集同样累加帧数（只累加大于 0 的帧数）
+- 累积帧数为 0 的剧集（首集）不做偏移
+- offset_ms = int(累积帧数 * 1000 / 参考帧率)
+
+安装了 numpy 时使用前缀和向量化计算，否则退回逐集循环，两者结果完全相同。
+SRT 合并以生成器流水线逐条处理（解析 → 偏移 → 重新编号 → 写出），内存占用与剧集数和字幕条数无关。
+增量合并（IncrementalMerger）保存每集的状态，只重新解析变化的剧集，只重新生成偏移或序号变化的片段。
+整体平移单个大文件（shift_srt_file）时内存映射文件，直接改写定宽时间戳的数字，不解析字幕内容。
+"""
+
+import os
+import re
+import mmap
+import json
+import shutil
+import hashlib
+from collections import namedtuple
+from itertools import accumulate, chain
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # 未安装 numpy 时使用纯 Python 实现
+
+
+def find_reference_fps(fps_values):
+    """返回 (参考帧率, 所在下标)，没有有效帧率时返回 (None, None)"""
+    for index, fps in enumerate(fps_values):
+        if fps > 0:
+            return fps, index
+    return None, None
+
+
+def compute_offsets(frames, fps, has_subtitle):
+    """计算每一集字幕的偏移量
+
+    frames、fps、has_subtitle 为按剧集顺序排列的等长序列。
+    返回 (offsets_ms, applied)：offsets_ms 为每集的偏移毫秒数（不偏移的剧集为 0），
+    applied 标记该集是否实际应用了偏移。安装了 numpy 时返回数组，否则返回列表。
+    """
+    if np is not None:
+        return _compute_offsets_numpy(frames, fps, has_subtitle)
+    return _compute_offsets_python(frames, fps, has_subtitle)
+
+
+def _compute_offsets_numpy(frames, fps, has_subtitle):
+    frames = np.asarray(frames, dtype=np.float64)
+    fps = np.asarray(fps, dtype=np.float64)
+    has_subtitle = np.asarray(has_subtitle, dtype=bool)
+
+    count = len(frames)
+    offsets = np.zeros(count, dtype=np.int64)
+    applied = np.zeros(count, dtype=bool)
+
+    valid_fps = np.flatnonzero(fps > 0)
+    if count == 0 or len(valid_fps) == 0:
+        return offsets, applied
+    reference_index = valid_fps[0]
+    reference_fps = fps[reference_index]
+
+    # 每集开始前的累积帧数：帧数前缀和右移一位（只累加大于 0 的帧数）
+    cumulative = np.zeros(count, dtype=np.float64)
+    np.cumsum(np.where(frames > 0, frames, 0.0)[:-1], out=cumulative[1:])
+
+    applied = has_subtitle & (np.arange(count) >= reference_index) & (cumulative > 0)
+    # 偏移量非负，astype 的截断与 int() 一致
+    offsets[applied] = (cumulative[applied] * 1000.0 / reference_fps).astype(np.int64)
+    return offsets, applied
+
+
+def _compute_offsets_python(frames, fps, has_subtitle):
+    reference_fps, reference_index = find_reference_fps(fps)
+    cumulative = [0] + list(accumulate(f if f > 0 else 0 for f in frames))[:-1]
+
+    offsets = []
+    applied = []
+    for index, (cumulative_frames, subtitle) in enumerate(zip(cumulative, has_subtitle)):
+        apply = (bool(subtitle) and reference_fps is not None
+                 and index >= reference_index and cumulative_frames > 0)
+        offsets.append(int((cumulative_frames * 1000.0) / reference_fps) if apply else 0)
+        applied.append(apply)
+    return offsets, applied
+
+
+def shift_cues(starts, ends, cue_counts, offsets):
+    """一次性平移所有字幕条目的时间戳
+
+    starts、ends 为所有剧集字幕按顺序拼接后的开始/结束毫秒数，
+    cue_counts 为每集的字幕条数，offsets 为 compute_offsets 返回的每集偏移量。
+    返回平移后的 (starts, ends)。
+    """
+    if np is not None:
+        cue_offsets = np.repeat(np.asarray(offsets, dtype=np.int64), cue_counts)
+        return (np.asarray(starts, dtype=np.int64) + cue_offsets,
+                np.asarray(ends, dtype=np.int64) + cue_offsets)
+
+    cue_offsets = [offset for offset, count in zip(offsets, cue_counts) for _ in range(count)]
+    return ([start + offset for start, offset in zip(starts, cue_offsets)],
+            [end + offset for end, offset in zip(ends, cue_offsets)])
+
+
+def merge_offsets(episodes):
+    """按剧集字典列表计算偏移（字段同 debug_subtitle_logic.py：frames、fps、has_subtitle）
+
+    返回每集的偏移毫秒数列表，便于逐集处理的调用方直接使用。
+    """
+    offsets, _ = compute_offsets(
+        [episode["frames"] for episode in episodes],
+        [episode["fps"] for episode in episodes],
+        [episode["has_subtitle"] for episode in episodes]
+    )
+    return [int(offset) for offset in offsets]
+
+
+# ---------------------------------------------------------------------------
+# 流式 SRT 合并
+# ---------------------------------------------------------------------------
+
+SrtCue = namedtuple('SrtCue', ['start', 'end', 'lines', 'settings'])
+
+TIMING_PATTERN = re.compile(
+    r'(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})(.*)'
+)
+
+
+def parse_timestamp(hours, minutes, seconds, millis):
+    """时间戳各字段转为毫秒（毫秒字段不足三位时按小数补齐，如 ",5" 为 500 毫秒）"""
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, '0'))
+
+
+def format_timestamp(ms):
+    """毫秒转为 SRT 时间戳 HH:MM:SS,mmm"""
+    ms = max(0, int(ms))
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+def iter_srt_cues(lines):
+    """从逐行迭代的 SRT 内容中惰性解析字幕条目（缺少时间轴的块直接跳过）"""
+    timing = None
+    text = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            if timing is not None:
+                yield SrtCue(timing[0], timing[1], text, timing[2])
+            timing = None
+            text = []
+            continue
+
+        if timing is None:
+            match = TIMING_PATTERN.search(line)
+            if match:
+                groups = match.groups()
+                timing = (parse_timestamp(*groups[0:4]), parse_timestamp(*groups[4:8]), groups[8])
+            # 序号行或无法识别的行忽略
+            continue
+        text.append(line)
+
+    if timing is not None:
+        yield SrtCue(timing[0], timing[1], text, timing[2])
+
+
+def read_srt_cues(path, encoding='utf-8-sig'):
+    """逐行读取 SRT 文件并产出字幕条目（文件读完即关闭）"""
+    with open(path, 'r', encoding=encoding, errors='replace') as f:
+        yield from iter_srt_cues(f)
+
+
+def offset_cues(cues, offset_ms):
+    """把字幕条目整体平移 offset_ms 毫秒"""
+    if not offset_ms:
+        return cues
+    return (cue._replace(start=cue.start + offset_ms, end=cue.end + offset_ms) for cue in cues)
+
+
+def write_srt(cues, out, first_index=1):
+    """把字幕条目写入已打开的文本文件，序号从 first_index 开始重新编号，返回写出的条数"""
+    count = first_index - 1
+    for count, cue in enumerate(cues, first_index):
+        header = f"{count}\n{format_timestamp(cue.start)} --> {format_timestamp(cue.end)}{cue.settings}\n"
+        out.write(header + ''.join(line + '\n' for line in cue.lines) + '\n')
+    return count - first_index + 1
+
+
+def merge_srt_files(episodes, output_path, encoding='utf-8-sig', output_encoding='utf-8'):
+    """按剧集顺序合并字幕文件
+
+    episodes 为剧集字典列表：subtitle（字幕路径，缺少字幕时为 None）、frames、fps。
+    偏移量由 compute_offsets 一次算出，字幕逐条流式解析、平移、编号后写出，
+    先写入临时文件，完成后再替换目标文件。返回 (写出的字幕条数, 每集偏移毫秒数)。
+    """
+    offsets, _ = compute_offsets(
+        [episode["frames"] for episode in episodes],
+        [episode["fps"] for episode in episodes],
+        [episode.get("subtitle") is not None for episode in episodes]
+    )
+    offsets = [int(offset) for offset in offsets]
+
+    cues = chain.from_iterable(
+        offset_cues(read_srt_cues(episode["subtitle"], encoding), offset)
+        for episode, offset in zip(episodes, offsets)
+        if episode.get("subtitle") is not None
+    )
+
+    temp_path = output_path + '.part'
+    with open(temp_path, 'w', encoding=output_encoding, newline='\r\n') as out:
+        count = write_srt(cues, out)
+    os.replace(temp_path, output_path)
+    return count, offsets
+
+
+# ---------------------------------------------------------------------------
+# 内存映射原地平移
+# ---------------------------------------------------------------------------
+
+# 定宽时间戳 HH:MM:SS,mmm 中数字所在的字节位置，以及每位数字对应的毫秒权重
+TIMESTAMP_DIGITS = (0, 1, 3, 4, 6, 7, 9, 10, 11)
+DIGIT_WEIGHTS = (36000000, 3600000, 600000, 60000, 10000, 1000, 100, 10, 1)
+FIXED_TIMESTAMP_PATTERN = re.compile(rb'[0-9]{2}:[0-9]{2}:[0-9]{2}[,.][0-9]{3}')
+# 定宽时间戳能表示的上限（99:59:59,999）
+MAX_FIXED_TIMESTAMP = 100 * 3600 * 1000 - 1
+SCAN_CHUNK = 64 * 1024 * 1024
+SHIFT_CHUNK = 1 << 20
+
+
+class FixedWidthError(Exception):
+    """文件中有非定宽时间戳，或平移后超出定宽范围（小于 0 或超过 99:59:59,999）"""
+
+
+def _encode_fixed_timestamp(ms):
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return b'%02d:%02d:%02d' % (hours, minutes, seconds), b'%03d' % millis
+
+
+def _shift_buffer_python(buffer, offset_ms):
+    """逐个时间轴箭头定位两侧时间戳并计算新值（全部校验通过后才写回）"""
+    updates = []
+    arrow = buffer.find(b'-->')
+    while arrow != -1:
+        start = arrow - 13 if buffer[arrow - 1:arrow] == b' ' else arrow - 12
+        end = arrow + 4 if buffer[arrow + 3:arrow + 4] == b' ' else arrow + 3
+        for position in (start, end):
+            if (position < 0 or not FIXED_TIMESTAMP_PATTERN.fullmatch(buffer, position, position + 12)
+                    or buffer[max(position - 1, 0):position].isdigit()
+                    or buffer[position + 12:position + 13].isdigit()):
+                raise FixedWidthError(position)
+            text = buffer[position:position + 12]
+            ms = (((int(text[0:2]) * 60 + int(text[3:5])) * 60 + int(text[6:8])) * 1000
+                  + int(text[9:12]) + offset_ms)
+            if ms < 0 or ms > MAX_FIXED_TIMESTAMP:
+                raise FixedWidthError(ms)
+            updates.append((position, _encode_fixed_timestamp(ms)))
+        arrow = buffer.find(b'-->', arrow + 3)
+
+    for position, (clock, millis) in updates:
+        buffer[position:position + 8] = clock
+        buffer[position + 9:position + 12] = millis
+    return len(updates)
+
+
+def _find_timestamps_numpy(data):
+    """向量化定位所有时间轴箭头两侧的时间戳起点（先找较少出现的 '>'，再核对前两个字节）"""
+    candidates = [np.flatnonzero(data[start:start + SCAN_CHUNK] == 0x3e) + start
+                  for start in range(0, len(data), SCAN_CHUNK)]
+    candidates = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+    candidates = candidates[candidates >= 2]
+    arrows = candidates[(data[candidates - 1] == 0x2d) & (data[candidates - 2] == 0x2d)] - 2
+
+    positions = np.empty(len(arrows) * 2, dtype=np.int64)
+    positions[0::2] = arrows - 12 - (data[np.maximum(arrows - 1, 0)] == 0x20)
+    positions[1::2] = arrows + 3 + (data[np.minimum(arrows + 3, len(data) - 1)] == 0x20)
+    if len(positions) and (positions.min() < 0 or positions.max() + 12 > len(data)):
+        raise FixedWidthError("时间轴位于文件边界")
+    return positions
+
+
+def _shift_buffer_numpy(buffer, offset_ms):
+    """批量校验、解析和改写时间戳数字，全部为数组运算"""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    rows = None
+    try:
+        positions = _find_timestamps_numpy(data)
+        if len(positions) == 0:
+            return 0
+
+        # 每个字节起始的 12 字节窗口视图，按行取出/写回整个时间戳
+        rows = np.lib.stride_tricks.as_strided(data, shape=(len(data) - 11, 12), strides=(1, 1))
+        digit_columns = list(TIMESTAMP_DIGITS)
+        shifted = np.empty((len(positions), 12), dtype=np.uint8)
+
+        # 分块校验并计算新数字，全部通过后才写回，失败时文件保持原样
+        for start in range(0, len(positions), SHIFT_CHUNK):
+            chunk_positions = positions[start:start + SHIFT_CHUNK]
+            block = rows[chunk_positions]
+            digits = block[:, digit_columns].astype(np.int64) - 48
+            before = data[np.maximum(chunk_positions - 1, 0)]
+            after = data[np.minimum(chunk_positions + 12, len(data) - 1)]
+            valid = (((digits >= 0) & (digits <= 9)).all(axis=1)
+                     & (block[:, 2] == 0x3a) & (block[:, 5] == 0x3a)
+                     & ((block[:, 8] == 0x2c) | (block[:, 8] == 0x2e))
+                     & ((chunk_positions == 0) | (before < 0x30) | (before > 0x39))
+                     & ((chunk_positions + 12 == len(data)) | (after < 0x30) | (after > 0x39)))
+            if not valid.all():
+                raise FixedWidthError("存在非定宽时间戳")
+
+            # 整数矩阵乘法没有 BLAS 加速，逐列累加更快
+            ms = np.full(len(chunk_positions), offset_ms, dtype=np.int64)
+            for column, weight in enumerate(DIGIT_WEIGHTS):
+                ms += digits[:, column] * weight
+            if ms.min() < 0 or ms.max() > MAX_FIXED_TIMESTAMP:
+                raise FixedWidthError(int(ms.min() if ms.min() < 0 else ms.max()))
+            hours, rest = np.divmod(ms, 3600000)
+            minutes, rest = np.divmod(rest, 60000)
+            seconds, millis = np.divmod(rest, 1000)
+            chunk = shifted[start:start + SHIFT_CHUNK]
+            chunk[:] = block  # 保留分隔符（: 和 , 或 .）
+            chunk[:, 0], chunk[:, 1] = np.divmod(hours, 10)
+            chunk[:, 3], chunk[:, 4] = np.divmod(minutes, 10)
+            chunk[:, 6], chunk[:, 7] = np.divmod(seconds, 10)
+            chunk[:, 9], rest = np.divmod(millis, 100)
+            chunk[:, 10], chunk[:, 11] = np.divmod(rest, 10)
+            chunk[:, digit_columns] += 48
+
+        for start in range(0, len(positions), SHIFT_CHUNK):
+            rows[positions[start:start + SHIFT_CHUNK]] = shifted[start:start + SHIFT_CHUNK]
+        return len(positions)
+    finally:
+        # 释放对映射内存的引用，否则无法关闭 mmap
+        del data, rows
+
+
+def shift_srt_file(path, offset_ms, output_path=None, encoding='utf-8-sig'):
+    """把整个 SRT 文件的时间戳平移 offset_ms 毫秒
+
+    output_path 为空时原地改写，否则先复制到 output_path 再改写副本。
+    文件被内存映射，时间戳数字直接按字节改写，不解析字幕文本；
+    存在非定宽时间戳或平移后超出定宽范围时，退回完整解析（流式解析 → 平移 → 重新编号写出）。
+    返回 {"timestamps": 改写的时间戳个数, "fallback": 是否退回完整解析}。
+    """
+    target = output_path or path
+    if output_path and os.path.abspath(output_path) != os.path.abspath(path):
+        shutil.copyfile(path, output_path)
+    if not offset_ms or os.path.getsize(target) == 0:
+        return {"timestamps": 0, "fallback": False}
+
+    try:
+        with open(target, 'r+b') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as buffer:
+                if np is not None:
+                    count = _shift_buffer_numpy(buffer, offset_ms)
+                else:
+                    count = _shift_buffer_python(buffer, offset_ms)
+                buffer.flush()
+        return {"timestamps": count, "fallback": False}
+    except FixedWidthError:
+        pass
+
+    # 不是定宽格式或定宽放不下：读原始文件完整解析后写出（负时间戳按 0 处理）
+    temp_path = target + '.part'
+    with open(temp_path, 'w', encoding='utf-8', newline='\r\n') as out:
+        count = write_srt(offset_cues(read_srt_cues(path, encoding), offset_ms), out)
+    os.replace(temp_path, target)
+    return {"timestamps": count * 2, "fallback": True}
+
+
+# ---------------------------------------------------------------------------
+# 增量合并
+# ---------------------------------------------------------------------------
+
+class IncrementalMerger:
+    """增量字幕合并
+
+    状态目录（默认为 输出文件名 + '.merge'）中保存每集的帧数、字幕文件指纹、解析后的字幕块，
+    以及按 (偏移, 起始序号) 生成好的片段。再次合并时：
+    - 字幕文件大小/修改时间未变则不重新读取，内容哈希未变则不重新解析
+    - 偏移和起始序号由帧数、字幕条数的前缀和得出
+    - 只有偏移或起始序号变化的剧集才重新生成片段，其余片段原样拼接到输出文件
+    - 字幕文件在计划之后被删除或改名时按缺少字幕处理（帧数照常累加），记录在统计的 missing 中
+    """
+
+    STATE_VERSION = 1
+
+    def __init__(self, output_path, state_dir=None, encoding='utf-8-sig', output_encoding='utf-8'):
+        self.output_path = output_path
+        self.state_dir = state_dir or output_path + '.merge'
+        self.state_file = os.path.join(self.state_dir, 'state.json')
+        self.encoding = encoding
+        self.output_encoding = output_encoding
+        self.episodes = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("version") == self.STATE_VERSION:
+                return state["episodes"]
+        except Exception:
+            pass
+        return []
+
+    def _save_state(self):
+        temp_file = self.state_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.STATE_VERSION, "episodes": self.episodes}, f, ensure_ascii=False)
+        os.replace(temp_file, self.state_file)
+
+    def _path(self, name):
+        return os.path.join(self.state_dir, name)
+
+    @staticmethod
+    def _file_hash(path):
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+        return sha1.hexdigest()
+
+    def _refresh_block(self, subtitle, previous, stats):
+        """检查字幕文件是否变化，变化时重新解析并保存字幕块，返回本集的新状态"""
+        entry = {"subtitle": subtitle, "size": None, "mtime": None, "hash": None, "cue_count": 0}
+        if subtitle is None:
+            return entry
+
+        try:
+            stat = os.stat(subtitle)
+        except OSError as e:
+            return self._missing(entry, e, stats)
+        entry.update(size=stat.st_size, mtime=stat.st_mtime)
+        unchanged = previous is not None and os.path.exists(self._path(f"block-{previous['hash']}.json"))
+        if unchanged and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime:
+            entry.update(hash=previous["hash"], cue_count=previous["cue_count"])
+            return entry
+
+        try:
+            entry["hash"] = self._file_hash(subtitle)
+            if unchanged and entry["hash"] == previous["hash"]:
+                entry["cue_count"] = previous["cue_count"]
+                return entry
+
+            # 只有这一集重新解析，字幕块按内容哈希保存（本集时间，未偏移）
+            block = [[cue.start, cue.end, cue.settings, cue.lines] for cue in read_srt_cues(subtitle, self.encoding)]
+        except OSError as e:
+            return self._missing(entry, e, stats)
+        with open(self._path(f"block-{entry['hash']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(block, f, ensure_ascii=False)
+        entry["cue_count"] = len(block)
+        stats["reparsed"] += 1
+        return entry
+
+    @staticmethod
+    def _missing(entry, error, stats):
+        """字幕文件读取失败：本集按缺少字幕处理"""
+        stats["missing"].append({"subtitle": entry["subtitle"], "error": str(error)})
+        return dict(entry, subtitle=None)
+
+    def _render_segment(self, index, entry):
+        """按本集的偏移和起始序号生成输出片段"""
+        with open(self._path(f"block-{entry['hash']}.json"), 'r', encoding='utf-8') as f:
+            block = json.load(f)
+        cues = (SrtCue(start + entry["offset"], end + entry["offset"], lines, settings)
+                for start, end, settings, lines in block)
+        with open(self._path(f"segment-{index}.srt"), 'w', encoding=self.output_encoding, newline='\r\n') as out:
+            write_srt(cues, out, entry["first_index"])
+
+    def merge(self, episodes):
+        """合并（或增量更新）字幕，episodes 格式同 merge_srt_files
+
+        返回统计信息：cues（总条数）、reparsed（重新解析的集数）、rendered（重新生成的片段数）、reused（复用的片段数）、
+        missing（读取失败、按缺少字幕处理的字幕文件及错误）。
+        """
+        os.makedirs(self.state_dir, exist_ok=True)
+        previous = self.episodes
+        stats = {"cues": 0, "reparsed": 0, "rendered": 0, "reused": 0, "missing": []}
+
+        # 字幕块按字幕路径查找（插入或删除剧集后仍可复用）
+        previous_by_subtitle = {entry["subtitle"]: entry for entry in previous if entry["subtitle"] is not None}
+        current = []
+        for index, episode in enumerate(episodes):
+            subtitle = episode.get("subtitle")
+            entry = self._refresh_block(subtitle, previous_by_subtitle.get(subtitle), stats)
+            entry["frames"] = episode["frames"] if episode["frames"] > 0 else 0
+            entry["fps"] = episode["fps"]
+            current.append(entry)
+
+        reference_fps, reference_index = find_reference_fps([entry["fps"] for entry in current])
+        frames_before = [0, *accumulate(entry["frames"] for entry in current)]
+        cues_before = [0, *accumulate(entry["cue_count"] for entry in current)]
+        for index, entry in enumerate(current):
+            old = previous[index] if index < len(previous) else None
+            cumulative_frames = frames_before[index]
+            apply = (entry["subtitle"] is not None and reference_fps is not None
+                     and index >= reference_index and cumulative_frames > 0)
+            entry["offset"] = int((cumulative_frames * 1000.0) / reference_fps) if apply else 0
+            entry["first_index"] = cues_before[index] + 1
+            stats["cues"] += entry["cue_count"]
+
+            if entry["subtitle"] is None:
+                continue
+            reusable = (old and old.get("rendered") and old["hash"] == entry["hash"]
+                        and old["offset"] == entry["offset"] and old["first_index"] == entry["first_index"]
+                        and os.path.exists(self._path(f"segment-{index}.srt")))
+            if not reusable:
+                self._render_segment(index, entry)
+                stats["rendered"] += 1
+            else:
+                stats["reused"] += 1
+            entry["rendered"] = True
+
+        # 片段按字节原样拼接，不再逐条解析
+        temp_path = self.output_path + '.part'
+        with open(temp_path, 'wb') as out:
+            for index, entry in enumerate(current):
+                if entry["subtitle"] is not None:
+                    with open(self._path(f"segment-{index}.srt"), 'rb') as segment:
+                        shutil.copyfileobj(segment, out, 1024 * 1024)
+        os.replace(temp_path, self.output_path)
+
+        self.episodes = current
+        self._save_state()
+        self._remove_stale_files(current)
+        return stats
+
+    def _remove_stale_files(self, current):
+        """删除不再引用的字幕块和片段"""
+        blocks = {f"block-{entry['hash']}.json" for entry in current if entry["hash"]}
+        segments = {f"segment-{index}.srt" for index, entry in enumerate(current) if entry["subtitle"] is not None}
+        for name in os.listdir(self.state_dir):
+            if (name.startswith('block-') and name not in blocks) or (name.startswith('segment-') and name not in segments):
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
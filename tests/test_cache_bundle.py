@@ -0,0 +1,38 @@
+import os
+
+import app
+
+
+def make_launcher(monkeypatch, root, week):
+    monkeypatch.setattr(app, 'get_cache_base_dir', lambda: str(root / 'temp'))
+    monkeypatch.setattr(app, 'get_app_data_dir', lambda: str(root / 'data'))
+    monkeypatch.setattr(app.EelToolLauncher, 'get_machine_id', lambda self: 'machine')
+    monkeypatch.setattr(app.EelToolLauncher, 'get_week_identifier', lambda self: week)
+    monkeypatch.setattr(app.EelToolLauncher, 'verify_device_authorization', lambda self: True)
+    return app.EelToolLauncher()
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_imported_bundle_survives_the_next_cache_dir(monkeypatch, tmp_path):
+    source = make_launcher(monkeypatch, tmp_path / 'source', '2026-W42')
+    expected = {}
+    for key, path in source.artifact_paths().items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(f"# {key}\n".encode('utf-8'))
+        expected[key] = read(path)
+    bundle = str(tmp_path / 'cache.zip')
+    assert source.export_bundle(bundle, include_wheels=False)['success']
+
+    # 离线机器导入缓存包，下周启动时缓存目录更换，工具从内容仓库恢复而不是重新下载
+    target = make_launcher(monkeypatch, tmp_path / 'target', '2026-W42')
+    assert target.import_bundle(bundle)['success']
+    next_week = make_launcher(monkeypatch, tmp_path / 'target', '2026-W43')
+    assert next_week.cache_dir != target.cache_dir
+    assert {key: read(path) for key, path in next_week.artifact_paths().items()} == expected
+    for key in expected:
+        assert next_week.content_store.lookup(key)
@@ -0,0 +1,117 @@
+import os
+
+import app
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_build_commit_rollback_and_prune(tmp_path):
+    generations = app.CacheGenerations(str(tmp_path))
+    assert generations.current == 'gen-1' and generations.previous is None
+    write(os.path.join(generations.active_dir, 'tool.py'), 'v1')
+    write(os.path.join(generations.active_dir, 'web', 'index.html'), 'page')
+
+    # 新一代预置当前代的文件；下载用 os.replace 替换，不会改到当前代
+    staging = generations.begin()
+    write(os.path.join(generations.path(staging), 'tool.py.part'), 'v2')
+    os.replace(os.path.join(generations.path(staging), 'tool.py.part'), os.path.join(generations.path(staging), 'tool.py'))
+    assert read(os.path.join(generations.path(staging), 'web', 'index.html')) == 'page'
+    assert read(os.path.join(generations.active_dir, 'tool.py')) == 'v1'
+
+    generations.commit(staging)
+    assert (generations.current, generations.previous) == ('gen-2', 'gen-1')
+    assert read(os.path.join(generations.active_dir, 'tool.py')) == 'v2'
+
+    # 指针持久化：重新打开时仍指向新一代
+    reopened = app.CacheGenerations(str(tmp_path))
+    assert (reopened.current, reopened.previous) == ('gen-2', 'gen-1')
+
+    assert reopened.rollback()
+    assert read(os.path.join(reopened.active_dir, 'tool.py')) == 'v1'
+    assert reopened.rollback()  # 可以再滚回来
+    assert reopened.current == 'gen-2'
+
+    third = reopened.begin()
+    reopened.commit(third)
+    assert reopened.generation_numbers() == [2, 3]
+
+
+def test_discarded_and_interrupted_builds_are_removed(tmp_path):
+    generations = app.CacheGenerations(str(tmp_path))
+    failed = generations.begin()
+    generations.discard(failed)
+    assert not os.path.exists(generations.path(failed))
+
+    interrupted = generations.begin()
+    reopened = app.CacheGenerations(str(tmp_path))
+    assert not os.path.exists(reopened.path(interrupted))
+    assert reopened.current == 'gen-1'
+
+
+def test_legacy_layout_is_adopted_into_first_generation(tmp_path):
+    write(str(tmp_path / 'tool.py'), 'legacy')
+    write(str(tmp_path / 'web' / 'index.html'), 'legacy page')
+    os.utime(tmp_path / 'tool.py', (1000000, 1000000))
+    write(str(tmp_path / 'notes.txt'), 'not ours')
+
+    generations = app.CacheGenerations(str(tmp_path))
+
+    adopted_tool = os.path.join(generations.active_dir, 'tool.py')
+    assert read(adopted_tool) == 'legacy'
+    assert os.path.getmtime(adopted_tool) == 1000000  # 缓存年龄不变，不会触发重新下载
+    assert read(os.path.join(generations.active_dir, 'web', 'index.html')) == 'legacy page'
+    assert sorted(os.listdir(tmp_path)) == ['generations', 'notes.txt']
+
+
+def test_leftover_legacy_copy_is_deleted_without_overwriting(tmp_path):
+    generations = app.CacheGenerations(str(tmp_path))
+    write(os.path.join(generations.active_dir, 'tool.py'), 'current')
+    write(str(tmp_path / 'tool.py'), 'stale')
+
+    app.CacheGenerations(str(tmp_path))
+
+    assert read(os.path.join(generations.active_dir, 'tool.py')) == 'current'
+    assert not (tmp_path / 'tool.py').exists()
+
+
+def make_launcher(monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'get_cache_base_dir', lambda: str(tmp_path / 'temp'))
+    monkeypatch.setattr(app, 'get_app_data_dir', lambda: str(tmp_path / 'data'))
+    monkeypatch.setattr(app.EelToolLauncher, 'get_machine_id', lambda self: 'machine')
+    monkeypatch.setattr(app.EelToolLauncher, 'verify_device_authorization', lambda self: True)
+    return app.EelToolLauncher()
+
+
+def test_cache_dir_and_pointer_survive_restart(monkeypatch, tmp_path):
+    first = make_launcher(monkeypatch, tmp_path)
+    write(os.path.join(first.generations.active_dir, 'tool.py'), 'v1')
+    staging = first.generations.begin()
+    write(os.path.join(first.generations.path(staging), 'tool.py'), 'v2')
+    first.generations.commit(staging)
+
+    second = make_launcher(monkeypatch, tmp_path)
+    assert second.cache_dir == first.cache_dir
+    assert (second.generations.current, second.generations.previous) == ('gen-2', 'gen-1')
+    assert read(os.path.join(second.generations.active_dir, 'tool.py')) == 'v2'
+    assert second.generations.rollback()
+
+
+def test_same_week_random_suffix_dir_is_reused(monkeypatch, tmp_path):
+    week = app.EelToolLauncher.get_week_identifier(None)
+    legacy = tmp_path / 'temp' / f'.machine_{week}_0a1b2c3d'
+    write(str(legacy / 'tool.py'), 'v1')
+    write(str(tmp_path / 'temp' / '.machine_2000-W01_ffffffff' / 'tool.py'), 'old')
+
+    launcher = make_launcher(monkeypatch, tmp_path)
+    assert os.path.basename(launcher.cache_dir) == f'.machine_{week}'
+    assert read(os.path.join(launcher.generations.active_dir, 'tool.py')) == 'v1'
+    assert sorted(os.listdir(tmp_path / 'temp')) == [f'.machine_{week}']
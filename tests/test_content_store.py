@@ -0,0 +1,159 @@
+import hashlib
+import os
+import time
+import types
+
+import app
+
+
+def sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_put_lookup_and_materialize_survive_restart(tmp_path):
+    store = app.ContentStore(str(tmp_path / 'store'))
+    source = str(tmp_path / 'gen-1' / 'tool.py')
+    write(source, b'v1')
+    store.put('github/o/r/tool.py', source, sha(b'v1'), etag='"abc"')
+
+    reopened = app.ContentStore(str(tmp_path / 'store'))
+    entry = reopened.lookup('github/o/r/tool.py')
+    assert (entry['sha256'], entry['size'], entry['etag']) == (sha(b'v1'), 2, '"abc"')
+    assert reopened.lookup('github/o/r/other.py') is None
+
+    # 新一代缓存目录从仓库恢复；原文件被替换也不影响仓库中的内容
+    target = str(tmp_path / 'gen-2' / 'tool.py')
+    assert reopened.materialize('github/o/r/tool.py', target)
+    write(source + '.part', b'v2')
+    os.replace(source + '.part', source)
+    assert read(target) == b'v1'
+    assert read(reopened.blob_path(sha(b'v1'))) == b'v1'
+
+
+def test_materialize_keeps_or_resets_cache_age(tmp_path):
+    store = app.ContentStore(str(tmp_path / 'store'))
+    source = str(tmp_path / 'tool.py')
+    write(source, b'v1')
+    store.put('k', source, sha(b'v1'))
+    validated_at = time.time() - 3 * 24 * 60 * 60
+    store.index['k']['validated_at'] = validated_at
+
+    # 跨周恢复保留上次验证时间，缓存年龄不被重置
+    carried = str(tmp_path / 'carried.py')
+    assert store.materialize('k', carried, keep_validated_time=True)
+    assert abs(os.path.getmtime(carried) - validated_at) < 1
+
+    fresh = str(tmp_path / 'fresh.py')
+    assert store.materialize('k', fresh)
+    assert time.time() - os.path.getmtime(fresh) < 60
+
+    store.touch('k')
+    assert time.time() - store.index['k']['validated_at'] < 60
+    assert time.time() - app.ContentStore(str(tmp_path / 'store')).index['k']['validated_at'] < 60
+
+
+def test_missing_or_truncated_blob_is_not_used(tmp_path):
+    store = app.ContentStore(str(tmp_path / 'store'))
+    source = str(tmp_path / 'tool.py')
+    write(source, b'v1')
+    store.put('k', source, sha(b'v1'))
+    os.remove(source)  # 仓库中的内容是硬链接或副本，不受影响
+    assert store.lookup('k')
+
+    write(store.blob_path(sha(b'v1')), b'v')
+    assert store.lookup('k') is None
+    assert not store.materialize('k', str(tmp_path / 'out.py'))
+    os.remove(store.blob_path(sha(b'v1')))
+    assert store.lookup('k') is None
+
+
+def test_prune_drops_expired_entries_and_unreferenced_blobs(tmp_path):
+    root = str(tmp_path / 'store')
+    store = app.ContentStore(root, max_age=60)
+    write(str(tmp_path / 'a'), b'shared')
+    write(str(tmp_path / 'b'), b'old')
+    store.put('fresh', str(tmp_path / 'a'), sha(b'shared'))
+    store.put('stale-shared', str(tmp_path / 'a'), sha(b'shared'))
+    store.put('stale', str(tmp_path / 'b'), sha(b'old'))
+    for key in ('stale-shared', 'stale'):
+        store.index[key]['validated_at'] = time.time() - 120
+    store._save_index()
+
+    reopened = app.ContentStore(root, max_age=60)  # 打开时清理
+    assert sorted(reopened.index) == ['fresh']
+    assert os.path.exists(reopened.blob_path(sha(b'shared')))
+    assert not os.path.exists(reopened.blob_path(sha(b'old')))
+
+
+def make_launcher(tmp_path, results):
+    fetches = []
+
+    def fetch(key, url, temp_path, progress_callback=None, cached=None):
+        fetches.append(cached)
+        result = results.pop(0)
+        if not result.get('not_modified'):
+            write(temp_path, result.pop('data'))
+        return result
+
+    return types.SimpleNamespace(
+        content_store=app.ContentStore(str(tmp_path / 'store')),
+        downloader=types.SimpleNamespace(fetch=fetch),
+        telemetry=app.Telemetry(export_dir=None, max_spans=10),
+        fetches=fetches)
+
+
+def downloaded(data, etag=None):
+    source = types.SimpleNamespace(name='github', kind='origin')
+    return {"data": data, "sha256": sha(data), "size": len(data), "attempts": 1, "etag": etag,
+            "source": source, "seconds": 0.1, "hedged": False}
+
+
+def test_revalidated_download_reuses_store_copy(tmp_path):
+    source = types.SimpleNamespace(name='github', kind='origin')
+    launcher = make_launcher(tmp_path, [
+        downloaded(b'v1', etag='"v1"'),
+        {"sha256": sha(b'v1'), "size": 2, "attempts": 1, "etag": '"v1"', "not_modified": True,
+         "source": source, "seconds": 0.1, "hedged": False}])
+    download = app.EelToolLauncher.download_file_from_github
+
+    first = str(tmp_path / 'gen-1' / 'tool.py')
+    assert download(launcher, 'o', 'r', 'tool.py', first)
+    assert launcher.fetches == [None]
+    launcher.content_store.index['github/o/r/tool.py']['validated_at'] = 0
+
+    # 304：不下载内容，从仓库放到新位置并刷新验证时间
+    second = str(tmp_path / 'gen-2' / 'tool.py')
+    assert download(launcher, 'o', 'r', 'tool.py', second)
+    assert launcher.fetches[1]['etag'] == '"v1"'
+    assert read(second) == b'v1'
+    assert time.time() - launcher.content_store.index['github/o/r/tool.py']['validated_at'] < 60
+
+
+def test_not_modified_without_store_copy_downloads_again(tmp_path):
+    source = types.SimpleNamespace(name='mirror', kind='mirror')
+    launcher = make_launcher(tmp_path, [
+        downloaded(b'v1'),
+        {"sha256": sha(b'v1'), "size": 2, "attempts": 1, "not_modified": True,
+         "source": source, "seconds": 0.1, "hedged": False},
+        downloaded(b'v1')])
+    download = app.EelToolLauncher.download_file_from_github
+
+    assert download(launcher, 'o', 'r', 'tool.py', str(tmp_path / 'gen-1' / 'tool.py'))
+    os.remove(launcher.content_store.blob_path(sha(b'v1')))
+
+    target = str(tmp_path / 'gen-2' / 'tool.py')
+    assert download(launcher, 'o', 'r', 'tool.py', target)
+    assert launcher.fetches[2] is None  # 完整下载，不再带本地记录
+    assert read(target) == b'v1'
+    assert launcher.content_store.lookup('github/o/r/tool.py')
@@ -0,0 +1,122 @@
+import hashlib
+import time
+import types
+
+import app
+
+
+def sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class FakeSource:
+    """按设定延迟返回固定内容的下载源；被取消时立即返回 None"""
+
+    def __init__(self, name, data, kind='origin', delay=0.0):
+        self.name = name
+        self.data = data
+        self.kind = kind
+        self.delay = delay
+        self.calls = 0
+
+    def fetch(self, key, url, temp_path, progress_callback=None, cancel_event=None, cached=None,
+              expected_sha256=None):
+        self.calls += 1
+        if cancel_event.wait(self.delay) or self.data is None:
+            return None
+        with open(temp_path, 'wb') as f:
+            f.write(self.data)
+        return {"sha256": sha(self.data), "size": len(self.data), "attempts": 1}
+
+
+def downloader(sources, trusted=None, **kwargs):
+    options = dict(min_delay=0.05, max_delay=0.05, initial_delay=0.05, wait=time.sleep)
+    options.update(kwargs)
+    lookup = types.SimpleNamespace(lookup=lambda key: trusted) if trusted else None
+    return app.HedgedDownloader(sources, trusted=lookup, **options)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_fast_mirror_wins_the_race_when_hash_is_trusted(tmp_path):
+    target = str(tmp_path / 'tool.py')
+    mirror = FakeSource('mirror', b'v2', kind='mirror', delay=5.0)
+    origin = FakeSource('github', b'v2', delay=5.0)
+    alternate = FakeSource('cdn', b'v2', kind='alternate')
+    result = downloader([mirror, origin, alternate], trusted=sha(b'v2')).fetch('k', 'u', target)
+
+    assert result['source'] is alternate and result['hedged']
+    assert read(target) == b'v2'
+    assert not (tmp_path / 'tool.py.0').exists() and not (tmp_path / 'tool.py.1').exists()
+
+
+def test_without_trusted_hash_only_origin_is_used(tmp_path):
+    target = str(tmp_path / 'tool.py')
+    mirror = FakeSource('mirror', b'evil', kind='mirror')
+    alternate = FakeSource('cdn', b'evil', kind='alternate')
+    origin = FakeSource('github', b'good', delay=0.2)
+    result = downloader([mirror, origin, alternate]).fetch('k', 'u', target)
+
+    assert result['source'] is origin
+    assert read(target) == b'good'
+    assert mirror.calls == 0 and alternate.calls == 0
+
+
+def test_mismatching_mirror_and_alternate_results_are_rejected(tmp_path):
+    target = str(tmp_path / 'tool.py')
+    mirror = FakeSource('mirror', b'stale', kind='mirror')
+    origin = FakeSource('github', b'v2', delay=0.2)
+    alternate = FakeSource('cdn', b'tampered', kind='alternate')
+    result = downloader([mirror, origin, alternate], trusted=sha(b'v2')).fetch('k', 'u', target)
+
+    assert result['source'] is origin
+    assert read(target) == b'v2'
+    assert mirror.calls == 1 and alternate.calls == 1
+
+
+def test_origin_wins_over_a_stale_trusted_hash(tmp_path):
+    # 可信哈希清单尚未更新时，GitHub 上的新版本仍然有效
+    target = str(tmp_path / 'tool.py')
+    mirror = FakeSource('mirror', b'v1', kind='mirror', delay=0.2)
+    origin = FakeSource('github', b'v2')
+    result = downloader([origin, mirror], trusted=sha(b'v1'), initial_delay=5.0).fetch('k', 'u', target)
+
+    assert result['source'] is origin
+    assert read(target) == b'v2'
+
+
+def test_all_sources_failing_returns_none(tmp_path):
+    sources = [FakeSource('github', None), FakeSource('cdn', None, kind='alternate')]
+    assert downloader(sources, trusted=sha(b'v2')).fetch('k', 'u', str(tmp_path / 'tool.py')) is None
+    assert all(source.calls == 1 for source in sources)
+
+
+def test_cancelled_sources_only_raise_the_estimate(tmp_path):
+    slow = FakeSource('slow', b'v2', kind='mirror', delay=5.0)
+    fast = FakeSource('github', b'v2', delay=0.1)
+    hedged = downloader([slow, fast], trusted=sha(b'v2'))
+    hedged.latency = {'slow': [1.0, 0.1]}
+    hedged.fetch('k', 'u', str(tmp_path / 'a'))
+    # 取消前只等了约 0.15 秒，低于平滑耗时，不作为样本
+    assert hedged.latency['slow'] == [1.0, 0.1]
+
+    hedged.latency['slow'] = [0.01, 0.005]
+    hedged.fetch('k', 'u', str(tmp_path / 'b'))
+    assert hedged.latency['slow'][0] > 0.01
+
+    # 没有估计值时被取消的下载也不记录
+    del hedged.latency['slow']
+    hedged.fetch('k', 'u', str(tmp_path / 'c'))
+    assert 'slow' not in hedged.latency
+    assert 'github' in hedged.latency
+
+
+def test_latency_estimate_is_persisted(tmp_path):
+    state_file = str(tmp_path / 'state' / 'latency.json')
+    first = downloader([FakeSource('github', b'v2')], state_file=state_file)
+    first.fetch('k', 'u', str(tmp_path / 'tool.py'))
+    reloaded = downloader([FakeSource('github', b'v2')], state_file=state_file)
+    assert reloaded.latency['github'] == first.latency['github']
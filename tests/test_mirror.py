@@ -0,0 +1,142 @@
+import hashlib
+import importlib.util
+import os
+import threading
+import types
+
+import pytest
+
+import app
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '生产力工具整合.py')
+
+
+def artifact(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    return os.path.getmtime(path), len(data), hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """本机上的镜像服务，files 可在测试中修改"""
+    files = {}
+    server = app.CacheMirrorServer(lambda: dict(files), artifact, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield types.SimpleNamespace(files=files, url=f"http://127.0.0.1:{server.port}", server=server)
+    server.httpd.shutdown()
+    server.close()
+
+
+def publish(tmp_path, mirror, key, data):
+    path = tmp_path / hashlib.md5(key.encode()).hexdigest()
+    path.write_bytes(data)
+    mirror.files[key] = str(path)
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_mirror_server_binds_localhost_by_default(mirror):
+    assert mirror.server.httpd.server_address[0] == '127.0.0.1'
+
+
+def test_mirror_copy_needs_a_trusted_hash(tmp_path, mirror):
+    key = 'github/owner/repo/tool.py'
+    digest = publish(tmp_path, mirror, key, b'print("v2")')
+    source = app.MirrorSource(mirror.url)
+    target = str(tmp_path / 'out')
+
+    # 镜像自己的清单不算数：没有可信哈希时不下载
+    assert source.fetch(key, None, target) is None
+    assert not os.path.exists(target)
+
+    # 镜像上的版本与可信哈希不同（过期或被改动）：跳过
+    assert source.fetch(key, None, target, expected_sha256='0' * 64) is None
+    assert not os.path.exists(target)
+
+    result = source.fetch(key, None, target, expected_sha256=digest)
+    assert result['sha256'] == digest
+    with open(target, 'rb') as f:
+        assert f.read() == b'print("v2")'
+
+    cached = {"sha256": digest, "size": result['size']}
+    assert source.fetch(key, None, target, cached=cached, expected_sha256=digest)['not_modified']
+
+
+def test_trusted_hashes_come_from_repository_manifest(monkeypatch):
+    requested = []
+
+    def fake_get(url, headers=None, timeout=None):
+        requested.append(url)
+        if 'missing' in url:
+            return types.SimpleNamespace(status_code=404)
+        return types.SimpleNamespace(status_code=200, raise_for_status=lambda: None,
+                                     json=lambda: {"tool.py": "ABC123"})
+
+    monkeypatch.setattr(app.requests, 'get', fake_get)
+    trusted = app.TrustedHashes()
+    assert trusted.lookup('github/owner/repo/tool.py') == 'abc123'
+    assert trusted.lookup('github/owner/repo/other.py') is None
+    assert trusted.lookup('github/owner/missing/tool.py') is None
+    assert trusted.lookup('wheelhouse/numpy.whl') is None
+    # 同一仓库的清单在有效期内只请求一次（没有清单也一样）
+    trusted.lookup('github/owner/missing/tool.py')
+    assert requested == ['https://raw.githubusercontent.com/owner/repo/main/sha256sums.json',
+                         'https://raw.githubusercontent.com/owner/missing/main/sha256sums.json']
+
+
+def test_authorization_config_is_not_mirrored(tmp_path):
+    web_config = {"owner": "o", "repo": "r", "files": [
+        {"path": "web/index.html", "local": "index.html"},
+        {"path": "web/config.js", "local": "config.js", "mirror": False}]}
+    paths = {}
+    for file_info in web_config['files']:
+        path = tmp_path / file_info['local']
+        path.write_text('x')
+        paths[f"github/o/r/{file_info['path']}"] = str(path)
+    launcher = types.SimpleNamespace(
+        _internal_config={'web_interface': web_config},
+        artifact_paths=lambda: dict(paths),
+        web_key=lambda file_info: f"github/o/r/{file_info['path']}",
+        wheelhouse_dir=str(tmp_path / 'wheelhouse'))
+
+    assert list(app.EelToolLauncher.mirror_files(launcher)) == ['github/o/r/web/index.html']
+
+
+def test_tk_launcher_uses_mirror_only_with_configured_hash(tmp_path, mirror):
+    spec = importlib.util.spec_from_file_location('tool_launcher_ui_mirror', SOURCE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    digest = publish(tmp_path, mirror, 'release/Tool.exe', b'MZ-binary')
+    config = {"exe_name": "Tool.exe", "download_url": None, "sha256": None}
+    launcher = types.SimpleNamespace(_internal_config={'downloads': {'demo': config}},
+                                     get_mirror_urls=lambda: [mirror.url])
+    download = module.SimpleToolLauncher.download_exe_from_mirror
+
+    assert download(launcher, 'demo') is None
+    config['sha256'] = '0' * 64
+    assert download(launcher, 'demo') is None
+    config['sha256'] = digest
+    assert download(launcher, 'demo') == b'MZ-binary'
+
+
+def test_tk_release_download_prefers_mirror_when_hash_is_configured(tmp_path, mirror):
+    spec = importlib.util.spec_from_file_location('tool_launcher_ui_release', SOURCE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    digest = publish(tmp_path, mirror, 'release/Tool.exe', b'MZ-binary')
+    saved = []
+    launcher = types.SimpleNamespace(
+        _internal_config={'downloads': {'demo': {"exe_name": "Tool.exe", "download_url": None, "sha256": digest}}},
+        get_mirror_urls=lambda: [mirror.url],
+        is_cache_valid=lambda tool_id: False,
+        get_cache_file_path=lambda tool_id: 'Tool.exe',
+        save_exe_to_cache=lambda tool_id, data, version: saved.append((data, version)) or True,
+        get_download_info=lambda tool_id: pytest.fail("配置了可信哈希时不应回退到 GitHub"))
+    launcher.download_exe_from_mirror = lambda tool_id, callback=None: \
+        module.SimpleToolLauncher.download_exe_from_mirror(launcher, tool_id, callback)
+
+    assert module.SimpleToolLauncher.download_exe_from_release(launcher, 'demo') == 'Tool.exe'
+    assert saved == [(b'MZ-binary', 'mirror')]
@@ -0,0 +1,67 @@
+import types
+
+import app
+
+
+class ManualDispatcher:
+    """立即执行 call，call_later 记下来由测试手动触发"""
+
+    def __init__(self):
+        self.later = []
+
+    def call(self, func, *args):
+        func(*args)
+
+    def call_later(self, delay, func, *args):
+        self.later.append((func, args))
+
+    def run_later(self):
+        later, self.later = self.later, []
+        for func, args in later:
+            func(*args)
+
+
+def test_concurrent_jobs_keep_their_own_progress():
+    payloads = []
+    dispatcher = ManualDispatcher()
+    bus = app.ProgressBus(payloads.append, dispatcher, max_rate=1.0)
+    bus.publish('launch:a', 10, "a 下载")
+    bus.publish('launch:b', 20, "b 下载")
+    bus.publish('launch:a', 50, "a 下载")   # 限速：稍后补发
+    bus.publish('launch:b', 100, "b 完成")
+    dispatcher.run_later()
+
+    assert [(p["job"], p["percent"], p["status"]) for p in payloads] == [
+        ('launch:a', 10, "a 下载"), ('launch:b', 20, "b 下载"), ('launch:b', 100, "b 完成"), ('launch:a', 50, "a 下载")]
+    assert list(bus.jobs) == ['launch:a']
+
+
+def test_cleared_job_drops_its_pending_update():
+    payloads = []
+    dispatcher = ManualDispatcher()
+    bus = app.ProgressBus(payloads.append, dispatcher, max_rate=1.0)
+    bus.publish('launch:a', 10, "下载")
+    bus.publish('launch:a', 60, "下载")
+    bus.clear('launch:a')
+    dispatcher.run_later()
+    assert [p["percent"] for p in payloads] == [10]
+    assert not bus.jobs
+
+
+def test_launch_reports_under_its_own_job_and_clears_it():
+    payloads = []
+    bus = app.ProgressBus(payloads.append, ManualDispatcher())
+    launcher = types.SimpleNamespace(
+        telemetry=app.Telemetry(export_dir=None, max_spans=10),
+        progress=bus,
+        launch_job=app.EelToolLauncher.launch_job,
+        check_and_install_dependencies=lambda tool_id, job: bus.publish(job, 30, "依赖检查完成") or True,
+        _internal_config={'repositories': {'demo': {"file_path": "demo.py"}}},
+        get_tool_cache_path=lambda tool_id: 'demo.py',
+        fetch_tool=lambda tool_id, job, start, end: 'cached',
+        scheduler=types.SimpleNamespace(submit=lambda tool_id, path: {"success": True, "queued": True}),
+        push_process_table=lambda: None)
+
+    assert app.EelToolLauncher.launch_tool(launcher, 'demo')["queued"]
+    assert {p["job"] for p in payloads} == {'launch:demo'}
+    assert not bus.jobs  # 转入排队后不再保留进度状态
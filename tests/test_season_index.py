@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import season_index
+
+
+@pytest.mark.parametrize('stem, expected', [
+    ('Show.S02E10.1080p', (2, 10)),
+    ('Show.2x05.720p', (2, 5)),
+    ('Show 1920x1080 E03', (1, 3)),
+    ('第12集', (1, 12)),
+    ('Show - [07]', (1, 7)),
+    ('Movie.2019.1080p.x264.EP3', (1, 3)),
+    ('Show 2019 1080p 04', (1, 4)),
+    ('trailer', None),
+])
+def test_parse_episode(stem, expected):
+    assert season_index.parse_episode(stem) == expected
+
+
+def touch(root, *names):
+    for name in names:
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+
+
+def test_pairs_videos_with_preferred_subtitles(tmp_path):
+    root = str(tmp_path)
+    touch(root, 'Show.S01E01.mkv', 'Show.S01E01.eng.srt', 'Show.S01E01.chs.srt',
+          'Show.S01E02.mkv', 'Subs/Show.S01E02.srt',
+          'Show.S01E03.mkv',
+          'Show.S01E09.srt')
+
+    index = season_index.PairingIndex(root)
+    episodes = index.episodes()
+
+    assert [(e["season"], e["episode"]) for e in episodes] == [(1, 1), (1, 2), (1, 3)]
+    assert os.path.basename(episodes[0]["subtitle"]) == 'Show.S01E01.chs.srt'
+    assert episodes[1]["subtitle"] == os.path.join(root, 'Subs', 'Show.S01E02.srt')
+    assert episodes[2]["subtitle"] is None
+    assert index.orphan_subtitles() == [os.path.join(root, 'Show.S01E09.srt')]
+
+
+def test_merge_plan_marks_unprobed_videos_suspect(tmp_path):
+    root = str(tmp_path)
+    touch(root, 'a 01.mp4', 'a 01.srt', 'a 02.mp4')
+    index = season_index.PairingIndex(root)
+    video = os.path.join(root, 'a 01.mp4')
+
+    plan = index.build_merge_plan({video: {"frames": 100, "fps": 25.0, "suspect": False}})
+
+    assert [(p["frames"], p["fps"], p["suspect"]) for p in plan] == [(100, 25.0, False), (0, 0.0, True)]
@@ -0,0 +1,99 @@
+import json
+import os
+import socket
+import threading
+
+import app
+
+
+class InlineDispatcher:
+    def call(self, func, *args):
+        func(*args)
+
+
+def test_forward_is_answered_before_primary_attaches(tmp_path):
+    """主实例初始化期间（尚未 attach）转交的意图立即得到应答并排队"""
+    primary = app.SingleInstanceChannel(str(tmp_path))
+    primary.listen()
+    try:
+        second = app.SingleInstanceChannel(str(tmp_path))
+        assert second.forward({"action": "launch", "tool_id": "demo"})
+
+        handled = []
+        backlog = primary.attach(lambda message: handled.append(message), InlineDispatcher())
+        assert backlog == [{"action": "launch", "tool_id": "demo"}]
+
+        assert second.forward({"action": "focus"})
+        assert handled == [{"action": "focus"}]
+    finally:
+        primary.close()
+
+
+def test_forward_rejects_wrong_token(tmp_path):
+    primary = app.SingleInstanceChannel(str(tmp_path))
+    primary.listen()
+    try:
+        info = json.loads((tmp_path / 'instance.json').read_text(encoding='utf-8'))
+        info['token'] = 'wrong'
+        (tmp_path / 'instance.json').write_text(json.dumps(info), encoding='utf-8')
+
+        second = app.SingleInstanceChannel(str(tmp_path))
+        assert second.forward({"action": "focus"})
+        assert second.rejected == "令牌无效"
+        assert not primary.backlog
+    finally:
+        primary.close()
+
+
+def serve_once(reply):
+    """端口被其他程序占用的替身：接受连接后回复 reply（None 表示不回复）"""
+    server = socket.create_server(('127.0.0.1', 0))
+    accepted = []
+
+    def run():
+        try:
+            sock, _ = server.accept()
+        except OSError:
+            return  # 测试结束时关闭
+        accepted.append(sock)
+        if reply is not None:
+            sock.makefile('r').readline()
+            sock.sendall(reply)
+
+    threading.Thread(target=run, daemon=True).start()
+    return server, accepted
+
+
+def write_info(tmp_path, port, pid):
+    (tmp_path / 'instance.json').write_text(json.dumps({"port": port, "token": "t", "pid": pid}), encoding='utf-8')
+
+
+def test_unrelated_listener_is_not_a_running_instance(tmp_path):
+    """实例信息过期、端口被其他程序占用：不应答、非本应用格式的应答都不算转交成功"""
+    for reply in (None, b'HTTP/1.1 400 Bad Request\r\n\r\n', b'{"status": "ok"}\n'):
+        server, accepted = serve_once(reply)
+        write_info(tmp_path, server.getsockname()[1], os.getpid())
+        try:
+            assert not app.SingleInstanceChannel(str(tmp_path)).forward({"action": "focus"}, reply_timeout=0.2)
+        finally:
+            for sock in accepted:
+                sock.close()
+            server.close()
+
+
+def test_dead_recorded_pid_is_not_a_running_instance(tmp_path):
+    server, accepted = serve_once(b'{"ok": true}\n')
+    write_info(tmp_path, server.getsockname()[1], 0)
+    try:
+        assert not app.SingleInstanceChannel(str(tmp_path)).forward({"action": "focus"})
+        assert not accepted  # 没有连接
+    finally:
+        server.close()
+
+
+def test_forward_without_listener_starts_new_instance(tmp_path):
+    server = socket.create_server(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+    server.close()
+    write_info(tmp_path, port, os.getpid())
+    assert not app.SingleInstanceChannel(str(tmp_path)).forward({"action": "focus"})
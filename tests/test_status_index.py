@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import types
+
+import app
+
+
+def test_fingerprint_survives_restart_and_tracks_site_packages(tmp_path):
+    site_dir = tmp_path / 'site-packages'
+    (site_dir / 'numpy-1.0.dist-info').mkdir(parents=True)
+    index = app.ToolStatusIndex(str(tmp_path))
+    index.mark_dependencies('demo', sys.executable, ['numpy'], [str(site_dir)])
+
+    reloaded = app.ToolStatusIndex(str(tmp_path))
+    assert reloaded.dependencies_satisfied('demo', sys.executable, ['numpy'])
+    assert not reloaded.dependencies_satisfied('demo', sys.executable, ['numpy', 'requests'])
+
+    # 卸载：.dist-info 被删除，site-packages 目录的修改时间随之变化
+    (site_dir / 'numpy-1.0.dist-info').rmdir()
+    stamp = time.time() + 5
+    os.utime(site_dir, (stamp, stamp))
+    assert not reloaded.dependencies_satisfied('demo', sys.executable, ['numpy'])
+
+
+def test_import_error_on_exit_clears_fingerprint(tmp_path):
+    index = app.ToolStatusIndex(str(tmp_path))
+    index.mark_dependencies('demo', sys.executable, ['numpy'])
+    launcher = types.SimpleNamespace(
+        status_index=index,
+        output_capture=types.SimpleNamespace(
+            release=lambda pid: None,
+            tail=lambda pid, stream=None: ["ModuleNotFoundError: No module named 'numpy'"]),
+        scheduler=types.SimpleNamespace(drain=lambda: None))
+
+    app.EelToolLauncher.handle_tool_exit(launcher, {"pid": 1, "tool_id": "demo", "exit_code": 1})
+    assert not index.dependencies_satisfied('demo', sys.executable, ['numpy'])
+
+
+def test_tool_status_is_pushed_only_when_running_tools_change(monkeypatch):
+    tables = [{"running": [{"tool_id": "demo"}]}, {"running": [{"tool_id": "demo"}]}, {"running": []}]
+    pushes = []
+    launcher = types.SimpleNamespace(window_open=True, _pushed_running=None,
+                                     get_process_table=lambda table=None: tables.pop(0),
+                                     push_tool_status=lambda: pushes.append(1))
+    monkeypatch.setattr(app.eel, 'updateProcessTable', lambda table: None, raising=False)
+    for _ in range(3):
+        app.EelToolLauncher.push_process_table(launcher)
+    assert len(pushes) == 2
@@ -0,0 +1,188 @@
+import os
+
+import pytest
+
+import subtitle_engine
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def engine(request, monkeypatch):
+    """两种实现都要测：numpy 向量化和纯 Python 回退"""
+    if request.param == 'python':
+        monkeypatch.setattr(subtitle_engine, 'np', None)
+    elif subtitle_engine.np is None:
+        pytest.skip('未安装 numpy')
+    return subtitle_engine
+
+
+def test_offsets_follow_per_episode_rules(engine):
+    # 首集没有帧率：参考帧率取第二集；缺字幕的第三集不偏移但照样累加帧数
+    offsets, applied = engine.compute_offsets([100, 0, 250, 300], [0, 25, 25, 25], [True, True, False, True])
+    assert [int(offset) for offset in offsets] == [0, 4000, 0, 14000]
+    assert [bool(flag) for flag in applied] == [False, True, False, True]
+
+
+def test_offsets_skip_negative_frames_and_zero_cumulative(engine):
+    offsets, applied = engine.compute_offsets([-5, 0, 30], [30, 30, 30], [True, True, True])
+    assert [int(offset) for offset in offsets] == [0, 0, 0]
+    assert not any(applied)
+
+
+def test_offsets_without_any_fps(engine):
+    offsets, applied = engine.compute_offsets([10, 10], [0, 0], [True, True])
+    assert [int(offset) for offset in offsets] == [0, 0]
+    assert not any(applied)
+    assert [int(offset) for offset in engine.compute_offsets([], [], [])[0]] == []
+
+
+def test_offsets_truncate_like_int(engine):
+    # 1001 帧 @ 23.976 fps = 41749.9... 毫秒，与逐集循环的 int() 一致
+    offsets, _ = engine.compute_offsets([1001, 10], [23.976, 23.976], [True, True])
+    assert int(offsets[1]) == int(1001 * 1000.0 / 23.976)
+
+
+def test_merge_offsets_matches_compute_offsets(engine):
+    episodes = [{"frames": 1000, "fps": 30.0, "has_subtitle": True},
+                {"frames": 1000, "fps": 30.0, "has_subtitle": True},
+                {"frames": 1000, "fps": 30.0, "has_subtitle": False},
+                {"frames": 1000, "fps": 30.0, "has_subtitle": True}]
+    assert engine.merge_offsets(episodes) == [0, 33333, 0, 100000]
+
+
+def test_shift_cues_repeats_episode_offsets(engine):
+    starts, ends = engine.shift_cues([0, 10, 5], [1, 11, 6], [2, 1], [100, 1000])
+    assert [int(value) for value in starts] == [100, 110, 1005]
+    assert [int(value) for value in ends] == [101, 111, 1006]
+
+
+def write_srt_file(path, cues):
+    blocks = [f"{index}\n{start} --> {end}\n{text}\n" for index, (start, end, text) in enumerate(cues, 1)]
+    path.write_text('\n'.join(blocks), encoding='utf-8')
+    return str(path)
+
+
+def test_iter_srt_cues_parses_loose_timestamps_and_skips_broken_blocks():
+    lines = ['1', '00:00:01,5 --> 00:00:02.250 X1:10', 'hello', '', 'garbage', '', '2',
+             '00:01:00,000 --> 00:01:01,000', 'a', 'b']
+    cues = list(subtitle_engine.iter_srt_cues(lines))
+    assert cues == [subtitle_engine.SrtCue(1500, 2250, ['hello'], ' X1:10'),
+                    subtitle_engine.SrtCue(60000, 61000, ['a', 'b'], '')]
+
+
+def test_merge_srt_files_offsets_and_renumbers(engine, tmp_path):
+    first = write_srt_file(tmp_path / 'e1.srt', [('00:00:01,000', '00:00:02,000', 'one'),
+                                                 ('00:00:03,000', '00:00:04,000', 'two')])
+    third = write_srt_file(tmp_path / 'e3.srt', [('00:00:00,500', '00:00:01,000', 'three')])
+    episodes = [{"subtitle": first, "frames": 250, "fps": 25.0},
+                {"subtitle": None, "frames": 500, "fps": 25.0},
+                {"subtitle": third, "frames": 100, "fps": 25.0}]
+    output = tmp_path / 'merged.srt'
+
+    count, offsets = engine.merge_srt_files(episodes, str(output))
+
+    assert (count, offsets) == (3, [0, 0, 30000])
+    cues = list(subtitle_engine.read_srt_cues(str(output)))
+    assert [(cue.start, cue.end, cue.lines) for cue in cues] == [
+        (1000, 2000, ['one']), (3000, 4000, ['two']), (30500, 31000, ['three'])]
+    numbers = [line for line in output.read_text(encoding='utf-8').splitlines() if line.isdigit()]
+    assert numbers == ['1', '2', '3']
+    assert not (tmp_path / 'merged.srt.part').exists()
+
+
+def make_series(tmp_path, count=4):
+    episodes = []
+    for index in range(count):
+        subtitle = write_srt_file(tmp_path / f'e{index}.srt', [('00:00:01,000', '00:00:02,000', f'ep{index} a'),
+                                                                ('00:00:05,000', '00:00:06,000', f'ep{index} b')])
+        episodes.append({"subtitle": subtitle, "frames": 250, "fps": 25.0})
+    return episodes
+
+
+def test_incremental_merge_matches_full_merge_and_reuses_segments(tmp_path):
+    episodes = make_series(tmp_path)
+    full = tmp_path / 'full.srt'
+    merger = subtitle_engine.IncrementalMerger(str(tmp_path / 'out.srt'))
+
+    stats = merger.merge(episodes)
+    subtitle_engine.merge_srt_files(episodes, str(full))
+    assert (stats["reparsed"], stats["rendered"], stats["cues"]) == (4, 4, 8)
+    assert (tmp_path / 'out.srt').read_bytes() == full.read_bytes()
+
+    # 状态保存在磁盘上：新实例再次合并时什么都不用重做
+    stats = subtitle_engine.IncrementalMerger(str(tmp_path / 'out.srt')).merge(episodes)
+    assert (stats["reparsed"], stats["rendered"], stats["reused"]) == (0, 0, 4)
+
+
+def test_incremental_merge_rerenders_only_shifted_episodes(tmp_path):
+    episodes = make_series(tmp_path)
+    merger = subtitle_engine.IncrementalMerger(str(tmp_path / 'out.srt'))
+    merger.merge(episodes)
+
+    # 第三集帧数变化：只有其后的剧集偏移改变
+    episodes[2] = dict(episodes[2], frames=500)
+    stats = merger.merge(episodes)
+    subtitle_engine.merge_srt_files(episodes, str(tmp_path / 'full.srt'))
+    assert (stats["reparsed"], stats["rendered"], stats["reused"]) == (0, 1, 3)
+    assert (tmp_path / 'out.srt').read_bytes() == (tmp_path / 'full.srt').read_bytes()
+
+    # 第二集字幕多了一条：重新解析这一集，其后的序号全部变化
+    write_srt_file(tmp_path / 'e1.srt', [('00:00:01,000', '00:00:02,000', 'x'), ('00:00:03,000', '00:00:04,000', 'y'),
+                                         ('00:00:05,000', '00:00:06,000', 'z')])
+    stats = merger.merge(episodes)
+    subtitle_engine.merge_srt_files(episodes, str(tmp_path / 'full.srt'))
+    assert (stats["reparsed"], stats["rendered"], stats["reused"]) == (1, 3, 1)
+    assert (tmp_path / 'out.srt').read_bytes() == (tmp_path / 'full.srt').read_bytes()
+
+
+def test_incremental_merge_treats_vanished_subtitle_as_missing(tmp_path):
+    episodes = make_series(tmp_path)
+    merger = subtitle_engine.IncrementalMerger(str(tmp_path / 'out.srt'))
+    merger.merge(episodes)
+
+    # 计划之后第二集字幕被删除：按缺少字幕处理，其余剧集的偏移不变
+    os.remove(episodes[1]["subtitle"])
+    stats = merger.merge(episodes)
+    assert [item["subtitle"] for item in stats["missing"]] == [episodes[1]["subtitle"]]
+
+    expected = [dict(episode, subtitle=None) if index == 1 else episode for index, episode in enumerate(episodes)]
+    _, offsets = subtitle_engine.merge_srt_files(expected, str(tmp_path / 'full.srt'))
+    assert (tmp_path / 'out.srt').read_bytes() == (tmp_path / 'full.srt').read_bytes()
+    assert [entry["offset"] for entry in merger.episodes] == [0, 0, offsets[2], offsets[3]]
+
+
+def test_shift_srt_file_rewrites_fixed_width_timestamps_in_place(engine, tmp_path):
+    path = write_srt_file(tmp_path / 'a.srt', [('00:00:01,000', '00:00:02,500', 'one'),
+                                               ('00:59:59,900', '01:00:00,100', 'two')])
+    before = (tmp_path / 'a.srt').read_bytes()
+
+    result = engine.shift_srt_file(path, 1500)
+
+    assert result == {"timestamps": 4, "fallback": False}
+    after = (tmp_path / 'a.srt').read_bytes()
+    assert len(after) == len(before)
+    cues = list(engine.read_srt_cues(path))
+    assert [(cue.start, cue.end) for cue in cues] == [(2500, 4000), (3601400, 3601600)]
+
+
+def test_shift_srt_file_falls_back_when_fixed_width_cannot_hold(engine, tmp_path):
+    # 第二条时间轴不是定宽格式：校验时发现并退回完整解析，原文件不被改动
+    source = str(tmp_path / 'a.srt')
+    (tmp_path / 'a.srt').write_text('1\n00:00:01,000 --> 00:00:02,000\none\n\n2\n0:00:03,5 --> 0:00:04,000\ntwo\n',
+                                    encoding='utf-8')
+    original = (tmp_path / 'a.srt').read_bytes()
+
+    result = engine.shift_srt_file(source, 1000, output_path=str(tmp_path / 'b.srt'))
+
+    assert result["fallback"]
+    assert (tmp_path / 'a.srt').read_bytes() == original
+    cues = list(engine.read_srt_cues(str(tmp_path / 'b.srt')))
+    assert [(cue.start, cue.end) for cue in cues] == [(2000, 3000), (4500, 5000)]
+
+
+def test_shift_srt_file_negative_result_falls_back_and_clamps(engine, tmp_path):
+    path = write_srt_file(tmp_path / 'a.srt', [('00:00:01,000', '00:00:02,000', 'one')])
+    result = engine.shift_srt_file(path, -1500)
+    assert result["fallback"]
+    # 定宽放不下负数：完整解析写出，负时间戳按 0 处理
+    cues = list(engine.read_srt_cues(path))
+    assert [(cue.start, cue.end) for cue in cues] == [(0, 500)]
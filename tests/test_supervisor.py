@@ -0,0 +1,64 @@
+import types
+
+import pytest
+
+import app
+
+
+class FakeProcess:
+    def __init__(self, pid):
+        self.pid = pid
+        self.exit_code = None
+
+    def poll(self):
+        return self.exit_code
+
+
+class FakeUsage:
+    def __init__(self):
+        self.cpu = 0.0
+        self.rss_mb = 50.0
+
+    def cpu_percent(self, interval):
+        return self.cpu
+
+    def memory_info(self):
+        return types.SimpleNamespace(rss=self.rss_mb * 1024 * 1024)
+
+
+def test_supervisor_notifies_only_on_visible_changes():
+    tables = []
+    supervisor = app.ToolSupervisor(on_update=tables.append)
+    process = FakeProcess(42)
+    record = supervisor.register('demo', process)
+    usage = record["_ps"] = FakeUsage()
+    assert len(tables) == 1
+
+    supervisor.sample()   # 首次采样：内存档位变化
+    usage.cpu, usage.rss_mb = 1.0, 52.0
+    supervisor.sample()   # 同一档位内的波动不推送
+    supervisor.sample()
+    assert len(tables) == 2
+
+    usage.cpu = 40.0
+    supervisor.sample()
+    assert len(tables) == 3 and tables[-1]["running"][0]["cpu_percent"] == 40.0
+
+    process.exit_code = 0
+    supervisor.sample()
+    assert len(tables) == 4 and not tables[-1]["running"]
+
+
+def test_pushed_table_is_the_supervisor_table(monkeypatch):
+    pushed = []
+    supervisor_table = {"running": [{"tool_id": "demo", "pid": 7}], "history": [], "sampling": True}
+    launcher = types.SimpleNamespace(
+        window_open=True, _pushed_running=["demo"],
+        supervisor=types.SimpleNamespace(get_table=lambda: pytest.fail("进程表被重新生成")),
+        scheduler=types.SimpleNamespace(get_queue=lambda: []),
+        tools={"demo": {"name": "Demo"}})
+    launcher.get_process_table = lambda table=None: app.EelToolLauncher.get_process_table(launcher, table)
+    monkeypatch.setattr(app.eel, 'updateProcessTable', pushed.append, raising=False)
+
+    app.EelToolLauncher.push_process_table(launcher, supervisor_table)
+    assert pushed == [dict(supervisor_table, queue=[])]
@@ -0,0 +1,96 @@
+import importlib.util
+import os
+from collections import deque
+
+import pytest
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '生产力工具整合.py')
+
+
+@pytest.fixture(scope='module')
+def module():
+    spec = importlib.util.spec_from_file_location('tool_launcher_ui', SOURCE_PATH)
+    loaded = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(loaded)
+    return loaded
+
+
+class FakeRoot:
+    """不需要显示器的 Tk 根窗口替身"""
+
+    def __init__(self):
+        self.children = []
+        self.cancelled = []
+
+    def winfo_children(self):
+        return list(self.children)
+
+    def after_cancel(self, job):
+        self.cancelled.append(job)
+
+    def protocol(self, name, callback):
+        self.close_callback = callback
+
+
+class FakeWidget:
+    def __init__(self, root):
+        self.root = root
+        root.children.append(self)
+
+    def destroy(self):
+        self.root.children.remove(self)
+
+    def config(self, **options):
+        self.options = options
+
+
+def make_launcher(module, tmp_path):
+    launcher = module.SimpleToolLauncher.__new__(module.SimpleToolLauncher)
+    launcher.init_config(None)
+    launcher.machine_id = 'test'
+    launcher.cache_dir = str(tmp_path)
+    launcher.tool_processes = {}
+    launcher.process_start_times = {}
+    launcher.process_history = deque()
+    launcher.root = FakeRoot()
+    launcher._reap_job = 'reap-1'
+    FakeWidget(launcher.root)
+
+    def build():
+        launcher.status_label = FakeWidget(launcher.root)
+    launcher.build_main_window = build
+    launcher.reap_tool_processes = lambda: None
+    return launcher
+
+
+def read_source():
+    with open(SOURCE_PATH, encoding='utf-8-sig') as f:
+        return f.read()
+
+
+def test_failed_rebuild_restores_previous_interface(module, tmp_path):
+    launcher = make_launcher(module, tmp_path)
+    broken = read_source() + (
+        "\n\ndef _broken_build(self):\n    raise RuntimeError('boom')\n"
+        "SimpleToolLauncher.build_main_window = _broken_build\n")
+
+    assert launcher.hot_swap_interface(broken)
+
+    assert launcher.root.cancelled == ['reap-1']
+    assert launcher.root.children == [launcher.status_label]
+    assert launcher.status_label.options['text'] == "界面更新失败，已恢复原界面"
+    with open(module.get_logger().handlers[0].baseFilename, encoding='utf-8') as f:
+        assert 'boom' in f.read()
+
+
+def test_code_that_cannot_load_keeps_the_window(module, tmp_path, monkeypatch):
+    launcher = make_launcher(module, tmp_path)
+    errors = []
+    monkeypatch.setattr(module.messagebox, 'showerror', lambda title, message: errors.append(message))
+    widgets = launcher.root.winfo_children()
+
+    launcher.restart_interface("raise ValueError('bad update')\n")
+
+    assert launcher.root.winfo_children() == widgets
+    assert launcher.root.cancelled == []
+    assert errors and 'bad update' in errors[0]
@@ -0,0 +1,86 @@
+import subprocess
+import sys
+import time
+
+import app
+
+CHILD = (
+    "import sys, time\n"
+    "print('first'); sys.stderr.write('warn\\n')\n"
+    "time.sleep(0.3)\n"
+    "print('progress 10%\\rprogress 100%')\n"
+)
+
+
+def spawn(capture, code, tool_id='demo'):
+    log_files = capture.open_logs(tool_id)
+    try:
+        process = subprocess.Popen([sys.executable, '-u', '-c', code], stdout=log_files[0],
+                                   stderr=log_files[1], stdin=subprocess.DEVNULL)
+    finally:
+        for log_file in log_files:
+            log_file.close()
+    capture.attach(tool_id, process, log_files)
+    return process
+
+
+def test_output_is_followed_from_log_files(tmp_path):
+    capture = app.ToolOutputCapture(str(tmp_path), poll_interval=0.05)
+    process = spawn(capture, CHILD)
+    process.wait(timeout=10)
+    capture.release(process.pid)
+
+    output = capture.get_output(process.pid)
+    assert output["finished"]
+    # 两个流分别跟随读取，流之间的先后顺序不保证
+    assert [line["text"] for line in output["lines"] if line["stream"] == "stdout"] == ['first', 'progress 100%']
+    assert capture.tail(process.pid, stream="stderr") == ['warn']
+    with open(output["logs"]["stdout"], encoding='utf-8') as f:
+        assert f.read().startswith('first')
+
+
+def test_tool_keeps_running_without_a_reader(tmp_path):
+    """输出不经过启动器的管道：没有任何读取方时工具照常输出并正常退出"""
+    capture = app.ToolOutputCapture(str(tmp_path))
+    log_files = capture.open_logs('demo')
+    process = subprocess.Popen([sys.executable, '-c', "import time; time.sleep(0.2); print('late' * 1000)"],
+                               stdout=log_files[0], stderr=log_files[1])
+    for log_file in log_files:
+        log_file.close()
+    assert process.wait(timeout=10) == 0
+
+
+def test_old_logs_are_pruned_per_tool(tmp_path):
+    capture = app.ToolOutputCapture(str(tmp_path), keep_logs=2)
+    for _ in range(4):
+        for log_file in capture.open_logs('demo'):
+            log_file.close()
+        time.sleep(0.01)
+    for log_file in capture.open_logs('other'):
+        log_file.close()
+    names = [path.name for path in tmp_path.iterdir()]
+    assert len([name for name in names if name.startswith('demo-') and name.endswith('.out.log')]) == 2
+    assert len([name for name in names if name.startswith('other-')]) == 2
+
+
+def test_log_files_are_capped_while_the_tool_runs(tmp_path):
+    """长时间大量输出：日志超过上限时转存为 .1 并截断，输出一行不少地进入缓冲区"""
+    limit = 64 * 1024
+    capture = app.ToolOutputCapture(str(tmp_path), max_lines=5000, max_log_bytes=limit, poll_interval=0.01)
+    code = ("import sys, time\n"
+            "for burst in range(25):\n"
+            "    for i in range(100):\n"
+            "        print(f'{burst:02d}-{i:03d} ' + 'x' * 150)\n"
+            "    time.sleep(0.03)\n")
+    process = spawn(capture, code)
+    process.wait(timeout=30)
+    capture.release(process.pid, timeout=5)
+
+    output = capture.get_output(process.pid, limit=5000)
+    assert len(output["lines"]) == 2500 and output["lines"][-1]["text"].startswith('24-099')
+    burst_bytes = 100 * 160
+    for path in (output["logs"]["stdout"], output["logs"]["stdout"] + '.1'):
+        with open(path, 'rb') as f:
+            data = f.read()
+        assert len(data) < limit + 2 * burst_bytes
+        assert b'\0' not in data  # 截断后从头追加，没有空洞
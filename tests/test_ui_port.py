@@ -0,0 +1,14 @@
+import socket
+
+import app
+
+
+def test_prefers_fixed_port_and_falls_back_when_taken():
+    base = app.find_ui_port(preferred=app.UI_PORT)
+    assert base in range(app.UI_PORT, app.UI_PORT + app.UI_PORT_ATTEMPTS)
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as busy:
+        busy.bind(('localhost', base))
+        busy.listen(1)
+        assert app.find_ui_port(preferred=base, attempts=3) in (base + 1, base + 2, 0)
+        assert app.find_ui_port(preferred=base, attempts=1) == 0
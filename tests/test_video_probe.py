@@ -0,0 +1,33 @@
+import struct
+
+import video_probe
+
+
+def write_avi(path, frames=240, micro_sec_per_frame=40000):
+    """只含 RIFF/hdrl/avih 头部的最小 AVI 文件"""
+    avih = struct.pack('<14I', micro_sec_per_frame, 0, 0, 0, frames, 0, 1, 0, 640, 480, 0, 0, 0, 0)
+    header = b'RIFF' + struct.pack('<I', 4 + 12 + 8 + len(avih)) + b'AVI '
+    header += b'LIST' + struct.pack('<I', 4 + 8 + len(avih)) + b'hdrl'
+    header += b'avih' + struct.pack('<I', len(avih)) + avih
+    path.write_bytes(header)
+    return str(path)
+
+
+def test_avi_header_is_parsed_without_decoding(tmp_path):
+    result = video_probe.probe_video(write_avi(tmp_path / 'a.avi'))
+    assert (result["frames"], result["fps"], result["source"], result["suspect"]) == (240, 25.0, 'avi', False)
+
+
+def test_missing_file_does_not_discard_the_batch(tmp_path):
+    good = write_avi(tmp_path / 'a.avi')
+    missing = str(tmp_path / 'gone.avi')
+    cache_path = str(tmp_path / 'probe.json')
+
+    results = video_probe.probe_videos([good, missing], cache_path=cache_path, max_workers=1)
+
+    assert results[good]["frames"] == 240 and not results[good]["cached"]
+    assert results[missing]["suspect"] and results[missing]["error"]
+
+    again = video_probe.probe_videos([good, missing], cache_path=cache_path, max_workers=1)
+    assert again[good]["cached"]
+    assert again[missing]["error"]
@@ -0,0 +1,99 @@
+import json
+import types
+
+import eel
+import pytest
+
+import app
+
+SCRIPT = "function updateProgress(p) {}\neel.expose(updateProgress);\n"
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+    def calls(self):
+        return [message['name'] for message in self.sent if 'name' in message]
+
+
+@pytest.fixture
+def eel_state():
+    """隔离 Eel 的模块级状态（测试中模拟一个已连接的页面）"""
+    saved = {name: getattr(eel, name, None) for name in ('root_path', '_js_functions', '_mock_queue')}
+    saved_sockets = list(eel._websockets)
+    saved_done = set(eel._mock_queue_done)
+    yield
+    for name, value in saved.items():
+        setattr(eel, name, value)
+    eel._websockets[:] = saved_sockets
+    eel._mock_queue_done.clear()
+    eel._mock_queue_done.update(saved_done)
+
+
+def connect_page(web_dir):
+    """相当于 main() 中的 eel.init 加上页面建立 websocket 连接"""
+    eel.init(str(web_dir))
+    eel._mock_queue = []
+    ws = FakeWebSocket()
+    for name in eel._js_functions:
+        eel._import_js_function(name)
+    eel._mock_queue_done.add('index.html')
+    eel._websockets.append(('index.html', ws))
+    return ws
+
+
+def write_web(web_dir, script):
+    web_dir.mkdir(parents=True, exist_ok=True)
+    (web_dir / 'index.html').write_text('<script src="script.js"></script>', encoding='utf-8')
+    (web_dir / 'script.js').write_text(script, encoding='utf-8')
+
+
+def test_pushes_still_reach_the_page_after_a_hot_reload(tmp_path, eel_state):
+    web_dir = tmp_path / 'web'
+    write_web(web_dir, SCRIPT)
+    ws = connect_page(web_dir)
+    launcher = types.SimpleNamespace(assets=app.StaticAssetBundle(str(web_dir)).load(),
+                                     web_cache_dir=str(web_dir), window_open=True)
+
+    # 新版脚本新增了 assetsUpdated
+    write_web(web_dir, SCRIPT + "function assetsUpdated(u) {}\neel.expose(assetsUpdated);\n")
+    update = app.EelToolLauncher.reload_web_assets(launcher)
+    eel.updateProgress(50)
+
+    assert update["changed"] == ['script.js'] and update["reload"]
+    assert ws.calls() == ['assetsUpdated', 'updateProgress']
+    assert eel._mock_queue == []
+
+
+def test_switching_web_root_keeps_existing_functions_live(tmp_path, eel_state):
+    first, second = tmp_path / 'gen-1', tmp_path / 'gen-2'
+    write_web(first, SCRIPT)
+    write_web(second, SCRIPT + "eel.expose(focusWindow);\n")
+    ws = connect_page(first)
+
+    assert app.switch_eel_web_root(str(second)) == ['focusWindow']
+    assert eel.root_path == str(second)
+    eel.updateProgress(10)
+    eel.focusWindow()
+    assert ws.calls() == ['updateProgress', 'focusWindow']
+
+
+def test_generation_switch_moves_web_root_without_resetting_functions(tmp_path, eel_state):
+    first, second = tmp_path / 'gen-1' / 'web', tmp_path / 'gen-2' / 'web'
+    write_web(first, SCRIPT)
+    write_web(second, SCRIPT.replace('{}', '{ /* v2 */ }'))
+    ws = connect_page(first)
+    launcher = types.SimpleNamespace(assets=app.StaticAssetBundle(str(first)).load(),
+                                     web_cache_dir=str(second), window_open=True)
+
+    app.EelToolLauncher.reload_web_assets(launcher)
+    eel.updateProgress(99)
+
+    assert eel.root_path == str(second)
+    assert launcher.assets.web_dir == str(second)
+    assert ws.calls()[-1] == 'updateProgress'
+    assert eel._mock_queue == []
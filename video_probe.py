@@ -0,0 +1,270 @@
+"""
+视频元数据探测（帧数、帧率）
+优先直接解析容器头部（MP4/MOV 的 moov、AVI 的 avih），无法解析时再用 OpenCV 读取属性，
+属性也拿不到时才逐帧解码计数。结果按 路径 + 大小 + 修改时间 缓存，重复扫描同一文件夹几乎没有开销；
+帧数为 0 的结果会标记为可疑且不写入缓存，避免悄悄破坏字幕偏移的累积帧数。
+"""
+
+import os
+import json
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None  # 未安装 OpenCV 时只能解析 MP4/MOV/AVI 头部
+
+MP4_EXTENSIONS = ('.mp4', '.m4v', '.mov', '.3gp')
+AVI_EXTENSIONS = ('.avi',)
+MP4_CONTAINERS = (b'moov', b'trak', b'mdia', b'minf', b'stbl')
+
+
+def _iter_boxes(data, start=0, end=None):
+    """遍历内存中的 MP4 box，产出 (类型, 内容起点, 内容终点)"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _find_moov(f, file_size):
+    """在文件顶层查找 moov box 并读入内存（跳过 mdat 等大块数据）"""
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        if len(header) < 8:
+            return None
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            return None
+        if box_type == b'moov':
+            f.seek(offset)
+            return f.read(size)
+        offset += size
+    return None
+
+
+def _parse_video_trak(data, start, end):
+    """解析单个 trak，是视频轨时返回 (帧数, 帧率)"""
+    handler = None
+    timescale = duration = None
+    frames = None
+    deltas = []
+
+    def walk(box_start, box_end):
+        nonlocal handler, timescale, duration, frames
+        for box_type, body, body_end in _iter_boxes(data, box_start, box_end):
+            if box_type in MP4_CONTAINERS:
+                walk(body, body_end)
+            elif box_type == b'hdlr':
+                handler = data[body + 8:body + 12]
+            elif box_type == b'mdhd':
+                if data[body] == 1:
+                    timescale, duration = struct.unpack_from('>IQ', data, body + 20)
+                else:
+                    timescale, duration = struct.unpack_from('>II', data, body + 12)
+            elif box_type == b'stsz':
+                frames = struct.unpack_from('>I', data, body + 8)[0]
+            elif box_type == b'stts':
+                entry_count = struct.unpack_from('>I', data, body + 4)[0]
+                for index in range(entry_count):
+                    deltas.append(struct.unpack_from('>II', data, body + 8 + index * 8))
+
+    walk(start, end)
+    if handler != b'vide':
+        return None
+
+    if frames is None and deltas:
+        frames = sum(count for count, _ in deltas)
+    if not frames or not timescale:
+        return frames or 0, 0.0
+    if len(deltas) == 1 and deltas[0][1] > 0:
+        # 恒定帧率：直接用 时间刻度 / 每帧时长，避免 duration 取整误差
+        fps = timescale / deltas[0][1]
+    else:
+        fps = frames * timescale / duration if duration else 0.0
+    return frames, fps
+
+
+def probe_mp4(path):
+    """从 MP4/MOV 头部读取视频轨的帧数和帧率，无法解析时返回 None"""
+    with open(path, 'rb') as f:
+        moov = _find_moov(f, os.fstat(f.fileno()).st_size)
+    if not moov:
+        return None
+    for box_type, body, body_end in _iter_boxes(moov, 8):
+        if box_type == b'trak':
+            result = _parse_video_trak(moov, body, body_end)
+            if result:
+                return result
+    return None
+
+
+def probe_avi(path):
+    """从 AVI 主头部 avih 读取帧数和帧率，无法解析时返回 None"""
+    with open(path, 'rb') as f:
+        header = f.read(12 + 12 + 8 + 56)
+    if len(header) < 88 or header[0:4] != b'RIFF' or header[8:12] != b'AVI ':
+        return None
+    if header[12:16] != b'LIST' or header[20:24] != b'hdrl' or header[24:28] != b'avih':
+        return None
+    micro_sec_per_frame, = struct.unpack_from('<I', header, 32)
+    total_frames, = struct.unpack_from('<I', header, 48)
+    fps = 1000000.0 / micro_sec_per_frame if micro_sec_per_frame else 0.0
+    return total_frames, fps
+
+
+def probe_opencv(path, decode=True):
+    """用 OpenCV 读取帧数和帧率；属性缺失且 decode 为 True 时逐帧解码计数"""
+    if cv2 is None:
+        return None
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            return None
+        frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        fps = float(capture.get(cv2.CAP_PROP_FPS) or 0.0)
+        if frames > 0 or not decode:
+            return frames, fps, 'opencv'
+        while capture.grab():
+            frames += 1
+        return frames, fps, 'decode'
+    finally:
+        capture.release()
+
+
+def probe_video(path):
+    """探测单个视频，返回 {frames, fps, source, suspect, error}（可在子进程中调用）"""
+    result = {"frames": 0, "fps": 0.0, "source": None, "suspect": False, "error": None}
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        probed = None
+        if extension in MP4_EXTENSIONS:
+            probed = probe_mp4(path)
+            source = 'mp4'
+        elif extension in AVI_EXTENSIONS:
+            probed = probe_avi(path)
+            source = 'avi'
+        if probed and probed[0] > 0 and probed[1] > 0:
+            result.update(frames=int(probed[0]), fps=float(probed[1]), source=source)
+        else:
+            probed = probe_opencv(path)
+            if probed:
+                result.update(frames=int(probed[0]), fps=float(probed[1]), source=probed[2])
+            elif cv2 is None:
+                result["error"] = "无法解析容器头部，且未安装 OpenCV"
+    except Exception as e:
+        result["error"] = str(e)
+
+    # 帧数或帧率为 0 会让累积帧数失真，标记出来交给调用方处理
+    result["suspect"] = result["frames"] <= 0 or result["fps"] <= 0
+    return result
+
+
+class ProbeCache:
+    """探测结果缓存：按绝对路径保存，文件大小或修改时间变化即失效"""
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.entries = {}
+        self.dirty = False
+        if cache_path:
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception:
+                self.entries = {}
+
+    @staticmethod
+    def key_of(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, stat.st_mtime
+
+    def get(self, path):
+        """返回缓存的结果；未命中或文件无法访问时返回 None"""
+        try:
+            key, size, mtime = self.key_of(path)
+        except OSError:
+            return None
+        entry = self.entries.get(key)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            return entry["result"]
+        return None
+
+    def put(self, path, result):
+        # 可疑结果（如文件仍在复制中）不缓存，下次重新探测
+        if result["suspect"]:
+            return
+        try:
+            key, size, mtime = self.key_of(path)
+        except OSError:
+            return  # 探测后文件被删除或移动
+        self.entries[key] = {"size": size, "mtime": mtime, "result": result}
+        self.dirty = True
+
+    def save(self):
+        if not self.cache_path or not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            temp_path = self.cache_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+            self.dirty = False
+        except Exception:
+            pass  # 缓存写入失败只影响下次扫描速度
+
+
+def probe_videos(paths, cache_path=None, max_workers=None):
+    """批量探测视频，返回 {路径: 结果}
+
+    命中缓存的文件直接返回；其余文件超过一个时分发到进程池并行探测。
+    无法访问的文件只在该路径的结果中记录 error（标记为可疑），不影响同一批的其他文件。
+    """
+    cache = ProbeCache(cache_path)
+    results = {}
+    pending = []
+    for path in paths:
+        try:
+            os.stat(path)
+        except OSError as e:
+            results[path] = {"frames": 0, "fps": 0.0, "source": None, "suspect": True,
+                             "error": str(e), "cached": False}
+            continue
+        cached = cache.get(path)
+        if cached is not None:
+            results[path] = dict(cached, cached=True)
+        else:
+            pending.append(path)
+
+    if len(pending) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            probed = list(executor.map(probe_video, pending, chunksize=4))
+    else:
+        probed = [probe_video(path) for path in pending]
+
+    for path, result in zip(pending, probed):
+        cache.put(path, result)
+        results[path] = dict(result, cached=False)
+
+    cache.save()
+    return results
@@ -1,20 +1,115 @@
 // 工具数据（将从 Python 后端加载）
 let tools = {};
 
+// 工具目录快照（保存在 localStorage，用于启动时立即渲染）
+const CATALOG_STORAGE_KEY = 'toolCatalogSnapshot';
+let catalogVersion = null;
+
+// 各工具的就绪状态（缓存、依赖、运行中进程数等）
+let toolStatus = {};
+
 // 页面加载完成后初始化
 window.addEventListener('DOMContentLoaded', async () => {
-    await loadTools();
-    renderTools();
+    // 先用上次保存的快照立即渲染，再向后端请求增量更新
+    if (loadCatalogSnapshot()) {
+        renderTools();
+    }
+    await syncCatalog();
+    await handlePendingIntents();
+    await loadProcessTable();
+    await loadLauncherStatus();
 });
 
-// 从后端加载工具列表
-async function loadTools() {
+// 处理其他启动实例转交过来的意图（如 --launch）
+async function handlePendingIntents() {
+    try {
+        const intents = await eel.consume_pending_intents()();
+        for (const intent of intents || []) {
+            if (intent.action === 'launch' && tools[intent.tool_id]) {
+                await launchTool(intent.tool_id);
+            }
+        }
+    } catch (error) {
+        console.error('处理待启动请求失败:', error);
+    }
+}
+
+// 聚焦窗口（由后端在重复启动时调用）
+function focusWindow() {
+    window.focus();
+}
+
+// 读取本地保存的工具目录快照
+function loadCatalogSnapshot() {
+    try {
+        const snapshot = JSON.parse(localStorage.getItem(CATALOG_STORAGE_KEY));
+        if (!snapshot || !snapshot.tools) {
+            return false;
+        }
+        tools = snapshot.tools;
+        catalogVersion = snapshot.version;
+        return Object.keys(tools).length > 0;
+    } catch (error) {
+        console.warn('读取工具目录快照失败:', error);
+        return false;
+    }
+}
+
+// 保存工具目录快照
+function saveCatalogSnapshot() {
     try {
-        tools = await eel.get_tools_list()();
-        console.log('工具列表加载成功:', tools);
+        localStorage.setItem(CATALOG_STORAGE_KEY, JSON.stringify({
+            version: catalogVersion,
+            tools: tools
+        }));
+    } catch (error) {
+        console.warn('保存工具目录快照失败:', error);
+    }
+}
+
+// 向后端请求目录增量，只重新渲染有变化的卡片
+async function syncCatalog() {
+    const knownRevisions = {};
+    for (const [toolId, toolInfo] of Object.entries(tools)) {
+        if (toolInfo.rev) {
+            knownRevisions[toolId] = toolInfo.rev;
+        }
+    }
+    
+    try {
+        const catalog = await eel.get_tools_catalog(knownRevisions)();
+        if (catalog.version === catalogVersion) {
+            return;
+        }
+        
+        const hadCards = document.querySelector('#toolsGrid .tool-card') !== null;
+        const updated = {};
+        for (const toolId of catalog.order) {
+            updated[toolId] = catalog.changed[toolId] || tools[toolId];
+        }
+        tools = updated;
+        catalogVersion = catalog.version;
+        saveCatalogSnapshot();
+        
+        if (!hadCards) {
+            renderTools();
+            return;
+        }
+        for (const toolId of catalog.removed) {
+            const card = findToolCard(toolId);
+            if (card) {
+                card.remove();
+            }
+        }
+        for (const toolId of Object.keys(catalog.changed)) {
+            renderToolCard(toolId);
+        }
+        console.log('工具目录已更新:', Object.keys(catalog.changed));
     } catch (error) {
         console.error('加载工具列表失败:', error);
-        showMessage('错误', '无法加载工具列表');
+        if (Object.keys(tools).length === 0) {
+            showMessage('错误', '无法加载工具列表');
+        }
     }
 }
 
@@ -29,10 +124,33 @@ function renderTools() {
     }
 }
 
+// 按工具 ID 查找卡片
+function findToolCard(toolId) {
+    return document.querySelector(`#toolsGrid .tool-card[data-tool-id="${toolId}"]`);
+}
+
+// 重新渲染单个卡片（不存在则按目录顺序插入）
+function renderToolCard(toolId) {
+    const grid = document.getElementById('toolsGrid');
+    const card = createToolCard(toolId, tools[toolId]);
+    card.style.animation = 'none';
+    
+    const existing = findToolCard(toolId);
+    if (existing) {
+        grid.replaceChild(card, existing);
+        return;
+    }
+    
+    const order = Object.keys(tools);
+    const nextId = order.slice(order.indexOf(toolId) + 1).find(id => findToolCard(id));
+    grid.insertBefore(card, nextId ? findToolCard(nextId) : null);
+}
+
 // 创建工具卡片元素
 function createToolCard(toolId, toolInfo) {
     const card = document.createElement('div');
     card.className = 'tool-card';
+    card.dataset.toolId = toolId;
     card.style.animationDelay = `${Object.keys(tools).indexOf(toolId) * 0.1}s`;
     
     card.innerHTML = `
@@ -44,24 +162,95 @@ function createToolCard(toolId, toolInfo) {
             <span>启动工具</span>
         </button>
     `;
+    applyToolStatus(card, toolId);
     
     return card;
 }
 
+// 从后端批量加载所有工具的就绪状态
+async function loadLauncherStatus() {
+    try {
+        updateToolStatus(await eel.get_launcher_status()());
+    } catch (error) {
+        console.error('加载工具状态失败:', error);
+    }
+}
+
+// 更新就绪状态（由后端在状态变化时推送）
+function updateToolStatus(status) {
+    toolStatus = status || {};
+    for (const toolId of Object.keys(toolStatus)) {
+        const card = findToolCard(toolId);
+        if (card) {
+            applyToolStatus(card, toolId);
+        }
+    }
+}
+
+// 根据就绪状态生成卡片角标
+function describeToolStatus(toolId) {
+    const status = toolStatus[toolId];
+    if (!status) {
+        // 状态未加载时沿用目录快照中的缓存状态
+        const toolInfo = tools[toolId];
+        return toolInfo && toolInfo.cached ? { text: '⚡ 已缓存', level: 'ready', title: '' } : null;
+    }
+    
+    const details = [];
+    if (status.size !== null) details.push(`文件 ${formatBytes(status.size)}`);
+    if (status.sha256) details.push(`SHA256 ${status.sha256.slice(0, 12)}`);
+    if (status.cache_age !== null) details.push(`已缓存 ${formatDuration(status.cache_age)}`);
+    if (status.last_launch_ms !== null) details.push(`上次启动 ${(status.last_launch_ms / 1000).toFixed(1)} 秒`);
+    const title = details.join('\n');
+    
+    if (status.running > 0) {
+        return { text: `▶ 运行中 ×${status.running}`, level: 'running', title: title };
+    }
+    if (status.ready) {
+        return { text: '⚡ 即时启动', level: 'ready', title: title };
+    }
+    if (status.cache !== 'fresh') {
+        return { text: '⬇ 需要下载', level: 'download', title: title };
+    }
+    return { text: '🔧 需检查依赖', level: 'deps', title: title };
+}
+
+// 把就绪状态角标应用到卡片上
+function applyToolStatus(card, toolId) {
+    const existing = card.querySelector('.tool-badge');
+    if (existing) {
+        existing.remove();
+    }
+    
+    const badge = describeToolStatus(toolId);
+    if (!badge) {
+        return;
+    }
+    const element = document.createElement('span');
+    element.className = `tool-badge ${badge.level}`;
+    element.textContent = badge.text;
+    element.title = badge.title;
+    card.prepend(element);
+}
+
 // 启动工具
 async function launchTool(toolId) {
     console.log('启动工具:', toolId);
     
-    // 显示进度模态框
-    showProgressModal('正在准备工具...');
+    // 显示进度模态框（只显示本次启动的进度）
+    showProgressModal('正在准备工具...', `launch:${toolId}`);
     
     try {
         // 调用后端启动工具
         const result = await eel.launch_tool(toolId)();
         
-        if (result.success) {
+        if (result.success && result.queued) {
+            closeProgressModal();
+            showMessage('已加入队列', result.message);
+        } else if (result.success) {
             closeProgressModal();
             showMessage('成功', `${tools[toolId].name} 已启动`);
+            syncCatalog();
         } else {
             closeProgressModal();
             showMessage('错误', result.message || '启动失败');
@@ -84,6 +273,7 @@ async function checkUpdates() {
         
         if (result.success) {
             showMessage('更新完成', result.message || '所有工具已更新到最新版本');
+            syncCatalog();
         } else {
             showMessage('更新失败', result.message || '检查更新时发生错误');
         }
@@ -94,8 +284,21 @@ async function checkUpdates() {
     }
 }
 
-// 更新进度回调
-function updateProgress(percent, status) {
+// 格式化字节数
+function formatBytes(bytes) {
+    if (bytes < 1024) return `${bytes} B`;
+    if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(1)} KB`;
+    return `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+}
+
+// 进度框当前跟踪的作业（为空时显示所有作业的进度）
+let progressJob = null;
+
+// 更新进度回调（detail 含吞吐量和剩余时间，由后端合并限速后推送）
+function updateProgress(percent, status, detail) {
+    if (progressJob && detail && detail.job && detail.job !== progressJob) {
+        return;  // 其他同时进行的作业
+    }
     const progressBar = document.getElementById('progressBar');
     const progressText = document.getElementById('progressText');
     const progressStatus = document.getElementById('progressStatus');
@@ -109,15 +312,194 @@ function updateProgress(percent, status) {
     }
     
     if (progressStatus && status) {
-        progressStatus.textContent = status;
+        let text = status;
+        if (detail && detail.done != null) {
+            text += ` ${formatBytes(detail.done)}`;
+            if (detail.total) text += ` / ${formatBytes(detail.total)}`;
+            if (detail.speed) text += `，${formatBytes(detail.speed)}/s`;
+            if (detail.eta != null) text += `，剩余 ${formatDuration(detail.eta)}`;
+        }
+        progressStatus.textContent = text;
+    }
+}
+
+// 加载运行中的工具进程表
+async function loadProcessTable() {
+    try {
+        updateProcessTable(await eel.get_process_table()());
+    } catch (error) {
+        console.error('加载进程表失败:', error);
+    }
+}
+
+// 格式化运行时长
+function formatDuration(seconds) {
+    const total = Math.floor(seconds);
+    const h = Math.floor(total / 3600);
+    const m = Math.floor((total % 3600) / 60);
+    const s = total % 60;
+    return h > 0 ? `${h}时${m}分` : (m > 0 ? `${m}分${s}秒` : `${s}秒`);
+}
+
+// 运行时长和排队时间在两次推送之间由页面计时（后端只在进程或资源档位变化时推送）
+let processTableAt = 0;
+
+function tickProcessDurations() {
+    const elapsed = (Date.now() - processTableAt) / 1000;
+    for (const cell of document.querySelectorAll('#processTableBody [data-seconds]')) {
+        cell.textContent = (cell.dataset.prefix || '') + formatDuration(Number(cell.dataset.seconds) + elapsed)
+            + (cell.dataset.suffix || '');
+    }
+}
+
+setInterval(tickProcessDurations, 1000);
+
+// 更新进程表（由后端推送）
+function updateProcessTable(table) {
+    const section = document.getElementById('processSection');
+    const body = document.getElementById('processTableBody');
+    const history = document.getElementById('processHistory');
+    if (!section || !body || !table) {
+        return;
+    }
+    
+    processTableAt = Date.now();
+    body.innerHTML = '';
+    for (const proc of table.running) {
+        const row = document.createElement('tr');
+        row.innerHTML = `
+            <td>${proc.name}</td>
+            <td>${proc.pid}</td>
+            <td data-seconds="${proc.runtime}">${formatDuration(proc.runtime)}</td>
+            <td>${table.sampling ? proc.cpu_percent.toFixed(1) + '%' : '-'}</td>
+            <td>${table.sampling ? proc.rss_mb.toFixed(0) + ' MB' : '-'}</td>
+            <td>
+                <button class="output-btn" onclick="showToolOutput(${proc.pid})">输出</button>
+                <button class="kill-btn" onclick="terminateProcess(${proc.pid})">终止</button>
+            </td>
+        `;
+        body.appendChild(row);
+    }
+    
+    const queue = table.queue || [];
+    for (const entry of queue) {
+        const row = document.createElement('tr');
+        row.className = 'queued-row';
+        row.innerHTML = `
+            <td>${entry.name}</td>
+            <td colspan="4" data-seconds="${entry.waiting}" data-prefix="排队中（第 ${entry.position} 位，已等待 " data-suffix="）">排队中（第 ${entry.position} 位，已等待 ${formatDuration(entry.waiting)}）</td>
+            <td><button class="kill-btn" onclick="cancelQueuedLaunch(${entry.ticket})">取消</button></td>
+        `;
+        body.appendChild(row);
+    }
+    
+    const recent = table.history.slice(0, 3);
+    history.innerHTML = '';
+    if (recent.length) {
+        history.appendChild(document.createTextNode('最近退出：'));
+        for (const entry of recent) {
+            const link = document.createElement('a');
+            link.href = '#';
+            link.textContent = `${entry.name} 退出码 ${entry.exit_code}（运行 ${formatDuration(entry.runtime)}${entry.reason ? '，' + entry.reason : ''}）`;
+            link.onclick = (e) => {
+                e.preventDefault();
+                showToolOutput(entry.pid);
+            };
+            history.appendChild(link);
+        }
+    }
+    
+    section.style.display = (table.running.length || queue.length || recent.length) ? 'block' : 'none';
+}
+
+// 查看工具输出（窗口打开期间增量刷新）
+let outputTimer = null;
+let outputSeq = 0;
+
+async function showToolOutput(pid) {
+    const modal = document.getElementById('outputModal');
+    const text = document.getElementById('outputText');
+    text.textContent = '';
+    outputSeq = 0;
+    modal.style.display = 'flex';
+    
+    const refresh = async () => {
+        try {
+            const output = await eel.get_tool_output(pid, outputSeq)();
+            if (!output.success) {
+                text.textContent = output.message;
+                stopOutputRefresh();
+                return;
+            }
+            document.getElementById('outputTitle').textContent = `${output.name} 输出 (PID ${output.pid})`;
+            if (outputSeq === 0 && output.dropped > 0) {
+                text.textContent += `…… 已省略较早的 ${output.dropped} 行\n`;
+            }
+            for (const line of output.lines) {
+                text.textContent += (line.stream === 'stderr' ? '! ' : '  ') + line.text + '\n';
+            }
+            outputSeq = output.seq;
+            text.scrollTop = text.scrollHeight;
+            if (output.finished) {
+                stopOutputRefresh();
+            }
+        } catch (error) {
+            console.error('获取工具输出失败:', error);
+            stopOutputRefresh();
+        }
+    };
+    
+    stopOutputRefresh();
+    await refresh();
+    if (modal.style.display === 'flex' && !outputTimer) {
+        outputTimer = setInterval(refresh, 1000);
+    }
+}
+
+function stopOutputRefresh() {
+    if (outputTimer) {
+        clearInterval(outputTimer);
+        outputTimer = null;
+    }
+}
+
+// 关闭输出模态框
+function closeOutputModal() {
+    stopOutputRefresh();
+    document.getElementById('outputModal').style.display = 'none';
+    applyPendingReload();
+}
+
+// 取消排队中的启动
+async function cancelQueuedLaunch(ticket) {
+    try {
+        const result = await eel.cancel_queued_launch(ticket)();
+        if (!result.success) {
+            showMessage('提示', result.message);
+        }
+    } catch (error) {
+        console.error('取消排队失败:', error);
+    }
+}
+
+// 终止工具进程
+async function terminateProcess(pid) {
+    try {
+        const result = await eel.terminate_tool_process(pid)();
+        if (!result.success) {
+            showMessage('提示', result.message);
+        }
+    } catch (error) {
+        console.error('终止进程失败:', error);
     }
 }
 
 // 显示进度模态框
-function showProgressModal(title) {
+function showProgressModal(title, job = null) {
     const modal = document.getElementById('progressModal');
     const titleElement = document.getElementById('progressTitle');
     
+    progressJob = job;
     if (titleElement) {
         titleElement.textContent = title;
     }
@@ -155,10 +537,55 @@ function showMessage(title, message) {
 function closeMessageModal() {
     const modal = document.getElementById('messageModal');
     modal.style.display = 'none';
+    applyPendingReload();
+}
+
+// 前端资源热更新：是否有等待执行的页面重新载入
+let pendingReload = false;
+
+// 前端资源已更新（由后端在更新完成后推送）
+function assetsUpdated(update) {
+    // 样式表就地替换：新样式载入完成后再移除旧的，避免页面闪烁
+    for (const style of update.styles || []) {
+        const link = document.querySelector(`link[rel="stylesheet"][href="${style.old}"]`);
+        if (!link) {
+            continue;
+        }
+        const replacement = link.cloneNode();
+        replacement.href = style.new;
+        replacement.onload = () => link.remove();
+        link.after(replacement);
+    }
+    console.log('前端资源已更新:', update.changed);
+    
+    if (update.reload) {
+        pendingReload = true;
+        applyPendingReload();
+    }
+}
+
+// 没有打开的对话框时重新载入页面（对话框打开时等用户关闭后再载入）
+function applyPendingReload() {
+    if (!pendingReload) {
+        return;
+    }
+    const modalOpen = ['progressModal', 'messageModal', 'outputModal'].some(id => {
+        const modal = document.getElementById(id);
+        return modal && modal.style.display === 'flex';
+    });
+    if (!modalOpen) {
+        pendingReload = false;
+        location.reload();
+    }
 }
 
 // Eel 暴露的函数供 Python 调用
 eel.expose(updateProgress);
+eel.expose(focusWindow);
+eel.expose(launchTool);
+eel.expose(updateProcessTable);
+eel.expose(updateToolStatus);
+eel.expose(assetsUpdated);
 
 // 键盘快捷键
 document.addEventListener('keydown', (e) => {
@@ -166,6 +593,7 @@ document.addEventListener('keydown', (e) => {
     if (e.key === 'Escape') {
         closeProgressModal();
         closeMessageModal();
+        closeOutputModal();
     }
     
     // Ctrl/Cmd + R 刷新